@@ -1,13 +1,16 @@
 # app/__init__.py
 
 from flask import Flask, render_template
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
+from typing import Optional, Dict, Any
 import os
-import json
+import weakref
 
-db = SQLAlchemy()
+from app.database import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
@@ -19,59 +22,96 @@ from app.models.writer   import Writer
 from app.models.class_ import Class
 from app.models.subject  import Subject
 from app.models.grade    import Grade
+from app.models.grade_event import GradeEvent
 from app.models.article  import Article
+from app.models.article_revision import ArticleRevision
+from app.models.feed     import Feed
+from app.models.job      import Job
+from app.models.outbound_email import OutboundEmail
+from app.models.room     import Room
+from app.models.period   import Period
+from app.models.timetable_entry import TimetableEntry
+from app.models.attendance_roster import AttendanceRoster, attendance_roster_member
+from app.models.attendance_record import AttendanceRecord
+from app.models.promotion_batch import PromotionBatch, promotion_move
 from app.models.teacher_junction import teacher_subject, teacher_class
 
-from app.services.user_services import create_user,get_user_by_username
-
-migrate = Migrate()
+from app.services.settings_services import get_config, get_school_info
+from app.utils import file_lock
+from app.instrumentation import init_sql_instrumentation, DEFAULT_N_PLUS_ONE_THRESHOLD
+from app.cache import init_cache
+from app.database import get_database_options, build_engine_options, build_binds, configure_engines
 
 # user_loader
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from app.services.user_services import get_user_by_id
+    return get_user_by_id(int(user_id))
 
-def create_app():
+def create_app(config_overrides: Optional[Dict[str, Any]] = None):
+    """Create the Flask app.
+
+    Args:
+        config_overrides: Values that take precedence over config.json, e.g. a
+            different DATABASE_URI for benchmarks.
+    """
     app = Flask(__name__, template_folder='templates', static_folder='static')
 
-    # Create the config.json file if it doesn't exist
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
-    if not os.path.exists(config_path):
-        with open(config_path, 'w') as f:
-            default_cfg = {"language": "en", 
-                           "SECRET_KEY": "super-secret-dev-key", 
-                           "DATABASE_URI": "sqlite:///../instance/school.db", 
-                           "first_load": True}
-            json.dump(default_cfg, f)
-
-    # Create the school_info.json file if it doesn't exist
-    school_info_path = os.path.join(os.path.dirname(__file__), '..', 'school_info.json')
-    if not os.path.exists(school_info_path):
-        with open(school_info_path, 'w') as f:
-            default_school_info = {"school_name": "Pardefaut", 
-                                   "school_address": "123 Main St.", 
-                                   "school_phone": "01-2345-6789", 
-                                   "school_email": "contact@pardefaut.com",
-                                   "school_website": "www.pardefaut.com",
-                                   "school_logo": "static/assets/uploads/logo.png"}
-            json.dump(default_school_info, f)
-
-    school_info = {}
-
-    with open(school_info_path) as f:
-        school_info = json.load(f)
-
-    # Load config
-    with open(config_path) as f:
-        config = json.load(f)
+    # Load config.json and school_info.json (created with defaults if missing).
+    # Both are kept in memory by the settings service and reloaded when changed on disk.
+    config = dict(get_config())
+    config.update(config_overrides or {})
+    get_school_info()
 
     app.config['SECRET_KEY'] = config.get('SECRET_KEY', 'dev_key')
     app.config['SQLALCHEMY_DATABASE_URI'] = config.get('DATABASE_URI', 'sqlite:///../instance/school.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DATABASE_OPTIONS'] = get_database_options(config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config['DATABASE_OPTIONS'])
+    app.config['SQLALCHEMY_BINDS'] = build_binds(config)
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = config.get('SQL_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    if 'SQL_SERVER_TIMING' in config:
+        app.config['SQL_SERVER_TIMING'] = config['SQL_SERVER_TIMING']
+    for key in ('METRICS_DIR', 'METRICS_ALLOWED_IPS', 'METRICS_TOKEN', 'PROFILE_DIR', 'PROFILE_SAMPLE_RATE', 'PROFILE_MODE',
+                'PROFILE_INTERVAL', 'PROFILE_KEEP', 'CACHE_BACKEND', 'CACHE_URL', 'CACHE_MAX_ENTRIES', 'CACHE_TTL',
+                'REALTIME_COALESCE_SECONDS', 'SOCKETIO_ASYNC_MODE', 'JOB_TIMEOUT', 'STATIC_EXPORT_ON_CHANGE',
+                'TIMETABLE_TIME_LIMIT', 'ATTENDANCE_TERMS', 'FEED_BASE_URL', 'REALTIME_ENABLED'):
+        if key in config:
+            app.config[key] = config[key]
+    # Outgoing mail: MAIL_SERVER, MAIL_PORT, ... (see app/mail.py)
+    app.config.update({key: value for key, value in config.items() if key.startswith('MAIL_')})
+
+    # Behind PROXY_COUNT reverse proxies, take the client address and scheme
+    # from the X-Forwarded-* headers they set (and only from those).
+    if config.get('PROXY_COUNT'):
+        app.config['PROXY_COUNT'] = count = int(config['PROXY_COUNT'])
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=count, x_proto=count, x_host=count)
 
     # Init extensions
     db.init_app(app)
+    configure_engines(app)
+    init_cache(app)
+    init_sql_instrumentation(app)
     login_manager.init_app(app)
+    # Optional subsystems are imported here, and only when enabled: Socket.IO
+    # alone is a good part of the import time of a web worker.
+    if config.get('METRICS_ENABLED', True):
+        from app.metrics import init_metrics
+        init_metrics(app)
+    if config.get('REALTIME_ENABLED', True):
+        from app.realtime import init_realtime
+        init_realtime(app)
+    from app.profiling import init_profiling
+    from app.assets import init_assets
+    from app.jobs import init_jobs
+    from app.mail import init_mail
+    from app.timetable import init_timetable
+    init_profiling(app)
+    init_assets(app)
+    init_jobs(app)
+    init_mail(app)
+    init_timetable(app)
 
     # Import and register blueprints
     from app.routes.auth import auth_bp
@@ -79,40 +119,99 @@ def create_app():
     from app.routes.teacher import teacher_bp
     from app.routes.student import student_bp
     from app.routes.writer import writer_bp
+    from app.routes.articles import articles_bp
+    from app.routes.jobs import jobs_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(teacher_bp)
     app.register_blueprint(student_bp)
     app.register_blueprint(writer_bp)
+    app.register_blueprint(articles_bp)
+    app.register_blueprint(jobs_bp)
 
     @app.route('/')
     def index():
         return render_template('index.html')
 
-    migrate.init_app(app, db)
+    @app.context_processor
+    def inject_school_info():
+        return {'school_info': get_school_info()}
+
+    # Flask-Migrate pulls in Alembic, which is only needed by `flask db ...`.
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-    print("[INFO] Database migration initialized.")
-    # Create the database if it doesn't exist
-    if not os.path.exists(os.path.join(os.path.dirname(__file__), '..', 'instance', 'school.db')) and config.get('first_load'):
-        with app.app_context():
-            db.create_all()
-            print("[INFO] Database created.")
     if config.get('first_load'):
-        # Create an admin user
+        initialize_database(app)
+
+    _apps.add(app)
+
+    return app
+
+def initialize_database(app: Flask) -> None:
+    """One-time setup: create the tables and the default admin user.
+
+    Runs under a file lock and leaves a marker in the instance folder, so
+    that when several workers boot at once only one of them does the work,
+    and later boots skip it without touching config.json.
+    """
+    marker_path = os.path.join(app.instance_path, '.initialized')
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if _read_marker(marker_path) == database_uri:
+        return
+
+    with file_lock(os.path.join(app.instance_path, '.initialize.lock')):
+        if _read_marker(marker_path) == database_uri:
+            return  # another worker got there first
+
+        from app.services.user_services import create_user, get_user_by_username
         with app.app_context():
+            # Only the primary: a read replica gets its schema through replication.
+            db.create_all(bind_key=None)
+            app.logger.info("Database tables created.")
             if not get_user_by_username('admin'):
                 create_user(
                     username='admin',
                     password='admin',
                     role='admin')
-                print("[INFO] Admin user created.")
+                app.logger.info("Admin user created.")
             else:
-                print("[INFO] Admin user already exists.")
-                
-    config['first_load'] = False
-    with open(config_path, 'w') as f:
-        json.dump(config, f)
-    print("[INFO] Config updated.")
-    
-    return app
+                app.logger.info("Admin user already exists.")
+
+        with open(marker_path, 'w') as f:
+            f.write(database_uri)
+
+def _read_marker(marker_path: str):
+    if not os.path.exists(marker_path):
+        return None
+    with open(marker_path) as f:
+        return f.read()
+
+def _dispose_engines(app: Flask) -> None:
+    """Drop pooled connections inherited from the parent process (without closing them)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+# Pre-forking servers (gunicorn --preload) create the app once in the master:
+# workers must not reuse the connections it opened. One hook for every app
+# created in this process; apps that were dropped are not kept alive.
+_apps: "weakref.WeakSet[Flask]" = weakref.WeakSet()
+
+def _dispose_engines_after_fork() -> None:
+    for app in list(_apps):
+        _dispose_engines(app)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines_after_fork)
+
+def warm_up(app: Flask) -> None:
+    """Do the lazy work of the first requests up front: compile every template
+    and fingerprint the static files (`flask assets build` compresses them).
+    Call it in the master process before forking workers (see wsgi.py)."""
+    from app.assets import build_assets
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+    build_assets(app, compress=False)
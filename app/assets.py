@@ -0,0 +1,187 @@
+from flask import Flask, current_app, has_request_context, request, url_for
+from flask.cli import AppGroup
+from werkzeug.datastructures import Accept
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+from werkzeug.wrappers import Request
+from urllib.parse import quote
+from typing import Dict, Optional, Tuple
+import click
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz variants are made
+    brotli = None
+
+# Fingerprinted static files.
+#
+# asset_url('style.css') gives /assets/<hash of the content>/style.css. A
+# changed file gets a new URL, so these URLs can be cached by browsers for a
+# year without revalidation ("immutable"). Text files are served pre-compressed
+# (.br or .gz next to the file, made by `flask assets build`) when the browser
+# accepts it, and as they are otherwise: requests never write to app/static.
+
+ONE_YEAR = 365 * 24 * 3600
+FINGERPRINT_LENGTH = 12
+COMPRESSIBLE_TYPES = {".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".xml", ".html", ".ico"}
+# Encodings in order of preference, and the suffix of their pre-compressed files.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# path -> ((mtime_ns, size, inode), fingerprint)
+_fingerprints: Dict[str, Tuple[tuple, str]] = {}
+
+def _file_version(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def fingerprint(path: str) -> Optional[str]:
+    """Hash of a file's content, recomputed only when the file changes; None if missing."""
+    version = _file_version(path)
+    if version is None:
+        return None
+    known = _fingerprints.get(path)
+    if known and known[0] == version:
+        return known[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()[:FINGERPRINT_LENGTH]
+    _fingerprints[path] = (version, value)
+    return value
+
+def _static_path(filename: str) -> Tuple[str, Optional[str]]:
+    """(filename relative to the static folder, absolute path or None if unsafe)."""
+    filename = filename.lstrip('/')
+    if filename.startswith('static/'):  # settings store the logo as "static/assets/uploads/..."
+        filename = filename[len('static/'):]
+    return filename, safe_join(current_app.static_folder, filename)
+
+def asset_url(filename: str) -> str:
+    """Template global: fingerprinted URL of a file in app/static."""
+    filename, path = _static_path(filename)
+    value = fingerprint(path) if path else None
+    if value is None:
+        return url_for('static', filename=filename)
+    script_root = request.script_root if has_request_context() else ''
+    return f"{script_root}{AssetMiddleware.PREFIX}{value}/{quote(filename)}"
+
+def precompress(path: str) -> int:
+    """Write the .br/.gz variants of a text file if missing or older than the
+    file. Returns the number of variants written."""
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_TYPES:
+        return 0
+    source_mtime = os.stat(path).st_mtime_ns
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors[".br"] = brotli.compress
+    content = None
+    written = 0
+    for suffix, compress in compressors.items():
+        target = path + suffix
+        if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_mtime:
+            continue
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compress(content))
+            os.replace(tmp_path, target)
+        except OSError:
+            return written  # read-only static folder: serve uncompressed
+        written += 1
+    return written
+
+def _negotiate(path: str, accept_encodings: Accept) -> Tuple[str, Optional[str]]:
+    """The file to send for `path` and its Content-Encoding."""
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_TYPES:
+        return path, None
+    source = os.stat(path)
+    for encoding, suffix in ENCODINGS:
+        if not accept_encodings[encoding]:
+            continue
+        try:
+            variant = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        # A variant older than the file (edited since the last build) is stale.
+        if variant.st_mtime_ns >= source.st_mtime_ns and variant.st_size < source.st_size:
+            return path + suffix, encoding
+    return path, None
+
+def build_assets(app: Flask, compress: bool = True) -> Dict[str, int]:
+    """Fingerprint every static file and, unless told otherwise, pre-compress
+    the text files. Run by `flask assets build`, and by warm_up() without
+    compressing."""
+    stats = {"files": 0, "compressed": 0}
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for root, _, filenames in os.walk(app.static_folder):
+        for filename in filenames:
+            if filename.endswith(suffixes) or filename.startswith('.tmp-'):
+                continue
+            path = os.path.join(root, filename)
+            fingerprint(path)
+            if compress:
+                stats["compressed"] += precompress(path)
+            stats["files"] += 1
+    return stats
+
+assets_cli = AppGroup('assets', help='Static asset commands.')
+
+@assets_cli.command('build')
+def build_assets_command():
+    """Fingerprint and pre-compress the files in app/static."""
+    stats = build_assets(current_app)
+    click.echo(f"{stats['files']} files, {stats['compressed']} compressed variants written.")
+
+class AssetMiddleware:
+    """Answers /assets/<fingerprint>/<filename> in front of the Flask app, so
+    asset requests skip the session, login and database hooks entirely."""
+
+    PREFIX = '/assets/'
+
+    def __init__(self, wsgi_app, static_folder: str):
+        self.wsgi_app = wsgi_app
+        self.static_folder = static_folder
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get('PATH_INFO', '')
+        if not path_info.startswith(self.PREFIX) or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.wsgi_app(environ, start_response)
+        version, _, filename = path_info[len(self.PREFIX):].partition('/')
+        path = safe_join(self.static_folder, filename) if filename else None
+        if path is None or not os.path.isfile(path):
+            return NotFound()(environ, start_response)
+
+        variant, encoding = _negotiate(path, Request(environ).accept_encodings)
+        current = version == fingerprint(path)
+        # An outdated URL (e.g. from a page cached before a deploy) gets the
+        # current file, but it must not be cached under that URL.
+        response = send_file(variant, environ, mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                             conditional=True, max_age=ONE_YEAR if current else 0)
+        if current:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response(environ, start_response)
+
+def init_assets(app: Flask) -> None:
+    """Serve /assets/<fingerprint>/<filename> and add asset_url() to templates."""
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.cli.add_command(assets_cli)
+    app.wsgi_app = AssetMiddleware(app.wsgi_app, app.static_folder)
@@ -0,0 +1,410 @@
+from flask import Flask, current_app, g, has_app_context, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Iterable, List, Optional
+import hashlib
+import inspect as pyinspect
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from app.database import RoutingSession
+from app.metrics import record_cache_access
+
+try:
+    import redis
+except ImportError:  # only needed for CACHE_BACKEND "redis"
+    redis = None
+
+# Cache for service functions that read single rows or small lists.
+#
+#     @cached("class:{class_id}")
+#     def get_class_by_id(class_id): ...
+#
+# Every entity has version counters: "<table>:<id>" for one row, "<table>" for
+# any row of the table (what lists depend on) and "<table>:*", bumped by
+# invalidate() for writes to unknown rows. A cached result is stored under the current versions of
+# the keys it depends on, so bumping a version makes the old entries
+# unreachable; nothing is ever deleted or updated in place. Versions are bumped
+# automatically after a commit, for every row the ORM inserted, updated or
+# deleted (see _collect_invalidations). Writes that bypass the ORM (bulk
+# UPDATE/INSERT statements) must call invalidate().
+#
+# Versions live in the backend, which is shared by all workers ("sqlite" or
+# "redis"), or only in this process ("memory", fine for a single process).
+# Values are kept in an in-process LRU in front of the backend: a versioned
+# entry never changes, so it can't go stale there.
+
+DEFAULT_BACKEND = "sqlite"
+DEFAULT_MAX_ENTRIES = 10000
+# Seconds a value stays in a shared backend.
+DEFAULT_TTL = 3600
+
+_PENDING_KEY = "cache_invalidations"
+_MISSING = object()
+
+# ===========================
+# BACKENDS
+# ===========================
+
+class LRUCache:
+    """Thread-safe least-recently-used mapping with a maximum size."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+class MemoryBackend:
+    """Versions in this process only: with several workers, one worker's
+    writes are not seen by the others."""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_versions(self, keys: List[str]) -> List[int]:
+        return [self._versions.get(key, 0) for key in keys]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get(self, key: str) -> Any:
+        return _MISSING  # values are only in the LRU
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+class SQLiteBackend:
+    """Versions and values in a local SQLite file shared by all workers of one machine."""
+
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries "
+                               "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, and new ones after a fork.
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=wal")
+            connection.execute("PRAGMA synchronous=normal")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return self._local.connection
+
+    def get_versions(self, keys: List[str]) -> List[int]:
+        rows = self._connection().execute(
+            f"SELECT key, version FROM versions WHERE key IN ({','.join('?' * len(keys))})", keys)
+        versions = dict(rows.fetchall())
+        return [versions.get(key, 0) for key in keys]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        with self._connection() as connection:
+            connection.executemany("INSERT INTO versions (key, version) VALUES (?, 1) "
+                                   "ON CONFLICT(key) DO UPDATE SET version = version + 1", [(key,) for key in keys])
+
+    def get(self, key: str) -> Any:
+        row = self._connection().execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                                         (key, time.time())).fetchone()
+        return pickle.loads(row[0]) if row else _MISSING
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                               (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + self.ttl))
+            if random.random() < 0.01:
+                connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+
+class RedisBackend:
+    """Versions and values in a Redis (or compatible) server shared by all machines."""
+
+    def __init__(self, url: str, ttl: int):
+        if redis is None:
+            raise RuntimeError('CACHE_BACKEND "redis" needs the redis package (pip install redis).')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get_versions(self, keys: List[str]) -> List[int]:
+        return [int(version or 0) for version in self.client.mget(["v:" + key for key in keys])]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incr("v:" + key)
+        pipeline.execute()
+
+    def get(self, key: str) -> Any:
+        value = self.client.get("e:" + key)
+        return pickle.loads(value) if value is not None else _MISSING
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set("e:" + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=self.ttl)
+
+class ServiceCache:
+    """The cache of one app: a backend plus the in-process LRU. All keys start
+    with `namespace`, so apps on different databases can share a backend."""
+
+    def __init__(self, backend, max_entries: int, namespace: str):
+        self.backend = backend
+        self.lru = LRUCache(max_entries)
+        self.namespace = namespace
+
+    def get(self, key: str) -> Any:
+        value = self.lru.get(key)
+        if value is _MISSING:
+            value = self.backend.get(key)
+            if value is not _MISSING:
+                self.lru.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.lru.set(key, value)
+        self.backend.set(key, value)
+
+def _get_cache() -> Optional[ServiceCache]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("service_cache")
+
+# ===========================
+# ORM RESULTS
+# ===========================
+# Results are stored as plain column values, without relationships or session
+# state, and turned back into objects attached to the current session.
+
+def _freeze(result: Any) -> Any:
+    from app import db
+    if result is None:
+        return None
+    if isinstance(result, db.Model):
+        mapper = inspect(result).mapper
+        return (mapper.class_, {attr.key: getattr(result, attr.key) for attr in mapper.column_attrs})
+    return [_freeze(item) for item in result]
+
+def _thaw(frozen: Any) -> Any:
+    from app import db
+    if frozen is None:
+        return None
+    if isinstance(frozen, list):
+        return [_thaw(item) for item in frozen]
+    cls, values = frozen
+    mapper = inspect(cls)
+    key = identity_key(cls, tuple(values[column.key] for column in mapper.primary_key))
+    existing = db.session.identity_map.get(key)
+    if existing is not None:
+        return existing
+    obj = mapper.class_manager.new_instance()
+    for name, value in values.items():
+        set_committed_value(obj, name, value)
+    make_transient_to_detached(obj)
+    db.session.add(obj)  # persistent again, without a query
+    return obj
+
+# ===========================
+# DECORATOR AND INVALIDATION
+# ===========================
+
+def cached(*depends_on: str):
+    """Cache a service function's result until one of its version keys is bumped.
+
+    Args:
+        depends_on: Version keys, formatted with the function's arguments,
+            e.g. "class:{class_id}" for one row or "class" for any row of the table.
+
+    The function must return a model instance, None or a list of model
+    instances. Within a transaction that has written, the cache is bypassed so
+    the caller sees its own changes.
+    """
+    def decorator(func):
+        signature = pyinspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+        # A row also depends on its table's "<table>:*" key (see invalidate()).
+        templates = list(depends_on) + sorted({t.split(":", 1)[0] + ":*" for t in depends_on if ":" in t})
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = _get_cache()
+            if cache is None or _has_pending_writes():
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            version_keys = [cache.namespace + template.format(**bound.arguments) for template in templates]
+            versions = cache.backend.get_versions(version_keys)
+            key = f"{cache.namespace}{name}{tuple(bound.arguments.values())!r}@{versions}"
+
+            frozen = cache.get(key)
+            record_cache_access("service", frozen is not _MISSING)
+            if frozen is not _MISSING:
+                return _thaw(frozen)
+            result = func(*args, **kwargs)
+            if not _has_pending_writes():  # the query may have autoflushed
+                cache.set(key, _freeze(result))
+            return result
+        return wrapper
+    return decorator
+
+def _has_pending_writes() -> bool:
+    from app import db
+    return db.session.registry.has() and bool(db.session.info.get(_PENDING_KEY))
+
+def invalidate(table: str, row_id: Optional[Any] = None) -> None:
+    """Mark one row of a table, or all of them, as changed; the versions are
+    bumped when the current transaction commits. Only needed for writes that
+    don't go through ORM objects.
+
+    Args:
+        table: Table name, e.g. "class".
+        row_id: Primary key of the changed row (None: any row may have changed).
+    """
+    from app import db
+    keys = db.session.info.setdefault(_PENDING_KEY, set())
+    keys.add(table)
+    keys.add(f"{table}:{'*' if row_id is None else row_id}")
+
+@event.listens_for(RoutingSession, "after_flush")
+def _collect_invalidations(db_session, flush_context):
+    keys = db_session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*db_session.new, *db_session.dirty, *db_session.deleted):
+        mapper = inspect(obj).mapper
+        row_id = mapper.primary_key_from_instance(obj)
+        for table in mapper.tables:
+            keys.add(table.name)
+            keys.add(f"{table.name}:{row_id[0] if len(row_id) == 1 else '-'.join(map(str, row_id))}")
+
+@event.listens_for(RoutingSession, "after_commit")
+def _bump_versions(db_session):
+    keys = db_session.info.pop(_PENDING_KEY, None)
+    cache = _get_cache()
+    if keys and cache is not None:
+        cache.backend.bump(sorted(cache.namespace + key for key in keys))
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _discard_invalidations(db_session, transaction):
+    if transaction.parent is None:
+        db_session.info.pop(_PENDING_KEY, None)  # rolled back: nothing changed
+
+# ===========================
+# TEMPLATE FRAGMENTS
+# ===========================
+
+# Stands in for the request's CSRF token in stored fragments.
+_CSRF_PLACEHOLDER = "\x00csrf\x00"
+
+def cache_version(table: str, row_id: Optional[Any] = None) -> str:
+    """Template global: the current version of one row ("user", 5) or of a
+    whole table ("article"), to use as part of a {% cache %} key."""
+    cache = _get_cache()
+    if cache is None:
+        return ""
+    keys = [f"{table}:{row_id}", f"{table}:*"] if row_id is not None else [table]
+    # Table versions are asked for once per row: look each key up once per request.
+    known = g.setdefault("_cache_versions", {}) if has_request_context() else {}
+    missing = [key for key in keys if key not in known]
+    if missing:
+        known.update(zip(missing, cache.backend.get_versions([cache.namespace + key for key in missing])))
+    return f"{keys[0]}@{'.'.join(str(known[key]) for key in keys)}"
+
+class FragmentCacheExtension(Extension):
+    """{% cache key, ... %}...{% endcache %}: render the block once per distinct key.
+
+    The key should contain cache_version() of everything the block shows, e.g.
+
+        {% cache cache_version('user', user.id) %}<tr>...</tr>{% endcache %}
+
+    The CSRF token of the current request is never stored: a fragment rendered
+    for one session is served to the next with that session's token.
+    """
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        location = nodes.Const(f"{parser.name}:{lineno}")
+        return nodes.CallBlock(self.call_method("_render", [location, nodes.List(parts)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render(self, location: str, parts: list, caller) -> Markup:
+        cache = _get_cache()
+        if cache is None:
+            return caller()
+        key = f"{cache.namespace}fragment:{location}:{parts!r}"
+        html = cache.get(key)
+        record_cache_access("fragment", html is not _MISSING)
+        if html is _MISSING:
+            rendered = caller()
+            if _has_pending_writes():
+                return rendered  # shows uncommitted changes under the old versions
+            token = g.get(current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token")) \
+                if has_request_context() else None
+            cache.set(key, str(rendered).replace(token, _CSRF_PLACEHOLDER) if token else str(rendered))
+            return rendered
+        if _CSRF_PLACEHOLDER in html:
+            from flask_wtf.csrf import generate_csrf
+            html = html.replace(_CSRF_PLACEHOLDER, generate_csrf())
+        return Markup(html)
+
+def init_cache(app: Flask) -> None:
+    """Set up the service cache of `app` and the {% cache %} template tag.
+
+    CACHE_BACKEND: "sqlite" (default, instance/cache.db), "redis", "memory" or "none".
+    CACHE_URL: SQLite file or Redis URL.
+    CACHE_MAX_ENTRIES: size of the in-process LRU (default 10000).
+    CACHE_TTL: seconds a value stays in a shared backend (default 3600).
+    """
+    backend_name = app.config.setdefault("CACHE_BACKEND", DEFAULT_BACKEND)
+    ttl = app.config.get("CACHE_TTL", DEFAULT_TTL)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals["cache_version"] = cache_version
+    if backend_name == "none":
+        return
+    if backend_name == "memory":
+        backend = MemoryBackend()
+    elif backend_name == "sqlite":
+        path = app.config.get("CACHE_URL") or os.path.join(app.instance_path, "cache.db")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        backend = SQLiteBackend(path, ttl)
+    elif backend_name == "redis":
+        backend = RedisBackend(app.config.get("CACHE_URL") or "redis://localhost:6379/0", ttl)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND {backend_name!r} (use sqlite, redis, memory or none)")
+    namespace = hashlib.sha1(app.config["SQLALCHEMY_DATABASE_URI"].encode()).hexdigest()[:8] + ":"
+    app.extensions["service_cache"] = ServiceCache(backend, app.config.get("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+                                                   namespace)
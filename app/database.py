@@ -0,0 +1,214 @@
+from flask import current_app, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql.dml import UpdateBase
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, Mapping
+import time
+
+# Connection tuning, overridable with a "DATABASE_OPTIONS" object in config.json.
+# The SQLite keys are applied as PRAGMAs on every new connection; the pool keys
+# are passed to create_engine() for client/server databases (PostgreSQL, MySQL).
+DEFAULT_DATABASE_OPTIONS = {
+    # SQLite
+    "journal_mode": "wal",       # readers no longer wait for a writer's commit
+    "synchronous": "normal",     # safe with WAL, one fsync per checkpoint instead of per commit
+    "cache_size": -20000,        # negative = KiB, i.e. ~20 MB page cache per connection
+    "mmap_size": 134217728,      # 128 MB memory-mapped reads
+    "busy_timeout": 5000,        # ms to wait for a lock before raising "database is locked"
+    # PostgreSQL / MySQL
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    # Read replica: after a write, a browser session keeps reading from the
+    # primary this long, so it sees its own change despite replication lag.
+    "replica_sticky_seconds": 5,
+}
+
+# Bind key of the optional read replica ("DATABASE_REPLICA_URI" in config.json).
+REPLICA_BIND = "replica"
+
+_PRIMARY_UNTIL_KEY = "_db_primary_until"
+_WROTE_KEY = "wrote"
+
+# True while a @read_only function runs.
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+_JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+_SYNCHRONOUS_MODES = {"off", "normal", "full", "extra"}
+_POOL_KEYS = ("pool_size", "max_overflow", "pool_pre_ping", "pool_recycle")
+
+def get_database_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """Merge the "DATABASE_OPTIONS" of config.json over the defaults."""
+    options = dict(DEFAULT_DATABASE_OPTIONS)
+    options.update(config.get("DATABASE_OPTIONS") or {})
+    return options
+
+def is_sqlite(database_uri: str) -> bool:
+    return make_url(database_uri).get_backend_name() == "sqlite"
+
+def build_engine_options(database_uri: str, options: Mapping[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for create_engine(), i.e. SQLALCHEMY_ENGINE_OPTIONS.
+
+    Args:
+        database_uri (str): The database URI.
+        options (Mapping[str, Any]): Merged database options (see get_database_options).
+
+    Returns:
+        Dict[str, Any]: Engine options for this kind of database.
+    """
+    if is_sqlite(database_uri):
+        # The driver's own busy handler, in seconds; the PRAGMA below sets the same thing.
+        return {"connect_args": {"timeout": int(options["busy_timeout"]) / 1000}}
+    return {key: options[key] for key in _POOL_KEYS if options.get(key) is not None}
+
+def sqlite_pragmas(options: Mapping[str, Any]) -> Dict[str, Any]:
+    """Validated PRAGMA values; config values end up in SQL, so only known ones are allowed."""
+    journal_mode = str(options["journal_mode"]).lower()
+    synchronous = str(options["synchronous"]).lower()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"Invalid journal_mode: {options['journal_mode']}")
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid synchronous mode: {options['synchronous']}")
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "cache_size": int(options["cache_size"]),
+        "mmap_size": int(options["mmap_size"]),
+        "busy_timeout": int(options["busy_timeout"]),
+    }
+
+def register_sqlite_pragmas(engine: Engine, pragmas: Mapping[str, Any]) -> None:
+    """Apply `pragmas` to every connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def build_binds(config: Mapping[str, Any]) -> Dict[str, str]:
+    """SQLALCHEMY_BINDS: the read replica, if one is configured."""
+    replica_uri = config.get("DATABASE_REPLICA_URI")
+    return {REPLICA_BIND: replica_uri} if replica_uri else {}
+
+def configure_engines(app) -> None:
+    """Hook the connect-time PRAGMAs into every SQLite engine of the app, and
+    enable replica routing if a replica is configured.
+    Must run after db.init_app(app), before the first connection is opened."""
+    from app import db
+    pragmas = sqlite_pragmas(app.config["DATABASE_OPTIONS"])
+    # A read-only connection cannot switch the journal mode; the primary sets it.
+    replica_pragmas = {name: value for name, value in pragmas.items() if name != "journal_mode"}
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name == "sqlite":
+                register_sqlite_pragmas(engine, replica_pragmas if bind_key == REPLICA_BIND else pragmas)
+        if REPLICA_BIND in db.engines:
+            app.after_request(_pin_primary_after_write)
+
+@contextmanager
+def replica_reads():
+    """Let the queries run inside this block go to the read replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+def read_only(func):
+    """Mark a service function as read-only: its queries may go to the read replica.
+
+    Only use it for functions whose callers can tolerate slightly stale data;
+    anything read right before a write (lookups by id, uniqueness checks)
+    should stay on the primary.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+class RoutingSession(Session):
+    """Session that sends the queries of @read_only functions to the replica bind.
+
+    Everything else goes to the primary, and so does everything once the
+    session has written (read-your-writes), or while the browser session is
+    pinned to the primary after a recent write (see _pin_primary_after_write).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _replica_reads.get() and not isinstance(clause, UpdateBase):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None and not self._flushing and not self.info.get(_WROTE_KEY) \
+                    and not _pinned_to_primary():
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(db_session, flush_context):
+    db_session.info[_WROTE_KEY] = True
+
+def _pinned_to_primary() -> bool:
+    return has_request_context() and flask_session.get(_PRIMARY_UNTIL_KEY, 0) > time.time()
+
+def _pin_primary_after_write(response):
+    """After a request that wrote, keep this browser on the primary for a few
+    seconds so the page it is redirected to shows the change."""
+    from app import db
+    if db.session.registry.has() and db.session.info.get(_WROTE_KEY):
+        sticky_seconds = current_app.config["DATABASE_OPTIONS"]["replica_sticky_seconds"]
+        flask_session[_PRIMARY_UNTIL_KEY] = time.time() + sticky_seconds
+    return response
+
+# ===========================
+# UNIT OF WORK
+# ===========================
+
+_TRANSACTION_KEY = "in_transaction"
+
+@contextmanager
+def transaction():
+    """Group several service calls into one atomic commit.
+
+    Inside the block, service functions only flush (ids are still assigned);
+    the block commits once at the end, or rolls everything back if it raises.
+    Nested blocks join the outer one.
+
+        with transaction():
+            teacher = create_teacher(...)
+            add_teacher_to_class(class_id, teacher.id)
+    """
+    from app import db
+    if db.session.info.get(_TRANSACTION_KEY):
+        yield db.session
+        return
+    db.session.info[_TRANSACTION_KEY] = True
+    try:
+        yield db.session
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop(_TRANSACTION_KEY, None)
+
+def in_transaction() -> bool:
+    from app import db
+    return bool(db.session.info.get(_TRANSACTION_KEY))
+
+def commit_or_flush(commit: bool = True) -> None:
+    """End a service function's write: commit, unless the caller passed
+    commit=False or is inside transaction(), in which case only flush."""
+    from app import db
+    if commit and not in_transaction():
+        db.session.commit()
+    else:
+        db.session.flush()
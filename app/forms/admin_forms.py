@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, DateField, SubmitField, SelectField, SelectMultipleField, FileField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional
+from wtforms import StringField, PasswordField, BooleanField, DateField, SubmitField, SelectField, SelectMultipleField, FileField, IntegerField
+from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional, NumberRange
 from flask_wtf.file import FileAllowed
 from wtforms.widgets import TextArea
 from app.models.user import User
@@ -301,6 +301,11 @@ class UpdateTeacherForm(FlaskForm):
             if user:
                 raise ValidationError('That email is already registered. Please choose a different one.')
         return True
+
+class TeacherAssignmentsForm(FlaskForm):
+    """Form for assigning classes or subjects to many teachers at once. The
+    checkboxes are `pair` fields of the page ("<teacher id>:<id>"), read by the view."""
+    submit = SubmitField('Save Assignments')
     
 # Article-Related Forms
 class CreateWriterForm(FlaskForm):
@@ -400,11 +405,16 @@ class DeleteArticleForm(FlaskForm):
     confirm_delete = BooleanField('I confirm I want to delete this article', validators=[DataRequired()])
     submit = SubmitField('Delete Article')
 
+class RestoreArticleRevisionForm(FlaskForm):
+    """Form for restoring an earlier revision of an article."""
+    submit = SubmitField('Restore This Revision')
+
 
 # Subject Management Forms
 class CreateSubjectForm(FlaskForm):
     """Form for creating a new subject."""
     name = StringField('Subject Name', validators=[DataRequired(), Length(min=2, max=100)])
+    weekly_periods = IntegerField('Periods per Week', default=3, validators=[DataRequired(), NumberRange(min=1, max=20)])
     submit = SubmitField('Create Subject')
 
     def validate_name(self, name):
@@ -415,6 +425,7 @@ class CreateSubjectForm(FlaskForm):
 class UpdateSubjectForm(FlaskForm):
     """Form for updating an existing subject."""
     name = StringField('Subject Name', validators=[DataRequired(), Length(min=2, max=100)])
+    weekly_periods = IntegerField('Periods per Week', validators=[DataRequired(), NumberRange(min=1, max=20)])
     submit = SubmitField('Update Subject')
 
     def __init__(self, original_name=None, *args, **kwargs):
@@ -432,6 +443,24 @@ class DeleteSubjectForm(FlaskForm):
     confirm_delete = BooleanField('I confirm I want to delete this subject', validators=[DataRequired()])
     submit = SubmitField('Delete Subject')
 
+# Timetable Forms
+class SolveTimetableForm(FlaskForm):
+    """Form for recomputing the timetable."""
+    full = BooleanField('Start from scratch (moves every lesson)')
+    submit = SubmitField('Solve Timetable')
+
+
+# Promotion Forms
+class PromotionForm(FlaskForm):
+    """Form for the year-end promotion. The target of each class is a
+    `target_<class id>` field of the page, read by the view."""
+    preview = SubmitField('Preview')
+    submit = SubmitField('Promote Students')
+
+class UndoPromotionForm(FlaskForm):
+    """Form for undoing a promotion."""
+    submit = SubmitField('Undo')
+
 
 # School Settings Forms
 
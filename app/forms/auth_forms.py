@@ -12,4 +12,12 @@ class LoginForm(FlaskForm):
     def validate_user_activation(self, field):
         user = User.query.filter_by(username=self.username.data).first()
         if user and not user.activated:
-            raise ValidationError('This user does not exist or is not activated.')
\ No newline at end of file
+            raise ValidationError('This user does not exist or is not activated.')
+class ForgotPasswordForm(FlaskForm):
+    email = StringField('Email', validators=[DataRequired(), Email()])
+    submit = SubmitField('Send Reset Link')
+
+class ResetPasswordForm(FlaskForm):
+    password = PasswordField('New Password', validators=[DataRequired(), Length(min=6)])
+    confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
+    submit = SubmitField('Reset Password')
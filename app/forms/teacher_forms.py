@@ -0,0 +1,23 @@
+from flask_wtf import FlaskForm
+from wtforms import FloatField, StringField, SelectField, SelectMultipleField, DateField, SubmitField
+from wtforms.validators import DataRequired, InputRequired, Length, NumberRange, Optional
+
+class GradeEntryForm(FlaskForm):
+    """Form for a teacher to grade a student of one of their classes.
+    The student and subject choices are set by the view."""
+
+    student_id = SelectField('Student', coerce=int, validators=[DataRequired()])
+    subject_id = SelectField('Subject', coerce=int, validators=[DataRequired()])
+    grade = FloatField('Grade', validators=[InputRequired(), NumberRange(min=0, max=20)])  # 0 is a valid grade
+    comment = StringField('Comment', validators=[Optional(), Length(max=250)])
+    submit = SubmitField('Add Grade')
+
+class AttendanceForm(FlaskForm):
+    """Form for the roll call of a class: the students left unchecked are
+    present. The slot and student choices are set by the view."""
+
+    date = DateField('Date', validators=[DataRequired()])
+    slot = SelectField('Period', coerce=int, default=0)
+    absent = SelectMultipleField('Absent', coerce=int)
+    late = SelectMultipleField('Late', coerce=int)
+    submit = SubmitField('Save Roll Call')
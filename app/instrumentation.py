@@ -0,0 +1,79 @@
+from flask import Flask, g, has_app_context, request
+from sqlalchemy import event
+from collections import Counter
+from typing import Dict, Any, Optional
+import re
+import time
+
+# A statement run more often than this in one request is logged as a likely N+1.
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")  # "(?, ?, ?)" -> "(?)"
+
+def _statement_shape(statement: str) -> str:
+    """Reduce a SQL statement to its shape: parameters are already "?" placeholders,
+    so only whitespace and the length of IN lists need normalizing."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+def get_request_sql_stats() -> Optional[Dict[str, Any]]:
+    """SQL stats of the current request: `count`, `duration` (seconds) and
+    `statements` (Counter of statement shapes). None outside a request."""
+    if not has_app_context():
+        return None
+    return g.get("_sql_stats")
+
+# The start time lives on the execution context, which is dropped with the
+# statement: a statement that fails (no after_cursor_execute) leaves nothing behind.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    stats = get_request_sql_stats()
+    if stats is None or started is None:
+        return
+    stats["count"] += 1
+    stats["duration"] += time.perf_counter() - started
+    stats["statements"][_statement_shape(statement)] += 1
+
+def init_sql_instrumentation(app: Flask) -> None:
+    """Count queries, DB time and repeated statements per request.
+
+    Logs a warning when a request runs the same statement more than
+    SQL_N_PLUS_ONE_THRESHOLD times, and in debug mode adds a Server-Timing
+    header (shown in the browser's network panel).
+    Must run after db.init_app(app).
+    """
+    from app import db
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_sql_stats():
+        g._sql_stats = {"count": 0, "duration": 0.0, "statements": Counter()}
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = get_request_sql_stats()
+        if stats is None:
+            return response
+
+        threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+        for statement, times in stats["statements"].most_common():
+            if times <= threshold:
+                break
+            app.logger.warning("Possible N+1 on %s %s: statement ran %d times (%d queries, %.1f ms total): %s",
+                               request.method, request.path, times, stats["count"],
+                               stats["duration"] * 1000, statement[:300])
+
+        if app.config.get("SQL_SERVER_TIMING", app.debug):
+            total = time.perf_counter() - g._request_started
+            response.headers.add("Server-Timing",
+                                 f'db;dur={stats["duration"] * 1000:.1f};desc="{stats["count"]} queries"')
+            response.headers.add("Server-Timing", f"app;dur={total * 1000:.1f}")
+        return response
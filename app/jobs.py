@@ -0,0 +1,182 @@
+from flask import Flask, current_app
+from flask.cli import AppGroup
+from typing import Callable, Dict
+import click
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+# Background jobs.
+#
+# Slow work (exports, mail, imports, ...) is queued with
+# job_services.enqueue_job('<task name>', *args) and the request returns right
+# away. Jobs are rows of the `job` table, so they are stored in the app's
+# database (SQLite by default) and survive restarts. `flask jobs worker` runs
+# them in a pool of threads, optionally in several processes:
+#
+#   flask jobs worker --threads 4 --processes 2
+#
+# A task is a function registered under a name with @task; it runs in an app
+# context and its return value is stored as the job's result. A task that
+# raises is retried with exponential backoff (see fail_job), and a job whose
+# worker died is given back after JOB_TIMEOUT seconds.
+
+DEFAULT_POLL_INTERVAL = 1.0
+# Seconds after which a running job is considered abandoned.
+DEFAULT_JOB_TIMEOUT = 600
+
+TASKS: Dict[str, Callable] = {}
+
+def task(name: str):
+    """Register a function as the task `name`."""
+    def decorator(func):
+        if name in TASKS and TASKS[name] is not func:
+            raise ValueError(f"Task {name!r} is already registered")
+        TASKS[name] = func
+        func.task_name = name
+        return func
+    return decorator
+
+def run_job(job) -> bool:
+    """Run a claimed job in the current app context and record the outcome.
+    Returns True if it succeeded."""
+    from app import db
+    from app.services.job_services import complete_job, fail_job
+    func = TASKS.get(job.name)
+    if func is None:
+        fail_job(job, f"Unknown task {job.name!r}", retry=False)
+        return False
+    payload = json.loads(job.payload)
+    try:
+        result = func(*payload.get("args", []), **payload.get("kwargs", {}))
+    except Exception:
+        error = traceback.format_exc()
+        db.session.rollback()
+        current_app.logger.warning("Job %s (%s) failed, attempt %s/%s", job.id, job.name, job.attempts,
+                                   job.max_attempts)
+        fail_job(job, error)
+        return False
+    complete_job(job, result)
+    return True
+
+class Worker:
+    """Runs queued jobs in `threads` threads until stopped."""
+
+    def __init__(self, app: Flask, threads: int = 4, poll_interval: float = DEFAULT_POLL_INTERVAL, burst: bool = False):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.burst = burst  # stop once the queue is empty
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.job_timeout = app.config.get('JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+        self._stop = threading.Event()
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    def stop(self, *_) -> None:
+        """Finish the running jobs, then exit."""
+        self._stop.set()
+
+    def requeue_stale_jobs(self) -> None:
+        """Give back abandoned jobs; runs at most every JOB_TIMEOUT/2 seconds per process."""
+        from app.services.job_services import requeue_stale_jobs
+        with self._requeue_lock:
+            now = time.monotonic()
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.job_timeout / 2
+        count = requeue_stale_jobs(self.job_timeout)
+        if count:
+            self.app.logger.warning("Job worker %s: %s abandoned job(s) given back", self.name, count)
+
+    def run(self) -> None:
+        pool = [threading.Thread(target=self._loop, args=(f"{self.name}:{index}",), name=f"job-worker-{index}")
+                for index in range(self.threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    def _loop(self, worker_id: str) -> None:
+        from app.services.job_services import claim_job
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    self.requeue_stale_jobs()
+                    job = claim_job(worker_id)
+                    if job is not None:
+                        run_job(job)
+                        continue
+            except Exception:
+                self.app.logger.exception("Job worker %s: unexpected error", worker_id)
+            if self.burst:
+                return
+            self._stop.wait(self.poll_interval)
+
+def _run_worker_process(app: Flask, threads: int, poll_interval: float, burst: bool) -> None:
+    worker = Worker(app, threads, poll_interval, burst)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+jobs_cli = AppGroup('jobs', help='Background job commands.')
+
+@jobs_cli.command('worker')
+@click.option('--threads', '-t', default=4, show_default=True, help='Jobs run at once per process.')
+@click.option('--processes', '-p', default=1, show_default=True, help='Worker processes.')
+@click.option('--poll-interval', default=DEFAULT_POLL_INTERVAL, show_default=True,
+              help='Seconds between checks of an empty queue.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def worker_command(threads, processes, poll_interval, burst):
+    """Run queued jobs until interrupted."""
+    app = current_app._get_current_object()
+    click.echo(f"[INFO] Job worker: {processes} process(es) x {threads} thread(s), tasks: {', '.join(sorted(TASKS))}")
+    if processes <= 1:
+        _run_worker_process(app, threads, poll_interval, burst)
+        return
+    # Forked children inherit the app; their pooled connections are dropped after the fork.
+    context = multiprocessing.get_context('fork')
+    children = [context.Process(target=_run_worker_process, args=(app, threads, poll_interval, burst))
+                for _ in range(processes)]
+    for child in children:
+        child.start()
+    # Ctrl-C reaches the children directly; pass SIGTERM on to them.
+    signal.signal(signal.SIGTERM, lambda *_: [os.kill(child.pid, signal.SIGTERM) for child in children])
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for child in children:
+        child.join()
+
+@jobs_cli.command('status')
+def status_command():
+    """Show the number of jobs in each status."""
+    from app.services.job_services import get_job_counts
+    for status, count in get_job_counts().items():
+        click.echo(f"{status:8} {count}")
+
+@jobs_cli.command('retry')
+@click.argument('job_id', type=int)
+def retry_command(job_id):
+    """Queue a failed job again."""
+    from app.services.job_services import retry_job
+    if retry_job(job_id) is None:
+        raise click.ClickException(f"Job {job_id} does not exist or has not failed.")
+    click.echo(f"[INFO] Job {job_id} queued again.")
+
+@jobs_cli.command('prune')
+@click.option('--days', default=7, show_default=True, help='Age of the oldest finished job kept.')
+def prune_command(days):
+    """Delete old finished jobs."""
+    from app.services.job_services import prune_jobs
+    click.echo(f"[INFO] {prune_jobs(days)} jobs deleted.")
+
+def init_jobs(app: Flask) -> None:
+    """Add the `flask jobs` commands.
+
+    JOB_TIMEOUT: seconds after which a running job is given back (default 600).
+    """
+    app.cli.add_command(jobs_cli)
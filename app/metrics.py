@@ -0,0 +1,282 @@
+from flask import Flask, Response, abort, g, request
+from typing import Dict, Tuple, Optional
+import glob
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Metrics in the Prometheus text format, served at /metrics.
+#
+# Each worker process counts in memory (a dict update under a lock per
+# event) and writes its totals to <METRICS_DIR>/<pid>.json at most once per
+# FLUSH_INTERVAL. /metrics sums the files of all workers, so any worker can
+# answer the scrape. Gauges (pool state, memory) are reported per live
+# worker, labelled with its pid.
+
+FLUSH_INTERVAL = 1.0
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "aqsam_http_requests_total": ("counter", "HTTP requests by endpoint, method and status."),
+    "aqsam_http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint."),
+    "aqsam_db_queries_total": ("counter", "SQL statements executed, by endpoint."),
+    "aqsam_db_query_duration_seconds_total": ("counter", "Time spent in SQL statements, by endpoint."),
+    "aqsam_cache_requests_total": ("counter", "Cache lookups by cache and result (hit or miss)."),
+    "aqsam_db_pool_checked_out": ("gauge", "Database connections currently checked out, per worker."),
+    "aqsam_db_pool_overflow": ("gauge", "Connections open beyond pool_size, per worker."),
+    "aqsam_db_pool_size": ("gauge", "Configured connection pool size, per worker."),
+    "aqsam_process_resident_memory_bytes": ("gauge", "Resident memory of each worker."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Registry:
+    """In-memory metrics of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], list] = {}  # [bucket counts..., sum, count]
+        self.last_flush = 0.0
+
+    def inc(self, name: str, labels: Labels, amount: float) -> None:
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+_registry = _Registry()
+_metrics_dir: Optional[str] = None
+
+if hasattr(os, 'register_at_fork'):
+    # A forked worker starts from zero and writes its own file.
+    os.register_at_fork(after_in_child=_registry.reset)
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def inc_counter(name: str, amount: float = 1.0, **labels) -> None:
+    """Add `amount` to a counter (see METRICS for the names)."""
+    _registry.inc(name, _labels(labels), amount)
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record a value in a histogram (see METRICS for the names)."""
+    _registry.observe(name, _labels(labels), value)
+
+def record_cache_access(cache: str, hit: bool) -> None:
+    """Count a lookup in a named cache; the hit ratio is derived from these."""
+    _registry.inc("aqsam_cache_requests_total", (("cache", cache), ("result", "hit" if hit else "miss")), 1.0)
+
+# ===========================
+# PER-WORKER FILES
+# ===========================
+
+def _resident_memory() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _gauges() -> list:
+    """Current pool and memory gauges of this worker. Needs an app context."""
+    from app import db
+    gauges = []
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        labels = {"bind": bind or "default"}
+        for name, method in (("aqsam_db_pool_checked_out", "checkedout"), ("aqsam_db_pool_overflow", "overflow"),
+                             ("aqsam_db_pool_size", "size")):
+            if hasattr(pool, method):
+                # overflow() is negative while the pool itself still has free slots
+                gauges.append([name, labels, max(0, getattr(pool, method)())])
+    rss = _resident_memory()
+    if rss is not None:
+        gauges.append(["aqsam_process_resident_memory_bytes", {}, rss])
+    return gauges
+
+def flush(force: bool = False) -> None:
+    """Write this worker's totals to its file, at most once per FLUSH_INTERVAL."""
+    now = time.monotonic()
+    if _metrics_dir is None or (not force and now - _registry.last_flush < FLUSH_INTERVAL):
+        return
+    with _registry.lock:
+        _registry.last_flush = now
+        data = {
+            "pid": os.getpid(),
+            "counters": [[name, dict(labels), value] for (name, labels), value in _registry.counters.items()],
+            "histograms": [[name, dict(labels), values] for (name, labels), values in _registry.histograms.items()],
+        }
+    data["gauges"] = _gauges()
+    fd, tmp_path = tempfile.mkstemp(dir=_metrics_dir, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, os.path.join(_metrics_dir, f"{os.getpid()}.json"))
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _remove_dead_worker_files(directory: str) -> None:
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            pid = int(os.path.basename(path)[:-len('.json')])
+        except ValueError:
+            continue
+        if not _pid_alive(pid):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+# ===========================
+# EXPOSITION
+# ===========================
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for key, value in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+def render_metrics() -> str:
+    """Sum the files of all workers into the Prometheus text format."""
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], list] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    for path in glob.glob(os.path.join(_metrics_dir, '*.json')):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # removed or replaced while reading
+        for name, labels, value in data["counters"]:
+            key = (name, _labels(labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, values in data["histograms"]:
+            key = (name, _labels(labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        # Counters of finished workers still count; their gauges no longer apply.
+        if _pid_alive(data["pid"]):
+            for name, labels, value in data["gauges"]:
+                gauges[(name, _labels(dict(labels, pid=data["pid"])))] = value
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=repr(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(dict(labels, le='+Inf'))} {values[-1]}")
+                lines.append(f"{name}_sum{_format_labels(dict(labels))} {values[-2]}")
+                lines.append(f"{name}_count{_format_labels(dict(labels))} {values[-1]}")
+        else:
+            source = counters if kind == "counter" else gauges
+            for (metric, labels), value in sorted(source.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+    return "\n".join(lines) + "\n"
+
+# ===========================
+# FLASK INTEGRATION
+# ===========================
+
+def init_metrics(app: Flask) -> None:
+    """Time every request and serve /metrics.
+
+    METRICS_DIR holds one file per worker (default: instance/metrics).
+    METRICS_TOKEN, when set, must be sent as `Authorization: Bearer <token>`;
+    otherwise METRICS_ALLOWED_IPS lists who may scrape (default: localhost
+    only, "*" for anyone), see _may_scrape.
+    """
+    global _metrics_dir
+    _metrics_dir = app.config.setdefault('METRICS_DIR', os.path.join(app.instance_path, 'metrics'))
+    os.makedirs(_metrics_dir, exist_ok=True)
+    _remove_dead_worker_files(_metrics_dir)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get('_metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+        endpoint = request.endpoint or 'unmatched'  # keeps 404 paths out of the labels
+        inc_counter("aqsam_http_requests_total", endpoint=endpoint, method=request.method,
+                    status=response.status_code)
+        observe("aqsam_http_request_duration_seconds", time.perf_counter() - started, endpoint=endpoint)
+
+        from app.instrumentation import get_request_sql_stats
+        stats = get_request_sql_stats()
+        if stats and stats["count"]:
+            inc_counter("aqsam_db_queries_total", stats["count"], endpoint=endpoint)
+            inc_counter("aqsam_db_query_duration_seconds_total", stats["duration"], endpoint=endpoint)
+        flush()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        if not _may_scrape(app):
+            abort(403)
+        flush(force=True)
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+_FORWARDED_HEADERS = ('X-Forwarded-For', 'X-Real-IP', 'Forwarded')
+
+def _may_scrape(app: Flask) -> bool:
+    """Whether the current request may read /metrics.
+
+    With METRICS_TOKEN, only the token counts. Without it, the client address
+    is checked against METRICS_ALLOWED_IPS. Behind a reverse proxy on the same
+    host every request comes from 127.0.0.1, so a request that went through a
+    proxy (it carries X-Forwarded-For or similar) is refused, unless PROXY_COUNT
+    is set and ProxyFix has put the real client address in remote_addr.
+    """
+    token = app.config.get('METRICS_TOKEN')
+    if token:
+        scheme, _, sent = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(sent.encode(), token.encode())
+
+    allowed = app.config.get('METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if '*' in allowed:
+        return True
+    proxied = any(header in request.headers for header in _FORWARDED_HEADERS)
+    if proxied and 'werkzeug.proxy_fix.orig' not in request.environ:
+        return False
+    return request.remote_addr in allowed
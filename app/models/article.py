@@ -14,6 +14,10 @@ class Article(db.Model):
         is_published (bool): Flag indicating if the article is published.
     """
     __tablename__ = "article"
+    __table_args__ = (
+        # Backs the public listing: filter on is_published, page by created_at.
+        db.Index("ix_article_published_created", "is_published", "created_at"),
+    )
 
     id            = db.Column(db.Integer, primary_key=True)
     title         = db.Column(db.String(200), nullable=False)
@@ -23,7 +27,9 @@ class Article(db.Model):
     last_edited   = db.Column(db.DateTime,   default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
     is_published  = db.Column(db.Boolean,    default=False)
 
-    author = db.relationship("Writer", back_populates="articles")
+    author    = db.relationship("Writer", back_populates="articles")
+    revisions = db.relationship("ArticleRevision", back_populates="article",
+                                cascade="all, delete-orphan", order_by="ArticleRevision.number")
 
     def __repr__(self):
         return f"<Article '{self.title}'>"
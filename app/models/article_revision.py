@@ -0,0 +1,37 @@
+from app import db
+
+class ArticleRevision(db.Model):
+    """Model for earlier versions of an article.
+
+    The article itself always holds the latest body in full. Each revision
+    stores a compressed reverse delta that turns the body of the next
+    revision (or the current article for the newest one) into its own body.
+
+    Attributes:
+        id (int): Unique identifier for the revision.
+        article_id (int): ID of the article.
+        number (int): Revision number, starting at 1 for the first version.
+        title (str): Title of the article at this revision.
+        created_at (datetime): When this version of the article was written.
+        content_length (int): Length of the body at this revision, in characters.
+        delta (bytes): zlib-compressed reverse delta (see revision_services).
+        delta_size (int): Size of `delta` in bytes.
+    """
+    __tablename__ = "article_revision"
+    __table_args__ = (
+        db.UniqueConstraint("article_id", "number", name="uq_article_revision_number"),
+    )
+
+    id             = db.Column(db.Integer, primary_key=True)
+    article_id     = db.Column(db.Integer, db.ForeignKey("article.id"), nullable=False, index=True)
+    number         = db.Column(db.Integer, nullable=False)
+    title          = db.Column(db.String(200), nullable=False)
+    created_at     = db.Column(db.DateTime)
+    content_length = db.Column(db.Integer, nullable=False)
+    delta          = db.Column(db.LargeBinary, nullable=False)
+    delta_size     = db.Column(db.Integer, nullable=False)
+
+    article = db.relationship("Article", back_populates="revisions")
+
+    def __repr__(self):
+        return f"<ArticleRevision {self.number} of article {self.article_id}>"
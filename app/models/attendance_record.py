@@ -0,0 +1,32 @@
+from app import db
+
+class AttendanceRecord(db.Model):
+    """Model for one roll call of a class: every student at once.
+
+    Bit i of `absent` (and `late`) is the student at position i of the
+    roster, little-endian, with trailing zero bytes dropped: a class with
+    nobody absent stores an empty value. On SQLite the table is WITHOUT ROWID,
+    so the (class, date, slot) key is the only index.
+
+    Attributes:
+        class_id (int): ID of the class.
+        date (date): Day of the roll call.
+        slot (int): Period of the day (Period.slot), 0 for a whole-day roll call.
+        roster_id (int): The roster the bitmaps are aligned to.
+        absent (bytes): Bitmap of absent students.
+        late (bytes): Bitmap of late students.
+        taken_by (int): ID of the teacher who took it.
+    """
+    __tablename__ = "attendance_record"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    class_id  = db.Column(db.Integer, db.ForeignKey("class.id"), primary_key=True)
+    date      = db.Column(db.Date, primary_key=True)
+    slot      = db.Column(db.Integer, primary_key=True, default=0)
+    roster_id = db.Column(db.Integer, db.ForeignKey("attendance_roster.id"), nullable=False)
+    absent    = db.Column(db.LargeBinary, nullable=False, default=b"")
+    late      = db.Column(db.LargeBinary, nullable=False, default=b"")
+    taken_by  = db.Column(db.Integer, db.ForeignKey("teachers.id"))
+
+    def __repr__(self):
+        return f"<AttendanceRecord class {self.class_id} {self.date} #{self.slot}>"
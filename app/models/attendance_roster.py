@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime, timezone
+
+# Position of each student in a roster: bit `position` of an attendance
+# bitmap is that student.
+attendance_roster_member = db.Table(
+    "attendance_roster_member",
+    db.Column("roster_id",  db.Integer, db.ForeignKey("attendance_roster.id"), primary_key=True),
+    db.Column("position",   db.Integer, primary_key=True),
+    db.Column("student_id", db.Integer, db.ForeignKey("student.id"), nullable=False, index=True),
+)
+
+class AttendanceRoster(db.Model):
+    """Model for a snapshot of the students of a class, as attendance saw it.
+
+    A new snapshot is only taken when the class changes, so a roster is
+    shared by every roll call until then, and old roll calls still read
+    correctly after students move.
+
+    Attributes:
+        id (int): Primary key.
+        class_id (int): ID of the class.
+        size (int): Number of students.
+        digest (str): Hash of the student ids, to spot an unchanged class.
+        created_at (datetime): When the snapshot was taken (UTC).
+    """
+    __tablename__ = "attendance_roster"
+    __table_args__ = (
+        db.Index("ix_attendance_roster_class_id_id", "class_id", "id"),
+    )
+
+    id         = db.Column(db.Integer, primary_key=True)
+    class_id   = db.Column(db.Integer, db.ForeignKey("class.id"), nullable=False)
+    size       = db.Column(db.Integer, nullable=False)
+    digest     = db.Column(db.String(40), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<AttendanceRoster {self.id} class {self.class_id} ({self.size})>"
@@ -0,0 +1,22 @@
+from app import db
+
+class Feed(db.Model):
+    """Model for pre-rendered syndication feeds.
+
+    Feeds are rendered once per change to their content and served as-is.
+
+    Attributes:
+        name (str): Identifier of the feed (e.g. "articles.atom").
+        content (bytes): The rendered feed document.
+        etag (str): Entity tag of the content, used for conditional GET.
+        last_modified (datetime): When the content last changed (UTC).
+    """
+    __tablename__ = "feed"
+
+    name          = db.Column(db.String(50), primary_key=True)
+    content       = db.Column(db.LargeBinary, nullable=False)
+    etag          = db.Column(db.String(64),  nullable=False)
+    last_modified = db.Column(db.DateTime,    nullable=False)
+
+    def __repr__(self):
+        return f"<Feed {self.name}>"
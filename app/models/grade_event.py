@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime, timezone
+
+class GradeEvent(db.Model):
+    """Model for the log of grade changes pushed to students in real time.
+
+    Rows are written in the same transaction as the grade change. Their ids
+    increase, so a client that reconnects can ask for everything after the
+    last id it saw (its cursor).
+
+    Attributes:
+        id (int): Position of the event in the log.
+        student_id (int): ID of the student whose grade changed.
+        grade_id (int): ID of the grade (kept after the grade is deleted).
+        action (str): 'created' | 'updated' | 'deleted'.
+        created_at (datetime): When the change happened (UTC).
+    """
+    __tablename__ = "grade_event"
+    __table_args__ = (
+        db.Index("ix_grade_event_student_id_id", "student_id", "id"),
+    )
+
+    id         = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("student.id"), nullable=False)
+    grade_id   = db.Column(db.Integer, nullable=False)
+    action     = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<GradeEvent {self.id} {self.action} grade {self.grade_id}>"
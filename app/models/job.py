@@ -0,0 +1,51 @@
+from app import db
+from datetime import datetime, timezone
+
+class Job(db.Model):
+    """Model for background jobs, run by `flask jobs worker` outside of requests.
+
+    Attributes:
+        id (int): Primary key.
+        name (str): Name of the registered task to run.
+        payload (str): JSON object with the task's "args" and "kwargs".
+        status (str): 'queued' | 'running' | 'done' | 'failed'.
+        priority (int): Higher runs first.
+        dedup_key (str): At most one queued job has a given key.
+        attempts (int): Number of times the job was started.
+        max_attempts (int): Attempts before the job is marked failed.
+        run_at (datetime): Not run before this time (UTC, naive); used for retry backoff.
+        locked_by (str): Worker running the job.
+        locked_at (datetime): When the worker took it.
+        last_error (str): Traceback of the last failed attempt.
+        result (str): JSON result of the task.
+        created_by (int): ID of the user who queued the job, if any.
+        created_at (datetime): When the job was queued.
+        finished_at (datetime): When the job ended (done or failed).
+    """
+    __tablename__ = "job"
+    __table_args__ = (
+        db.Index("ix_job_claim", "status", "priority", "run_at"),
+        db.Index("ix_job_dedup_key", "dedup_key", unique=True,
+                 sqlite_where=db.text("status = 'queued'"),
+                 postgresql_where=db.text("status = 'queued'")),
+    )
+
+    id           = db.Column(db.Integer, primary_key=True)
+    name         = db.Column(db.String(100), nullable=False)
+    payload      = db.Column(db.Text, nullable=False, default='{}')
+    status       = db.Column(db.String(10), nullable=False, default='queued')
+    priority     = db.Column(db.Integer, nullable=False, default=0)
+    dedup_key    = db.Column(db.String(200))
+    attempts     = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at       = db.Column(db.DateTime, nullable=False)
+    locked_by    = db.Column(db.String(100))
+    locked_at    = db.Column(db.DateTime)
+    last_error   = db.Column(db.Text)
+    result       = db.Column(db.Text)
+    created_by   = db.Column(db.Integer, db.ForeignKey("user.id"))
+    created_at   = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at  = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.status}>"
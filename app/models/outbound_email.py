@@ -0,0 +1,42 @@
+from app import db
+from datetime import datetime, timezone
+
+class OutboundEmail(db.Model):
+    """Model for the outbox: rendered emails waiting to be sent.
+
+    Attributes:
+        id (int): Primary key.
+        to_address (str): Recipient.
+        subject (str): Subject line.
+        body_text (str): Plain text body.
+        body_html (str): HTML body, if the template has one.
+        priority (int): Higher is sent first (password resets before bulk mail).
+        status (str): 'queued' | 'sending' | 'sent' | 'failed'.
+        attempts (int): Number of delivery attempts.
+        next_attempt_at (datetime): Not sent before this time (UTC, naive); used for retry backoff.
+        claimed_at (datetime): When a sender took the email (status 'sending').
+        last_error (str): Error of the last failed attempt.
+        created_at (datetime): When the email was queued.
+        sent_at (datetime): When the server accepted it.
+    """
+    __tablename__ = "outbound_email"
+    __table_args__ = (
+        db.Index("ix_outbound_email_claim", "status", "priority", "next_attempt_at"),
+    )
+
+    id              = db.Column(db.Integer, primary_key=True)
+    to_address      = db.Column(db.String(150), nullable=False)
+    subject         = db.Column(db.String(200), nullable=False)
+    body_text       = db.Column(db.Text, nullable=False)
+    body_html       = db.Column(db.Text)
+    priority        = db.Column(db.Integer, nullable=False, default=0)
+    status          = db.Column(db.String(10), nullable=False, default='queued')
+    attempts        = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    claimed_at      = db.Column(db.DateTime)
+    last_error      = db.Column(db.Text)
+    created_at      = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at         = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} to {self.to_address} {self.status}>"
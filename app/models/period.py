@@ -0,0 +1,29 @@
+from app import db
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+class Period(db.Model):
+    """Model for a teaching period of the weekly timetable.
+    Attributes:
+        id (int): The unique identifier for the period.
+        day (int): Day of the week, 0 = Monday.
+        slot (int): Position of the period in the day, from 1.
+        start_time (str): e.g. "08:00".
+        end_time (str): e.g. "08:55"."""
+    __tablename__ = "period"
+    __table_args__ = (
+        db.UniqueConstraint("day", "slot", name="uq_period_day_slot"),
+    )
+
+    id         = db.Column(db.Integer, primary_key=True)
+    day        = db.Column(db.Integer, nullable=False)
+    slot       = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.String(5), nullable=True)
+    end_time   = db.Column(db.String(5), nullable=True)
+
+    @property
+    def day_name(self) -> str:
+        return DAY_NAMES[self.day]
+
+    def __repr__(self):
+        return f"<Period {self.day_name} #{self.slot}>"
@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime, timezone
+
+# Where each student of a promotion was and went, to undo it.
+promotion_move = db.Table(
+    "promotion_move",
+    db.Column("batch_id",      db.Integer, db.ForeignKey("promotion_batch.id"), primary_key=True),
+    db.Column("student_id",    db.Integer, db.ForeignKey("student.id"), primary_key=True),
+    db.Column("from_class_id", db.Integer, db.ForeignKey("class.id")),
+    db.Column("to_class_id",   db.Integer, db.ForeignKey("class.id")),
+)
+
+class PromotionBatch(db.Model):
+    """Model for one year-end promotion: a set of class moves applied at once.
+
+    Attributes:
+        id (int): Primary key.
+        created_by (int): ID of the admin who applied it.
+        created_at (datetime): When it was applied (UTC).
+        students (int): Number of students moved.
+        undone_at (datetime): When it was undone, if it was.
+    """
+    __tablename__ = "promotion_batch"
+
+    id         = db.Column(db.Integer, primary_key=True)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id"))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    students   = db.Column(db.Integer, nullable=False, default=0)
+    undone_at  = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<PromotionBatch {self.id} ({self.students} students)>"
@@ -0,0 +1,14 @@
+from app import db
+
+class Room(db.Model):
+    """Model for a room where lessons take place.
+    Attributes:
+        id (int): The unique identifier for the room.
+        name (str): The name of the room (e.g. "B12")."""
+    __tablename__ = "room"
+
+    id   = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Room {self.name}>"
@@ -5,11 +5,13 @@ class Subject(db.Model):
     """Model for the Subject entity.
     Attributes:
         id (int): The unique identifier for the subject.
-        name (str): The name of the subject."""
+        name (str): The name of the subject.
+        weekly_periods (int): Lessons per week of the subject for each class (used by the timetable)."""
     __tablename__ = "subject"
 
     id   = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
+    weekly_periods = db.Column(db.Integer, nullable=False, default=3, server_default="3")
 
     teachers = db.relationship(
         "Teacher",
@@ -0,0 +1,41 @@
+from app import db
+
+class TimetableEntry(db.Model):
+    """Model for one lesson of the weekly timetable.
+
+    Written by the timetable solver (see app/timetable.py). The unique
+    constraints are the timetable's hard rules: a class, a teacher and a room
+    are in one place per period.
+
+    Attributes:
+        id (int): Primary key.
+        class_id (int): ID of the class.
+        subject_id (int): ID of the subject.
+        teacher_id (int): ID of the teacher.
+        lesson_number (int): Which of the subject's weekly lessons this is (0, 1, ...).
+        period_id (int): ID of the period.
+        room_id (int): ID of the room.
+    """
+    __tablename__ = "timetable_entry"
+    __table_args__ = (
+        db.UniqueConstraint("class_id", "period_id", name="uq_timetable_class_period"),
+        db.UniqueConstraint("teacher_id", "period_id", name="uq_timetable_teacher_period"),
+        db.UniqueConstraint("room_id", "period_id", name="uq_timetable_room_period"),
+    )
+
+    id            = db.Column(db.Integer, primary_key=True)
+    class_id      = db.Column(db.Integer, db.ForeignKey("class.id"), nullable=False)
+    subject_id    = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=False)
+    teacher_id    = db.Column(db.Integer, db.ForeignKey("teachers.id"), nullable=False)
+    lesson_number = db.Column(db.Integer, nullable=False, default=0)
+    period_id     = db.Column(db.Integer, db.ForeignKey("period.id"), nullable=False)
+    room_id       = db.Column(db.Integer, db.ForeignKey("room.id"), nullable=False)
+
+    class_  = db.relationship("Class")
+    subject = db.relationship("Subject")
+    teacher = db.relationship("Teacher")
+    period  = db.relationship("Period")
+    room    = db.relationship("Room")
+
+    def __repr__(self):
+        return f"<TimetableEntry class {self.class_id} subject {self.subject_id} period {self.period_id}>"
@@ -0,0 +1,186 @@
+from flask import Flask, g, request
+from typing import Dict, List, Optional
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# On-demand profiling of single requests.
+#
+# A request is profiled when an admin asks for it (header "X-Profile: 1" or
+# query string "?_profile=1"), or at random with probability
+# PROFILE_SAMPLE_RATE. Two profilers are available:
+#
+#   sample    a thread reads the request thread's stack every PROFILE_INTERVAL
+#             seconds and counts collapsed stacks ("a;b;c 12"), the input of
+#             flamegraph.pl and speedscope. Low overhead; the default.
+#   cprofile  deterministic cProfile, saved as a pstats file. Exact call
+#             counts, but slows the request down noticeably.
+#
+# Ask for a specific one with "X-Profile: cprofile" or "?_profile=cprofile".
+# Results go to PROFILE_DIR (default: instance/profiles), next to a small JSON
+# file describing the request, and are listed at /admin/profiles.
+
+MODES = ("sample", "cprofile")
+DEFAULT_MODE = "sample"
+DEFAULT_INTERVAL = 0.005
+# Only the newest profiles are kept.
+DEFAULT_KEEP = 200
+EXTENSIONS = {"sample": ".collapsed", "cprofile": ".pstats"}
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def collapsed(self) -> str:
+        """The samples in collapsed-stack format, heaviest first."""
+        lines = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in lines)
+
+def _requested_mode(app: Flask) -> Optional[str]:
+    """The profiler to run for this request, if any."""
+    from flask_login import current_user
+    asked = request.headers.get("X-Profile") or request.args.get("_profile")
+    if asked and current_user.is_authenticated and current_user.role == "admin":
+        return asked if asked in MODES else app.config.get("PROFILE_MODE", DEFAULT_MODE)
+    rate = app.config.get("PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return app.config.get("PROFILE_MODE", DEFAULT_MODE)
+    return None
+
+def list_profiles(directory: str) -> List[dict]:
+    """Saved profiles, newest first (the JSON descriptions plus their `id`)."""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue  # being written or removed
+        profile["id"] = filename[:-len(".json")]
+        profiles.append(profile)
+    profiles.sort(key=lambda profile: profile["started_at"], reverse=True)
+    return profiles
+
+def profile_path(directory: str, profile_id: str) -> Optional[str]:
+    """Path of the profiler output of `profile_id`, or None if there is none."""
+    for extension in EXTENSIONS.values():
+        path = os.path.join(directory, os.path.basename(profile_id) + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+def pstats_report(path: str, limit: int = 60) -> str:
+    """The top functions of a pstats file by cumulative time, as text."""
+    import pstats
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+def _prune(directory: str, keep: int) -> None:
+    for profile in list_profiles(directory)[keep:]:
+        for extension in (".json",) + tuple(EXTENSIONS.values()):
+            try:
+                os.remove(os.path.join(directory, profile["id"] + extension))
+            except FileNotFoundError:
+                pass
+
+def init_profiling(app: Flask) -> None:
+    """Profile requests on demand (see the top of this module).
+
+    PROFILE_DIR: where profiles are saved (default: instance/profiles).
+    PROFILE_SAMPLE_RATE: fraction of all requests to profile (default 0).
+    PROFILE_MODE: profiler used when none is asked for (default "sample").
+    PROFILE_INTERVAL: seconds between stack samples (default 0.005).
+    PROFILE_KEEP: number of profiles kept (default 200).
+    """
+    directory = app.config.setdefault("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+
+    @app.before_request
+    def _start_profile():
+        mode = _requested_mode(app)
+        if mode is None:
+            return
+        if mode == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return  # another profiler is already active in this process
+        else:
+            profiler = StackSampler(threading.get_ident(), app.config.get("PROFILE_INTERVAL", DEFAULT_INTERVAL))
+            profiler.start()
+        g._profile = (mode, profiler, time.time(), time.perf_counter())
+
+    @app.after_request
+    def _add_profile_header(response):
+        if g.get("_profile"):
+            g._profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{random.randrange(16 ** 6):06x}"
+            response.headers["X-Profile-Id"] = g._profile_id
+            g._profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _save_profile(exception=None):
+        profile = g.pop("_profile", None)
+        if profile is None:
+            return
+        mode, profiler, started_at, started = profile
+        if mode == "cprofile":
+            profiler.disable()
+        else:
+            profiler.stop()
+        duration = time.perf_counter() - started
+
+        from app.instrumentation import get_request_sql_stats
+        stats = get_request_sql_stats() or {"count": 0, "duration": 0.0}
+        profile_id = g.get("_profile_id") or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-error"
+        os.makedirs(directory, exist_ok=True)
+        output_path = os.path.join(directory, profile_id + EXTENSIONS[mode])
+        if mode == "cprofile":
+            profiler.dump_stats(output_path)
+        else:
+            with open(output_path, "w") as f:
+                f.write(profiler.collapsed())
+        # The description is written last: list_profiles() only sees complete profiles.
+        with open(os.path.join(directory, profile_id + ".json"), "w") as f:
+            json.dump({"mode": mode, "method": request.method, "path": request.full_path.rstrip("?"),
+                       "endpoint": request.endpoint, "status": g.get("_profile_status", 500),
+                       "started_at": started_at, "duration_ms": duration * 1000,
+                       "queries": stats["count"], "query_ms": stats["duration"] * 1000}, f)
+        _prune(directory, app.config.get("PROFILE_KEEP", DEFAULT_KEEP))
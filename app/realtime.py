@@ -0,0 +1,119 @@
+from flask import Flask, request
+from flask.cli import AppGroup
+from flask_login import current_user
+from flask_socketio import SocketIO, Namespace, join_room, emit
+from typing import Dict
+import click
+import threading
+
+# Real-time grade push over Socket.IO.
+#
+# A logged-in student connects to the /grades namespace with the cursor (id of
+# the last grade event) of the page it has loaded, and joins its own room.
+# Events it missed are replayed on (re)connect; after that, each worker reads
+# new rows of the grade_event table every REALTIME_COALESCE_SECONDS and sends
+# every student one coalesced update for all of its grade changes in that
+# window. The table is shared by all workers, so it also serves as the message
+# queue between them: a grade saved by one worker reaches a student connected
+# to another one.
+
+GRADES_NAMESPACE = "/grades"
+DEFAULT_COALESCE_SECONDS = 1.0
+# A client further behind than this reloads the page instead of replaying.
+REPLAY_LIMIT = 500
+
+socketio = SocketIO()
+
+def student_room(student_id: int) -> str:
+    return f"student:{student_id}"
+
+class GradesNamespace(Namespace):
+    """Pushes grade changes to the students they belong to."""
+
+    def __init__(self, app: Flask):
+        super().__init__(GRADES_NAMESPACE)
+        self.app = app
+        self.listeners: Dict[str, int] = {}  # socket id -> student id, on this worker
+        self._dispatcher_lock = threading.Lock()
+        self._dispatcher_started = False
+
+    def on_connect(self, auth=None):
+        from app.services.grade_event_services import get_grade_events_after, build_grade_updates, \
+            get_last_grade_event_id
+        if not current_user.is_authenticated or current_user.role != 'student':
+            return False
+        cursor = auth.get('cursor') if isinstance(auth, dict) else None
+        if cursor is not None and (not isinstance(cursor, int) or isinstance(cursor, bool) or cursor < 0):
+            return False  # not a cursor this server handed out
+        self._start_dispatcher()
+        student_id = current_user.id
+        self.listeners[request.sid] = student_id
+        join_room(student_room(student_id))
+
+        if cursor is None:
+            emit('cursor', {'cursor': get_last_grade_event_id()})
+            return
+        # Updates sent by the dispatcher meanwhile may repeat some of these;
+        # the client ignores updates whose cursor it has already passed.
+        events = get_grade_events_after(cursor, student_id=student_id, limit=REPLAY_LIMIT + 1)
+        if len(events) > REPLAY_LIMIT:
+            emit('resync', {'cursor': get_last_grade_event_id()})
+            return
+        update = build_grade_updates(events).get(student_id)
+        if update:
+            emit('grades', update)
+
+    def on_disconnect(self, reason=None):
+        self.listeners.pop(request.sid, None)
+
+    def _start_dispatcher(self) -> None:
+        # Started by the first connection, so that CLI commands and workers
+        # without clients don't poll.
+        with self._dispatcher_lock:
+            if self._dispatcher_started:
+                return
+            self._dispatcher_started = True
+        socketio.start_background_task(self._dispatch_loop)
+
+    def _dispatch_loop(self) -> None:
+        from app.services.grade_event_services import get_grade_events_after, build_grade_updates, \
+            get_last_grade_event_id
+        window = self.app.config.get('REALTIME_COALESCE_SECONDS', DEFAULT_COALESCE_SECONDS)
+        with self.app.app_context():
+            cursor = get_last_grade_event_id()
+        while True:
+            socketio.sleep(window)
+            try:
+                with self.app.app_context():
+                    events = get_grade_events_after(cursor)
+                    if not events:
+                        continue
+                    cursor = events[-1].id
+                    listening = set(self.listeners.values())
+                    events = [event for event in events if event.student_id in listening]
+                    for student_id, update in build_grade_updates(events).items():
+                        socketio.emit('grades', update, to=student_room(student_id), namespace=GRADES_NAMESPACE)
+            except Exception:
+                self.app.logger.exception("Grade push failed; retrying")
+
+realtime_cli = AppGroup('realtime', help='Real-time grade push commands.')
+
+@realtime_cli.command('prune')
+@click.option('--days', default=30, show_default=True, help='Age of the oldest grade event kept.')
+def prune_command(days):
+    """Delete old grade events."""
+    from app.services.grade_event_services import prune_grade_events
+    click.echo(f"[INFO] {prune_grade_events(days)} grade events deleted.")
+
+def init_realtime(app: Flask) -> None:
+    """Attach Socket.IO to the app, register the /grades namespace and add the
+    `flask realtime` commands.
+
+    REALTIME_COALESCE_SECONDS: how long grade changes are collected before
+    they are pushed (default 1).
+    SOCKETIO_ASYNC_MODE: "threading", "eventlet" or "gevent" (default: the
+    best one installed).
+    """
+    socketio.init_app(app, async_mode=app.config.get('SOCKETIO_ASYNC_MODE'))
+    socketio.on_namespace(GradesNamespace(app))
+    app.cli.add_command(realtime_cli)
@@ -1,24 +1,40 @@
-from flask import Blueprint, render_template, redirect, url_for, current_app
+from flask import Blueprint, render_template, redirect, url_for, current_app, request, abort, send_file, flash
 from app.forms.admin_forms import *
 from app.services.user_services import get_user_by_id, create_user, delete_user, get_all_users, get_user_by_username, set_user_pfp
 from app.services.class_services import create_class, delete_class, update_class, add_teacher_to_class, remove_teacher_from_class, get_all_classes, get_classes_by_teacher
 from app.services.student_services import create_student, update_student, get_student_by_id, get_student_class_id_by_id
-from app.services.teacher_services import create_teacher, update_teacher
+from app.services.teacher_services import create_teacher, update_teacher, sync_teacher_classes, sync_teacher_subjects, get_teacher_assignments
 from app.services.writer_services import create_writer, update_writer
-from app.services.article_services import create_article, get_all_articles, get_article_by_id, update_article, delete_article
+from app.services.article_services import create_article, get_article_listing, get_article_by_id, update_article, delete_article
+from app.services.revision_services import get_article_history, get_article_revision, get_article_revision_content, restore_article_revision
+from app.services.settings_services import get_school_info, update_school_info
 from app.services.subject_services import update_subject, get_subject_by_id, create_subject, delete_subject, get_all_subjects
+from app.services.timetable_services import get_all_periods, get_all_rooms, get_timetable_changes, get_class_timetable, get_teacher_timetable
+from app.services.job_services import enqueue_job
+from app.services.promotion_services import suggest_promotion_plan, preview_promotion, promote_students, undo_promotion, get_promotion_batches
 from app.routes.auth import current_user
+from app.database import transaction
+from app.profiling import list_profiles, profile_path, pstats_report
 from app.utils import format_date
 from werkzeug.utils import secure_filename
-import os, json
+import os
 from flask_login import login_required
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+@admin_bp.before_request
+@login_required
+def require_admin():
+    if current_user.role != 'admin':
+        abort(403)
+
 @admin_bp.route('/', methods=['GET', 'POST'])
 @login_required
 def index():
-    pfp_path = 'assets/profile_pictures/' + current_user.profile_picture_filename
+    if current_user.profile_picture_filename:
+        pfp_path = 'assets/profile_pictures/' + current_user.profile_picture_filename
+    else:
+        pfp_path = 'assets/placeholders/placeholder_pfp.png.png'
     return render_template('admin/index.html',pfp_path=pfp_path)
 
 # ===========================
@@ -318,20 +334,21 @@ def update_student_view(id):
         phone_number = form.phone_number.data
         class_id = form.class_id.data
         if student_id and username:
-            if new_password:
-                update_student(student_id, password=new_password)
-            if email and email != student_usr.email:
-                update_student(student_id, email=email)
-            if first_name and first_name != student_usr.first_name:
-                update_student(student_id, first_name=first_name)
-            if last_name and last_name != student_usr.last_name:
-                update_student(student_id, last_name=last_name)
-            if birth_date and birth_date != student_usr.birth_date:
-                update_student(student_id, birth_date=birth_date)
-            if phone_number and phone_number != student_usr.phone_number:
-                update_student(student_id, phone_number=phone_number)
-            if class_id and class_id != get_student_class_id_by_id(id):
-                update_student(student_id, class_id=class_id)
+            with transaction(): # one commit for all the changed fields
+                if new_password:
+                    update_student(student_id, password=new_password)
+                if email and email != student_usr.email:
+                    update_student(student_id, email=email)
+                if first_name and first_name != student_usr.first_name:
+                    update_student(student_id, first_name=first_name)
+                if last_name and last_name != student_usr.last_name:
+                    update_student(student_id, last_name=last_name)
+                if birth_date and birth_date != student_usr.birth_date:
+                    update_student(student_id, birth_date=birth_date)
+                if phone_number and phone_number != student_usr.phone_number:
+                    update_student(student_id, phone_number=phone_number)
+                if class_id and class_id != get_student_class_id_by_id(id):
+                    update_student(student_id, class_id=class_id)
         return redirect(url_for('admin.view_students'))
     else:
         form.username.data = student_usr.username
@@ -345,6 +362,53 @@ def update_student_view(id):
         return render_template('admin/update_student.html', form=form,student_usr=student_usr, student_obj=get_student_by_id(id), errors=form.errors)
     return render_template('admin/update_student.html', form=form, student_usr=student_usr, student_obj=get_student_by_id(id))
 
+# ---- PROMOTION ----
+GRADUATE = 'graduate'
+
+def _promotion_plan_from_form(classes):
+    """Read the `target_<class id>` fields: '' keeps the class, 'graduate' removes its students' class."""
+    plan = {}
+    for class_obj in classes:
+        value = request.form.get(f'target_{class_obj.id}', '')
+        if value == GRADUATE:
+            plan[class_obj.id] = None
+        elif value.isdigit() and int(value) != class_obj.id:
+            plan[class_obj.id] = int(value)
+    return plan
+
+@admin_bp.route('/promotions', methods=['GET', 'POST'])
+@login_required
+def promotions():
+    form = PromotionForm()
+    classes = sorted(get_all_classes(), key=lambda c: (c.level, c.name))
+    preview = None
+    if form.validate_on_submit():
+        plan = _promotion_plan_from_form(classes)
+        if form.submit.data:
+            batch = promote_students(plan, created_by=current_user.id)
+            if batch:
+                flash(f'{batch.students} students promoted.', 'success')
+            else:
+                flash('Nothing to promote.', 'error')
+            return redirect(url_for('admin.promotions'))
+        preview = preview_promotion(plan)
+    else:
+        plan = suggest_promotion_plan()
+    return render_template('admin/promotions.html', form=form, undo_form=UndoPromotionForm(), classes=classes,
+                           plan=plan, preview=preview, batches=get_promotion_batches(), graduate=GRADUATE)
+
+@admin_bp.route('/promotions/<int:batch_id>/undo', methods=['POST'])
+@login_required
+def undo_promotion_view(batch_id):
+    form = UndoPromotionForm()
+    if form.validate_on_submit():
+        restored = undo_promotion(batch_id)
+        if restored is None:
+            flash('This promotion cannot be undone.', 'error')
+        else:
+            flash(f'{restored} students moved back.', 'success')
+    return redirect(url_for('admin.promotions'))
+
 # ===========================
 # SUBJECT MANAGEMENT
 # ===========================
@@ -364,7 +428,7 @@ def create_subject_view():
     if form.validate_on_submit():
         subject_name = form.name.data
         if subject_name:
-            create_subject(subject_name)
+            create_subject(subject_name, form.weekly_periods.data)
             return redirect(url_for('admin.view_subjects'))
     return render_template('admin/create_subject.html', form=form)
 
@@ -380,10 +444,11 @@ def update_subject_view(id):
         subject_id = id
         subject_name = form.name.data
         if subject_id and subject_name:
-            update_subject(subject_id, subject_name)
+            update_subject(subject_id, subject_name, form.weekly_periods.data)
             return redirect(url_for('admin.view_subjects'))
     else:
         form.name.data = subject_obj.name
+        form.weekly_periods.data = subject_obj.weekly_periods
         return render_template('admin/update_subject.html', form=form, errors=form.errors)
     return render_template('admin/update_subject.html', form=form, subjects=subject_obj)
 
@@ -400,6 +465,37 @@ def delete_subject_view(id):
     subjects = get_all_subjects()
     return render_template('admin/delete_subject.html', form=form, subjects=subjects)
 
+# ===========================
+# TIMETABLE
+# ===========================
+
+# ---- TIMETABLE VIEW ----
+@admin_bp.route('/timetable', methods=['GET'])
+@login_required
+def timetable():
+    class_id = request.args.get('class_id', type=int)
+    teacher_id = request.args.get('teacher_id', type=int)
+    grid, show = None, 'class'
+    if class_id:
+        grid = get_class_timetable(class_id)
+    elif teacher_id:
+        grid, show = get_teacher_timetable(teacher_id), 'teacher'
+    return render_template('admin/timetable.html', form=SolveTimetableForm(), periods=get_all_periods(),
+                           room_count=len(get_all_rooms()), changes=get_timetable_changes(),
+                           classes=get_all_classes(), teachers=get_all_users(role='teacher'),
+                           class_id=class_id, teacher_id=teacher_id, grid=grid, show=show)
+
+# ---- TIMETABLE SOLVE ----
+@admin_bp.route('/timetable/solve', methods=['POST'])
+@login_required
+def solve_timetable_view():
+    form = SolveTimetableForm()
+    if form.validate_on_submit():
+        # Runs on a job worker: a full solve can take the whole time limit.
+        job = enqueue_job('timetable.solve', full=form.full.data, dedup_key='timetable.solve')
+        flash(f'Timetable queued (job {job.id}).', 'success')
+    return redirect(url_for('admin.timetable'))
+
 # ===========================
 # TEACHER MANAGEMENT
 # ===========================
@@ -503,28 +599,55 @@ def update_teacher_view(id):
         birth_date = format_date(form.date_of_birth.data)
         classes_id = form.classes_id.data
         subjects_id = form.subjects_id.data
-        if username:
-            update_teacher(id, username=username)
-        if email:
-            update_teacher(id, email=email)
-        if first_name:
-            update_teacher(id, first_name=first_name)
-        if last_name:
-            update_teacher(id, last_name=last_name)
-        if birth_date:
-            update_teacher(id, birth_date=birth_date)
-        if classes_id:
-            update_teacher(id, classes_id=classes_id)
-        if password:
-            update_teacher(id, password=password)
-        if phone_number:
-            update_teacher(id, phone_number=phone_number)
-        if subjects_id:
-            update_teacher(id, subjects_id=subjects_id)
+        with transaction(): # one commit for all the changed fields
+            if username:
+                update_teacher(id, username=username)
+            if email:
+                update_teacher(id, email=email)
+            if first_name:
+                update_teacher(id, first_name=first_name)
+            if last_name:
+                update_teacher(id, last_name=last_name)
+            if birth_date:
+                update_teacher(id, birth_date=birth_date)
+            if classes_id:
+                update_teacher(id, classes_id=classes_id)
+            if password:
+                update_teacher(id, password=password)
+            if phone_number:
+                update_teacher(id, phone_number=phone_number)
+            if subjects_id:
+                update_teacher(id, subjects_id=subjects_id)
         return redirect(url_for('admin.view_teachers'))
     teachers = get_all_users()
     return render_template('admin/update_teacher.html', form=form, teachers=teachers)
 
+# ---- TEACHER ASSIGNMENTS (BULK) ----
+@admin_bp.route('/teacher_assignments', methods=['GET', 'POST'])
+@login_required
+def teacher_assignments():
+    kind = 'subjects' if request.args.get('kind') == 'subjects' else 'classes'
+    form = TeacherAssignmentsForm()
+    teachers = get_all_users(role='teacher')
+    if kind == 'classes':
+        columns = [(c.id, f"{c.level} - {c.name}") for c in sorted(get_all_classes(), key=lambda c: (c.level, c.name))]
+    else:
+        columns = [(s.id, s.name) for s in sorted(get_all_subjects(), key=lambda s: s.name)]
+    if form.validate_on_submit():
+        # Every teacher of the page is synced: an unchecked box removes the assignment.
+        wanted = {teacher.id: [] for teacher in teachers}
+        for pair in request.form.getlist('pair'):
+            teacher_id, _, other_id = pair.partition(':')
+            if teacher_id.isdigit() and other_id.isdigit() and int(teacher_id) in wanted:
+                wanted[int(teacher_id)].append(int(other_id))
+        sync = sync_teacher_classes if kind == 'classes' else sync_teacher_subjects
+        counts = sync(wanted)
+        flash(f"{counts['added']} assignments added, {counts['removed']} removed.", 'success')
+        return redirect(url_for('admin.teacher_assignments', kind=kind))
+    assigned = {teacher_id: set(ids) for teacher_id, ids in get_teacher_assignments()[kind].items()}
+    return render_template('admin/teacher_assignments.html', form=form, kind=kind, teachers=teachers,
+                           columns=columns, assigned=assigned)
+
 # ===========================
 # WRITER MANAGEMENT
 # ===========================
@@ -605,22 +728,20 @@ def update_writer_view(id):
     form = UpdateWriterForm(original_username=writer_user.username, original_email=writer_user.email)
     
     if form.validate_on_submit():
-        update_writer( # This service updates the User part of the Writer
-            writer_id=id, # writer_id is the same as user_id for writers
-            username=form.username.data,
-            password=form.password.data if form.password.data else None,
-            email=form.email.data if form.email.data else None,
-            first_name=form.first_name.data,
-            last_name=form.last_name.data,
-            birth_date=format_date(form.date_of_birth.data) if form.date_of_birth.data else None,
-            phone_number=form.phone_number.data if form.phone_number.data else None
-        )
-        # Update activation status if needed (user_services)
-        if writer_user.activated != form.activated.data:
-            # Assuming a service like update_user_activation(user_id, activated_status)
-            # For now, let's assume user_services.update_user handles this or you add it
-            writer_user.activated = form.activated.data 
-            db.session.commit()
+        with transaction(): # writer fields and activation in one commit
+            update_writer( # This service updates the User part of the Writer
+                writer_id=id, # writer_id is the same as user_id for writers
+                username=form.username.data,
+                password=form.password.data if form.password.data else None,
+                email=form.email.data if form.email.data else None,
+                first_name=form.first_name.data,
+                last_name=form.last_name.data,
+                birth_date=format_date(form.date_of_birth.data) if form.date_of_birth.data else None,
+                phone_number=form.phone_number.data if form.phone_number.data else None
+            )
+            # Update activation status if needed (user_services)
+            if writer_user.activated != form.activated.data:
+                writer_user.activated = form.activated.data
 
 
         # flash('Writer updated successfully!', 'success') # Optional
@@ -646,8 +767,9 @@ def update_writer_view(id):
 @admin_bp.route('/view_articles', methods=['GET'])
 @login_required
 def view_articles():
-    articles = get_all_articles()
-    return render_template('admin/view_articles.html', articles=articles)
+    articles, next_cursor = get_article_listing(published_only=False, cursor=request.args.get('cursor'))
+    next_url = url_for('admin.view_articles', cursor=next_cursor) if next_cursor else None
+    return render_template('admin/view_articles.html', articles=articles, next_url=next_url)
 
 # ---- ARTICLE CREATION ----
 @admin_bp.route('/create_article', methods=['GET', 'POST'])
@@ -728,6 +850,31 @@ def delete_article_view(id):
             return redirect(url_for('admin.view_articles'))
     return render_template('admin/delete_article.html', form=form, article=article)
 
+# ---- ARTICLE HISTORY ----
+@admin_bp.route('/article_history/<int:id>', methods=['GET'])
+@login_required
+def article_history_view(id):
+    article = get_article_by_id(id)
+    if not article:
+        return redirect(url_for('admin.view_articles'))
+    revisions = get_article_history(id)
+    return render_template('admin/article_history.html', article=article, revisions=revisions)
+
+@admin_bp.route('/article_history/<int:id>/<int:number>', methods=['GET', 'POST'])
+@login_required
+def article_revision_view(id, number):
+    revision = get_article_revision(id, number)
+    if not revision:
+        return redirect(url_for('admin.article_history_view', id=id))
+
+    form = RestoreArticleRevisionForm()
+    if form.validate_on_submit():
+        restore_article_revision(id, number)
+        return redirect(url_for('admin.article_history_view', id=id))
+
+    content = get_article_revision_content(id, number)
+    return render_template('admin/article_revision.html', form=form, revision=revision, content=content)
+
 # ===========================
 # SCHOOL SETTINGS
 # ===========================
@@ -736,53 +883,35 @@ def delete_article_view(id):
 @login_required
 def settings():
     form = SchoolSettingsForm()
-    
-    school_info_path = os.path.join('..', current_app.instance_path, 'school_info.json')
 
     if form.validate_on_submit():
-        school_name = form.school_name.data
-        school_address = form.school_address.data
-        school_phone = form.school_phone.data
-        school_email = form.school_email.data
-        school_website = form.school_website.data
-
-        if os.path.exists(school_info_path):
-            with open(school_info_path, 'r+', encoding='utf-8') as f:
-                school_info = json.load(f)
-
-        school_info['school_name'] = school_name
-        school_info['school_address'] = school_address
-        school_info['school_phone'] = school_phone
-        school_info['school_email'] = school_email
-        school_info['school_website'] = school_website
-        
-        with open(school_info_path, 'w', encoding='utf-8') as f:
-            json.dump(school_info, f, indent=4)
+        changes = {
+            'school_name': form.school_name.data,
+            'school_address': form.school_address.data,
+            'school_phone': form.school_phone.data,
+            'school_email': form.school_email.data,
+            'school_website': form.school_website.data,
+        }
 
         # Logo upload handling
         if form.school_logo.data:
             logo_file = form.school_logo.data
             logo_filename = secure_filename(logo_file.filename)
-            
+
             relative_logo_save_dir = os.path.join('assets', 'uploads')
             logo_save_dir = os.path.join(current_app.static_folder, relative_logo_save_dir)
             os.makedirs(logo_save_dir, exist_ok=True)
-            
+
             full_logo_save_path = os.path.join(logo_save_dir, logo_filename)
             logo_file.save(full_logo_save_path)
-            
-            school_info['school_logo_filename'] = logo_filename 
-            
-            with open(school_info_path, 'w', encoding='utf-8') as f:
-                json.dump(school_info, f, indent=4)
-        
-        return redirect(url_for('admin.settings')) 
+
+            changes['school_logo'] = 'static/assets/uploads/' + logo_filename
+
+        # One atomic write; every worker picks it up on its next read.
+        update_school_info(**changes)
+        return redirect(url_for('admin.settings'))
     else:
-        school_info = {}
-        if os.path.exists(school_info_path):
-            with open(school_info_path, 'r', encoding='utf-8') as f:
-                school_info = json.load(f)
-        print(school_info)
+        school_info = get_school_info()
         form.school_name.data = school_info.get('school_name', '')
         form.school_address.data = school_info.get('school_address', '')
         form.school_phone.data = school_info.get('school_phone', '')
@@ -790,4 +919,24 @@ def settings():
         form.school_website.data = school_info.get('school_website', '')
         # The template will display the current logo based on school_info!
 
-    return render_template('admin/settings.html', form=form, school_info=school_info)
\ No newline at end of file
+    return render_template('admin/settings.html', form=form)
+
+# ===========================
+# PROFILES
+# ===========================
+
+@admin_bp.route('/profiles', methods=['GET'])
+@login_required
+def view_profiles():
+    profiles = list_profiles(current_app.config['PROFILE_DIR'])
+    return render_template('admin/view_profiles.html', profiles=profiles)
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@login_required
+def profile_view(profile_id):
+    path = profile_path(current_app.config['PROFILE_DIR'], profile_id)
+    if not path:
+        abort(404)
+    if path.endswith('.pstats') and not request.args.get('download'):
+        return render_template('admin/profile.html', profile_id=profile_id, report=pstats_report(path))
+    return send_file(path, as_attachment=True, mimetype='text/plain' if path.endswith('.collapsed') else None)
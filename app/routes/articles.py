@@ -0,0 +1,57 @@
+from flask import Blueprint, Response, render_template, request, url_for, abort
+from werkzeug.http import is_resource_modified
+import click
+from app.services.feed_services import ARTICLE_FEED, get_feed_metadata, rebuild_article_feed
+from app.services.static_export_services import export_static_site
+from app.metrics import record_cache_access
+from app.services.article_services import get_article_listing, get_article_by_id, search_articles
+
+articles_bp = Blueprint('articles', __name__, url_prefix='/articles')
+
+@articles_bp.route('/')
+def index():
+    articles, next_cursor = get_article_listing(cursor=request.args.get('cursor'))
+    next_url = url_for('articles.index', cursor=next_cursor) if next_cursor else None
+    return render_template('articles/index.html', articles=articles, next_url=next_url)
+
+@articles_bp.route('/<int:id>')
+def view_article(id):
+    article = get_article_by_id(id)
+    if not article or not article.is_published:
+        abort(404)
+    return render_template('articles/article.html', article=article)
+
+@articles_bp.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    results = search_articles(query) if query else []
+    return render_template('articles/search.html', query=query, results=results)
+
+@articles_bp.route('/feed.atom')
+def feed():
+    # The feed is rendered when articles change; here we only compare
+    # validators and send the stored bytes (or nothing at all).
+    feed_obj = get_feed_metadata(ARTICLE_FEED) or rebuild_article_feed()
+    response = Response(mimetype='application/atom+xml')
+    response.set_etag(feed_obj.etag)
+    response.last_modified = feed_obj.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    if not is_resource_modified(request.environ, etag=feed_obj.etag, last_modified=feed_obj.last_modified):
+        record_cache_access("feed_conditional_get", True)
+        response.status_code = 304
+        return response
+    record_cache_access("feed_conditional_get", False)
+    response.set_data(feed_obj.content)
+    return response
+
+# ---- CLI: flask articles export-static ----
+@articles_bp.cli.command('export-static')
+@click.option('--output', '-o', default=None, help='Target directory (defaults to STATIC_EXPORT_DIR).')
+@click.option('--per-page', default=20, show_default=True, help='Articles per index page.')
+@click.option('--force', is_flag=True, help='Render every page again, even if unchanged.')
+def export_static_command(output, per_page, force):
+    """Render published articles into a static directory."""
+    stats = export_static_site(output_dir=output, per_page=per_page, force=force)
+    click.echo(f"[INFO] Static export: {stats['rendered']} articles rendered, "
+               f"{stats['skipped']} unchanged, {stats['removed']} removed, {stats['pages']} index pages rendered.")
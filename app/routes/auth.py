@@ -3,7 +3,9 @@ from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
 from app import db
 from app.models.user import User
-from app.forms.auth_forms import LoginForm
+from app.forms.auth_forms import LoginForm, ForgotPasswordForm, ResetPasswordForm
+from app.services.user_services import get_user_by_email, verify_email, reset_password
+from app.services.mail_services import send_password_reset_email
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -44,4 +46,37 @@ def login():
 def logout():
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('auth.login'))
\ No newline at end of file
+    return redirect(url_for('auth.login'))
+
+# ---- EMAIL VERIFICATION (link from the verification email) ----
+@auth_bp.route('/verify_email/<token>')
+def verify_email_link(token):
+    if verify_email(token):
+        flash('Your email address is confirmed.', 'info')
+    else:
+        flash('This link is invalid or has expired.', 'error')
+    return redirect(url_for('auth.login'))
+
+# ---- PASSWORD RESET ----
+@auth_bp.route('/forgot_password', methods=['GET', 'POST'])
+def forgot_password():
+    form = ForgotPasswordForm()
+    if form.validate_on_submit():
+        user = get_user_by_email(form.email.data)
+        if user and user.activated:
+            send_password_reset_email(user)
+        # Same answer either way: the form must not reveal which addresses exist
+        flash('If an account uses this address, a reset link is on its way.', 'info')
+        return redirect(url_for('auth.login'))
+    return render_template('auth/forgot_password.html', form=form)
+
+@auth_bp.route('/reset_password/<token>', methods=['GET', 'POST'])
+def reset_password_link(token):
+    form = ResetPasswordForm()
+    if form.validate_on_submit():
+        if reset_password(token, form.password.data):
+            flash('Your password has been changed. You can now log in.', 'info')
+        else:
+            flash('This link is invalid or has expired.', 'error')
+        return redirect(url_for('auth.login'))
+    return render_template('auth/reset_password.html', form=form, token=token)
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify, request, abort
+from flask_login import current_user, login_required
+from app.services.job_services import get_job_by_id, get_recent_jobs, get_job_counts, JOB_STATUSES
+import json
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+def _job_to_dict(job, with_error: bool) -> dict:
+    data = {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "result": json.loads(job.result) if job.result else None,
+    }
+    if with_error:
+        data["error"] = job.last_error
+    return data
+
+# ---- JOB STATUS (the user who queued it, or an admin) ----
+@jobs_bp.route('/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = get_job_by_id(job_id)
+    if not job:
+        abort(404)
+    is_admin = current_user.role == 'admin'
+    if not is_admin and job.created_by != current_user.id:
+        abort(404)
+    return jsonify(_job_to_dict(job, with_error=is_admin))
+
+# ---- QUEUE OVERVIEW (admin) ----
+@jobs_bp.route('/')
+@login_required
+def job_list():
+    if current_user.role != 'admin':
+        abort(403)
+    status = request.args.get('status')
+    if status and status not in JOB_STATUSES:
+        abort(400)
+    jobs = get_recent_jobs(status=status, limit=min(request.args.get('limit', 50, type=int), 500))
+    return jsonify({"counts": get_job_counts(), "jobs": [_job_to_dict(job, with_error=True) for job in jobs]})
@@ -1,14 +1,40 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, abort, g
 from flask_login import current_user, login_required
+from datetime import datetime
+from app.services.grade_services import get_grades_by_student, get_average_grade_by_student, get_student_subject_grades_summary
+from app.services.grade_event_services import get_last_grade_event_id
+from app.services.timetable_services import get_all_periods, get_class_timetable
+from app.services.attendance_services import get_student_absence_rate, get_current_term
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
 
+@student_bp.before_request
 @login_required
+def require_student():
+    if current_user.role != 'student':
+        abort(403)
+    # Read before the grades: the page's real-time connection resumes from here.
+    g.grade_cursor = get_last_grade_event_id()
+
+@student_bp.context_processor
+def inject_grade_cursor():
+    return {'grade_cursor': g.get('grade_cursor', 0)}
+
 @student_bp.route('/')
 def index():
-    return render_template('student/index.html')
+    average = get_average_grade_by_student(current_user.id)
+    summary = get_student_subject_grades_summary(current_user.id)
+    term = get_current_term()
+    attendance = get_student_absence_rate(current_user.id, term['start'], term['end'])
+    return render_template('student/index.html', average=average, summary=summary, term=term, attendance=attendance)
 
-@login_required
 @student_bp.route('/grades')
 def grades():
-    return "work in progress"
\ No newline at end of file
+    grades = sorted(get_grades_by_student(current_user.id), key=lambda g: g.date or datetime.min, reverse=True)
+    return render_template('student/grades.html', grades=grades)
+
+@student_bp.route('/timetable')
+def timetable():
+    class_id = current_user.student.class_id if current_user.student else None
+    grid = get_class_timetable(class_id) if class_id else {}
+    return render_template('student/timetable.html', periods=get_all_periods(), grid=grid, show='class')
@@ -1,3 +1,89 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, redirect, url_for, flash, abort, request
+from flask_login import current_user, login_required
+from app.forms.teacher_forms import GradeEntryForm, AttendanceForm
+from datetime import date
+from app.services.class_services import get_class_by_id, get_classes_by_teacher
+from app.services.student_services import get_all_student_by_class_id
+from app.services.subject_services import get_all_subjects
+from app.services.grade_services import create_grade, get_recent_grades_for_class
+from app.services.timetable_services import get_all_periods, get_teacher_timetable
+from app.services.attendance_services import record_attendance, get_attendance, get_class_absence_rates, get_current_term
 
-teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
\ No newline at end of file
+teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
+
+@teacher_bp.before_request
+@login_required
+def require_teacher():
+    if current_user.role != 'teacher':
+        abort(403)
+
+@teacher_bp.route('/')
+def index():
+    classes = get_classes_by_teacher(current_user.id)
+    return render_template('teacher/index.html', classes=classes)
+
+@teacher_bp.route('/timetable')
+def timetable():
+    return render_template('teacher/timetable.html', periods=get_all_periods(),
+                           grid=get_teacher_timetable(current_user.id), show='teacher')
+
+# ---- GRADE ENTRY ----
+@teacher_bp.route('/class/<int:class_id>/grades', methods=['GET', 'POST'])
+def class_grades(class_id):
+    class_obj = get_class_by_id(class_id)
+    if not class_obj or current_user.teacher not in class_obj.teachers:
+        abort(404)
+
+    students = get_all_student_by_class_id(class_id)
+    subjects = current_user.teacher.subjects or get_all_subjects()
+    form = GradeEntryForm()
+    form.student_id.choices = [(s.id, f"{s.user.last_name} {s.user.first_name}") for s in students]
+    form.subject_id.choices = [(s.id, s.name) for s in subjects]
+
+    if form.validate_on_submit():
+        grade = create_grade(student_id=form.student_id.data,
+                             subject_id=form.subject_id.data,
+                             teacher_id=current_user.id,
+                             grade=form.grade.data,
+                             comment=form.comment.data or None)
+        if grade:
+            flash('Grade added.', 'success')
+        else:
+            flash('Could not add the grade.', 'error')
+        return redirect(url_for('teacher.class_grades', class_id=class_id))
+
+    recent_grades = get_recent_grades_for_class(class_id, teacher_id=current_user.id)
+    return render_template('teacher/class_grades.html', class_obj=class_obj, students=students,
+                           form=form, recent_grades=recent_grades)
+
+# ---- ROLL CALL ----
+@teacher_bp.route('/class/<int:class_id>/attendance', methods=['GET', 'POST'])
+def class_attendance(class_id):
+    class_obj = get_class_by_id(class_id)
+    if not class_obj or current_user.teacher not in class_obj.teachers:
+        abort(404)
+
+    students = get_all_student_by_class_id(class_id)
+    form = AttendanceForm()
+    slots = sorted({period.slot: period for period in get_all_periods()}.values(), key=lambda p: p.slot)
+    form.slot.choices = [(0, 'Whole day')] + [(p.slot, f"{p.slot} ({p.start_time})") for p in slots]
+    form.absent.choices = form.late.choices = [(s.id, f"{s.user.last_name} {s.user.first_name}") for s in students]
+
+    if form.validate_on_submit():
+        counts = record_attendance(class_id, form.date.data, form.absent.data, form.late.data,
+                                   slot=form.slot.data, taken_by=current_user.id)
+        flash(f"Roll call saved: {counts['absent']} absent, {counts['late']} late.", 'success')
+        return redirect(url_for('teacher.class_attendance', class_id=class_id,
+                                date=form.date.data.isoformat(), slot=form.slot.data))
+
+    if request.method == 'GET':
+        form.date.data = request.args.get('date', type=date.fromisoformat) or date.today()
+        form.slot.data = request.args.get('slot', 0, type=int)
+        taken = get_attendance(class_id, form.date.data, form.slot.data)
+        form.absent.data = taken['absent'] if taken else []
+        form.late.data = taken['late'] if taken else []
+
+    term = get_current_term()
+    rates = get_class_absence_rates(class_id, term['start'], term['end'])
+    return render_template('teacher/class_attendance.html', class_obj=class_obj, students=students,
+                           form=form, term=term, rates=rates)
@@ -1,8 +1,28 @@
 from app.models.writer import Writer
 from app.models.article import Article
+from app.models.user import User
+from app.services.feed_services import rebuild_article_feed
+from app.services.revision_services import record_article_revision
+from app.services.job_services import enqueue_job
 from app import db
-from typing import Optional, List
+from app.database import read_only, replica_reads
+from typing import Optional, List, Tuple, Dict, Any
+from flask import current_app
 from datetime import datetime, timezone
+from markupsafe import Markup, escape
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import defer, joinedload
+import re
+
+# FTS5 table mirroring Article.title/content_md, keyed by rowid = article.id.
+ARTICLE_SEARCH_TABLE = "article_fts"
+_search_index_ready = set()  # engine URLs whose search index is known to exist
+
+def _schedule_static_export() -> None:
+    """Queue a refresh of the static export, if STATIC_EXPORT_ON_CHANGE is
+    set. Changes made before the refresh starts share it."""
+    if current_app.config.get('STATIC_EXPORT_ON_CHANGE'):
+        enqueue_job('articles.export_static', dedup_key='articles.export_static', commit=False)
 
 def create_article(title: str, content_md: str, author_id: int, is_published: Optional[bool] = False) -> Article:
     """Create a new article."""
@@ -15,6 +35,10 @@ def create_article(title: str, content_md: str, author_id: int, is_published: Op
         is_published=is_published
     )
     db.session.add(new_article)
+    db.session.flush()
+    _index_article(new_article)
+    rebuild_article_feed(commit=False)
+    _schedule_static_export()
     db.session.commit()
     return new_article
 
@@ -29,6 +53,9 @@ def update_article(article_id: int,
     article = Article.query.get(article_id)
     if not article:
         return None
+    if (title and title != article.title) or (content_md and content_md != article.content_md):
+        # Keep the version being replaced in the revision history
+        record_article_revision(article, content_md or article.content_md)
     if title:
         article.title = title
     if content_md:
@@ -38,6 +65,10 @@ def update_article(article_id: int,
     if is_published is not None:
         article.is_published = is_published
     article.last_edited = datetime.now(timezone.utc)
+    if title or content_md:
+        _index_article(article)
+    rebuild_article_feed(commit=False)
+    _schedule_static_export()
     db.session.commit()
     return article
 
@@ -46,14 +77,226 @@ def delete_article(article_id: int) -> bool:
     article = Article.query.get(article_id)
     if not article:
         return False
+    _unindex_article(article_id)
     db.session.delete(article)
+    db.session.flush()
+    rebuild_article_feed(commit=False)
+    _schedule_static_export()
     db.session.commit()
     return True
 
+@read_only
 def get_all_articles() -> List[Article]:
     """Get all articles."""
     return Article.query.all()
 
 def get_article_by_id(article_id: int) -> Optional[Article]:
     """Get an article by its ID."""
-    return Article.query.get(article_id)
\ No newline at end of file
+    return Article.query.get(article_id)
+
+@read_only
+def get_article_listing(published_only: bool = True,
+                        cursor: Optional[str] = None,
+                        per_page: int = 20) -> Tuple[List[Article], Optional[str]]:
+    """
+    Get one page of articles for a listing, newest first.
+
+    Only metadata is loaded: `content_md` is deferred and the author's user
+    row is joined in the same query, so a page costs the same regardless of
+    how long the articles are. Pages are keyset-based on (created_at, id).
+
+    Args:
+        published_only: Only list published articles
+        cursor: Cursor returned by the previous page, None for the first page
+        per_page: Maximum number of articles on the page
+
+    Returns:
+        Tuple of (articles, next_cursor). next_cursor is None on the last page.
+    """
+    query = Article.query.options(
+        defer(Article.content_md),
+        joinedload(Article.author)
+            .joinedload(Writer.user)
+            .load_only(User.username, User.first_name, User.last_name),
+    )
+    if published_only:
+        query = query.filter_by(is_published=True)
+
+    position = _decode_article_cursor(cursor)
+    if position:
+        created_at, article_id = position
+        query = query.filter(or_(
+            Article.created_at < created_at,
+            and_(Article.created_at == created_at, Article.id < article_id),
+        ))
+
+    articles = (query
+                .order_by(Article.created_at.desc(), Article.id.desc())
+                .limit(per_page + 1)
+                .all())
+
+    next_cursor = None
+    if len(articles) > per_page:
+        articles = articles[:per_page]
+        next_cursor = _encode_article_cursor(articles[-1])
+    return articles, next_cursor
+
+def _encode_article_cursor(article: Article) -> str:
+    """Encode the keyset position of an article as an URL-safe string."""
+    return f"{article.created_at.isoformat()}_{article.id}"
+
+def _decode_article_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decode a listing cursor. Malformed cursors restart from the first page."""
+    if not cursor:
+        return None
+    try:
+        created_at, article_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(article_id)
+    except ValueError:
+        return None
+
+# ===========================
+# FULL-TEXT SEARCH
+# ===========================
+
+def _search_supported() -> bool:
+    """FTS5 is only available on SQLite."""
+    return db.engine.dialect.name == 'sqlite'
+
+def ensure_article_search_index(commit: bool = True) -> bool:
+    """
+    Create the FTS5 search index if it does not exist yet, and fill it from
+    the existing articles. Only checks the database once per process.
+
+    Args:
+        commit: Commit the index creation right away. Pass False when called
+            in the middle of another write, which will commit it.
+
+    Returns:
+        True if the search index is available, False otherwise
+    """
+    if not _search_supported():
+        return False
+    engine_url = str(db.engine.url)
+    if engine_url in _search_index_ready:
+        return True
+
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": ARTICLE_SEARCH_TABLE}
+    ).first()
+    if not exists:
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARTICLE_SEARCH_TABLE} "
+            "USING fts5(title, content_md, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        rebuild_article_search_index(commit=False)
+        if not commit:
+            # Not durable until the caller commits; check again next time.
+            return True
+        db.session.commit()
+    _search_index_ready.add(engine_url)
+    return True
+
+def rebuild_article_search_index(commit: bool = True) -> None:
+    """Rebuild the whole search index from the article table."""
+    db.session.execute(text(f"DELETE FROM {ARTICLE_SEARCH_TABLE}"))
+    db.session.execute(text(
+        f"INSERT INTO {ARTICLE_SEARCH_TABLE} (rowid, title, content_md) "
+        "SELECT id, title, content_md FROM article"
+    ))
+    if commit:
+        db.session.commit()
+
+def _index_article(article: Article) -> None:
+    """(Re)index an article in the current transaction."""
+    if not ensure_article_search_index(commit=False):
+        return
+    _unindex_article(article.id)
+    db.session.execute(
+        text(f"INSERT INTO {ARTICLE_SEARCH_TABLE} (rowid, title, content_md) VALUES (:id, :title, :content_md)"),
+        {"id": article.id, "title": article.title, "content_md": article.content_md}
+    )
+
+def _unindex_article(article_id: int) -> None:
+    """Remove an article from the search index in the current transaction."""
+    if not ensure_article_search_index(commit=False):
+        return
+    db.session.execute(
+        text(f"DELETE FROM {ARTICLE_SEARCH_TABLE} WHERE rowid = :id"),
+        {"id": article_id}
+    )
+
+def _build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free user input into a safe FTS5 MATCH expression: every word is
+    quoted (so FTS5 operators in the input are ignored) and the last word
+    matches as a prefix, for search-as-you-type.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def _highlight(fragment: Optional[str]) -> Markup:
+    """Escape an FTS5 fragment and turn the match markers into <mark> tags."""
+    return (escape(fragment or '')
+            .replace('\x02', Markup('<mark>'))
+            .replace('\x03', Markup('</mark>')))
+
+def search_articles(query: str, published_only: bool = True, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Search articles by title and content, best matches first.
+
+    Ranking (BM25, with the title weighted above the body) and snippet
+    extraction both happen inside SQLite, so article bodies are never loaded
+    into Python.
+
+    Args:
+        query: Free-text search query
+        published_only: Only return published articles
+        limit: Maximum number of results
+
+    Returns:
+        List of dicts with keys `id`, `title` and `snippet` (HTML-safe, with
+        matches wrapped in <mark>) and `rank` (lower is better)
+    """
+    match = _build_match_query(query or '')
+    if not match:
+        return []
+
+    if not ensure_article_search_index():
+        # No FTS5 outside SQLite: plain title match, unranked.
+        # The query is matched literally: escape the LIKE wildcards it may contain.
+        pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        articles_query = Article.query.options(defer(Article.content_md)).filter(
+            Article.title.ilike(f"%{pattern}%", escape='\\'))
+        if published_only:
+            articles_query = articles_query.filter_by(is_published=True)
+        with replica_reads():
+            return [{"id": a.id, "title": escape(a.title), "snippet": Markup(''), "rank": 0.0}
+                    for a in articles_query.order_by(Article.created_at.desc()).limit(limit)]
+
+    # Rank first, then build highlights/snippets for the top rows only:
+    # SQLite would otherwise compute a snippet for every match before sorting.
+    # The index is created on the primary above; the search itself can use the replica.
+    with replica_reads():
+        rows = db.session.execute(text(
+            "WITH top AS ("
+            f"SELECT {ARTICLE_SEARCH_TABLE}.rowid AS id, bm25({ARTICLE_SEARCH_TABLE}, 10.0, 1.0) AS rank "
+            f"FROM {ARTICLE_SEARCH_TABLE} JOIN article ON article.id = {ARTICLE_SEARCH_TABLE}.rowid "
+            f"WHERE {ARTICLE_SEARCH_TABLE} MATCH :match "
+            + ("AND article.is_published = 1 " if published_only else "")
+            + "ORDER BY rank LIMIT :limit) "
+            f"SELECT top.id, top.rank, "
+            f"highlight({ARTICLE_SEARCH_TABLE}, 0, char(2), char(3)) AS title, "
+            f"snippet({ARTICLE_SEARCH_TABLE}, 1, char(2), char(3), '…', 24) AS snippet "
+            f"FROM {ARTICLE_SEARCH_TABLE} JOIN top ON {ARTICLE_SEARCH_TABLE}.rowid = top.id "
+            f"WHERE {ARTICLE_SEARCH_TABLE} MATCH :match "
+            "ORDER BY top.rank"
+        ), {"match": match, "limit": limit}).all()
+
+    return [{"id": row.id, "title": _highlight(row.title), "snippet": _highlight(row.snippet), "rank": row.rank}
+            for row in rows]
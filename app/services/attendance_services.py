@@ -0,0 +1,271 @@
+from app.models.attendance_roster import AttendanceRoster, attendance_roster_member
+from app.models.attendance_record import AttendanceRecord
+from app.models.student import Student
+from app import db
+from app.database import read_only, commit_or_flush
+from flask import current_app
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from datetime import date
+from sqlalchemy import select, insert
+import hashlib
+
+# Attendance is stored as one row per roll call of a class, with the absent
+# and late students as bitmaps over a roster snapshot (see AttendanceRecord),
+# instead of one row per student: a year of a 2,000-student school is about a
+# hundred thousand small rows. Aggregates decode the bitmaps in Python.
+
+# ===========================
+# BITMAPS AND ROSTERS
+# ===========================
+
+def pack_positions(positions: Iterable[int]) -> bytes:
+    """Bitmap with the given bits set, little-endian, without trailing zero bytes."""
+    bits = 0
+    for position in positions:
+        bits |= 1 << position
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+def unpack_positions(bitmap: bytes) -> List[int]:
+    """Positions of the bits set in a bitmap."""
+    bits = int.from_bytes(bitmap, "little")
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+    return positions
+
+def _digest(student_ids: List[int]) -> str:
+    return hashlib.sha1(",".join(map(str, student_ids)).encode()).hexdigest()
+
+def get_current_roster(class_id: int, commit: bool = True) -> Tuple[int, List[int]]:
+    """
+    Get the roster of a class as it is now, taking a new snapshot if the
+    class changed since the last one.
+
+    Args:
+        class_id: ID of the class
+        commit: Commit a new snapshot right away (False: the caller commits, see transaction())
+
+    Returns:
+        (roster id, student ids by position)
+    """
+    student_ids = list(db.session.execute(
+        select(Student.id).where(Student.class_id == class_id).order_by(Student.id)).scalars())
+    digest = _digest(student_ids)
+    latest = db.session.execute(
+        select(AttendanceRoster.id, AttendanceRoster.digest)
+        .where(AttendanceRoster.class_id == class_id)
+        .order_by(AttendanceRoster.id.desc()).limit(1)).first()
+    if latest and latest.digest == digest:
+        return latest.id, student_ids
+
+    roster = AttendanceRoster(class_id=class_id, size=len(student_ids), digest=digest)
+    db.session.add(roster)
+    db.session.flush()
+    if student_ids:
+        db.session.execute(insert(attendance_roster_member), [
+            {"roster_id": roster.id, "position": position, "student_id": student_id}
+            for position, student_id in enumerate(student_ids)
+        ])
+    commit_or_flush(commit)
+    return roster.id, student_ids
+
+def _roster_members(roster_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """roster id -> student ids by position."""
+    members: Dict[int, List[int]] = {}
+    rows = db.session.execute(
+        select(attendance_roster_member.c.roster_id, attendance_roster_member.c.student_id)
+        .where(attendance_roster_member.c.roster_id.in_(list(roster_ids)))
+        .order_by(attendance_roster_member.c.roster_id, attendance_roster_member.c.position))
+    for roster_id, student_id in rows:
+        members.setdefault(roster_id, []).append(student_id)
+    return members
+
+# ===========================
+# ROLL CALL
+# ===========================
+
+def _upsert():
+    """INSERT ... ON CONFLICT for the current database."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(AttendanceRecord)
+
+def record_attendance(class_id: int,
+                      day: date,
+                      absent_ids: Iterable[int],
+                      late_ids: Iterable[int] = (),
+                      slot: int = 0,
+                      taken_by: Optional[int] = None,
+                      commit: bool = True) -> Dict[str, int]:
+    """
+    Record the roll call of a whole class, replacing an earlier one for the
+    same day and slot. Everyone on the class roster who is not listed is
+    present; listed ids of students outside the class are ignored.
+
+    Args:
+        class_id: ID of the class
+        day: Day of the roll call
+        absent_ids: IDs of the absent students
+        late_ids: IDs of the late students
+        slot: Period of the day (Period.slot), 0 for a whole-day roll call
+        taken_by: ID of the teacher
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Dict with the number of `students`, `absent` and `late`
+    """
+    roster_id, student_ids = get_current_roster(class_id, commit=False)
+    position_of = {student_id: position for position, student_id in enumerate(student_ids)}
+    absent = [position_of[i] for i in set(absent_ids) if i in position_of]
+    late = [position_of[i] for i in set(late_ids) if i in position_of and position_of[i] not in absent]
+    values = {"roster_id": roster_id, "absent": pack_positions(absent), "late": pack_positions(late),
+              "taken_by": taken_by}
+    # The whole class in one statement, new or corrected.
+    statement = _upsert().values(class_id=class_id, date=day, slot=slot, **values)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[AttendanceRecord.class_id, AttendanceRecord.date, AttendanceRecord.slot],
+        set_=values))
+    commit_or_flush(commit)
+    return {"students": len(student_ids), "absent": len(absent), "late": len(late)}
+
+def get_attendance(class_id: int, day: date, slot: int = 0) -> Optional[Dict[str, List[int]]]:
+    """
+    Get one roll call of a class.
+
+    Args:
+        class_id: ID of the class
+        day: Day of the roll call
+        slot: Period of the day, 0 for a whole-day roll call
+
+    Returns:
+        Dict with the student ids that were `absent` and `late`, None if the
+        roll call was not taken
+    """
+    record = db.session.execute(
+        select(AttendanceRecord.roster_id, AttendanceRecord.absent, AttendanceRecord.late)
+        .where(AttendanceRecord.class_id == class_id, AttendanceRecord.date == day,
+               AttendanceRecord.slot == slot)).first()
+    if record is None:
+        return None
+    student_ids = _roster_members([record.roster_id]).get(record.roster_id, [])
+    return {"absent": [student_ids[p] for p in unpack_positions(record.absent)],
+            "late": [student_ids[p] for p in unpack_positions(record.late)]}
+
+# ===========================
+# STATISTICS
+# ===========================
+
+def get_terms() -> List[Dict[str, Any]]:
+    """
+    Get the terms of the school year, from ATTENDANCE_TERMS in config.json:
+    `[{"name": "Term 1", "start": "2026-09-01", "end": "2026-12-18"}, ...]`.
+    Without it, the school year (September to August) is the only term.
+
+    Returns:
+        List of dicts with `name`, `start` and `end` (dates)
+    """
+    terms = current_app.config.get('ATTENDANCE_TERMS')
+    if terms:
+        return [{"name": term["name"], "start": date.fromisoformat(term["start"]),
+                 "end": date.fromisoformat(term["end"])} for term in terms]
+    today = date.today()
+    first_year = today.year if today.month >= 9 else today.year - 1
+    return [{"name": f"{first_year}-{first_year + 1}", "start": date(first_year, 9, 1),
+             "end": date(first_year + 1, 8, 31)}]
+
+def get_current_term(day: Optional[date] = None) -> Dict[str, Any]:
+    """The term containing `day` (default today), or the last one that started before it."""
+    day = day or date.today()
+    terms = get_terms()
+    started = [term for term in terms if term["start"] <= day]
+    return next((term for term in started if day <= term["end"]), started[-1] if started else terms[0])
+
+def _rate(sessions: int, absences: int, late: int) -> Dict[str, Any]:
+    return {"sessions": sessions, "absences": absences, "late": late,
+            "rate": absences / sessions if sessions else None}
+
+@read_only
+def get_class_absence_rates(class_id: int, start: date, end: date) -> Dict[int, Dict[str, Any]]:
+    """
+    Get the absences of every student of a class between two dates.
+
+    Args:
+        class_id: ID of the class
+        start: First day (included)
+        end: Last day (included)
+
+    Returns:
+        Dict of student id -> dict with the number of roll calls (`sessions`),
+        `absences` and `late`, and the absence `rate` (None without roll calls)
+    """
+    # Per roster: roll calls, and how often each position was set
+    sessions: Dict[int, int] = {}
+    absent_counts: Dict[int, Dict[int, int]] = {}
+    late_counts: Dict[int, Dict[int, int]] = {}
+    for roster_id, absent, late in db.session.execute(
+            select(AttendanceRecord.roster_id, AttendanceRecord.absent, AttendanceRecord.late)
+            .where(AttendanceRecord.class_id == class_id, AttendanceRecord.date.between(start, end))):
+        sessions[roster_id] = sessions.get(roster_id, 0) + 1
+        for counts, bitmap in ((absent_counts, absent), (late_counts, late)):
+            per_position = counts.setdefault(roster_id, {})
+            for position in unpack_positions(bitmap):
+                per_position[position] = per_position.get(position, 0) + 1
+
+    totals: Dict[int, List[int]] = {}
+    for roster_id, student_ids in _roster_members(sessions).items():
+        for position, student_id in enumerate(student_ids):
+            total = totals.setdefault(student_id, [0, 0, 0])
+            total[0] += sessions[roster_id]
+            total[1] += absent_counts.get(roster_id, {}).get(position, 0)
+            total[2] += late_counts.get(roster_id, {}).get(position, 0)
+    return {student_id: _rate(*total) for student_id, total in totals.items()}
+
+@read_only
+def get_student_absence_rate(student_id: int, start: date, end: date) -> Dict[str, Any]:
+    """
+    Get the absences of a student between two dates, in every class they were in.
+
+    Args:
+        student_id: ID of the student
+        start: First day (included)
+        end: Last day (included)
+
+    Returns:
+        Dict with the number of roll calls (`sessions`), `absences` and `late`,
+        and the absence `rate` (None without roll calls)
+    """
+    rows = db.session.execute(
+        select(attendance_roster_member.c.position, AttendanceRecord.absent, AttendanceRecord.late)
+        .join(AttendanceRecord, AttendanceRecord.roster_id == attendance_roster_member.c.roster_id)
+        .where(attendance_roster_member.c.student_id == student_id,
+               AttendanceRecord.date.between(start, end))).all()
+    absences = sum(int.from_bytes(absent, "little") >> position & 1 for position, absent, _ in rows)
+    late = sum(int.from_bytes(late, "little") >> position & 1 for position, _, late in rows)
+    return _rate(len(rows), absences, late)
+
+@read_only
+def get_absence_totals(start: date, end: date) -> Dict[str, Any]:
+    """
+    Get the absences of the whole school between two dates.
+
+    Args:
+        start: First day (included)
+        end: Last day (included)
+
+    Returns:
+        Dict with the number of student roll calls (`sessions`), `absences`
+        and `late`, and the absence `rate`
+    """
+    sessions = absences = late = 0
+    for size, absent, late_bitmap in db.session.execute(
+            select(AttendanceRoster.size, AttendanceRecord.absent, AttendanceRecord.late)
+            .join(AttendanceRoster, AttendanceRoster.id == AttendanceRecord.roster_id)
+            .where(AttendanceRecord.date.between(start, end))):
+        sessions += size
+        absences += int.from_bytes(absent, "little").bit_count()
+        late += int.from_bytes(late_bitmap, "little").bit_count()
+    return _rate(sessions, absences, late)
@@ -1,15 +1,20 @@
 from app.models.class_ import Class
 from app.models.teacher import Teacher
+from app.models.teacher_junction import teacher_class
 from app import db
+from app.database import read_only, commit_or_flush
+from app.cache import cached, invalidate
+from sqlalchemy import select, insert, delete
 from typing import Optional, List
 
-def create_class(name: str, level: str) -> Optional[Class]:
+def create_class(name: str, level: str, commit: bool = True) -> Optional[Class]:
     """
     Create a new class.
     
     Args:
         name: Name of the class (e.g., "1A")
         level: Level of the class (e.g., "Grade 9")
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Created Class object if successful, None otherwise
@@ -19,10 +24,10 @@ def create_class(name: str, level: str) -> Optional[Class]:
     
     new_class = Class(name=name, level=level)
     db.session.add(new_class)
-    db.session.commit()
+    commit_or_flush(commit)
     return new_class
 
-def update_class(class_id: int, name: Optional[str] = None, level: Optional[str] = None) -> Optional[Class]:
+def update_class(class_id: int, name: Optional[str] = None, level: Optional[str] = None, commit: bool = True) -> Optional[Class]:
     """
     Update a class's information.
     
@@ -30,6 +35,7 @@ def update_class(class_id: int, name: Optional[str] = None, level: Optional[str]
         class_id: ID of the class to update
         name: New name for the class
         level: New level for the class
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Class object if found, None otherwise
@@ -43,15 +49,16 @@ def update_class(class_id: int, name: Optional[str] = None, level: Optional[str]
     if level:
         class_obj.level = level
     
-    db.session.commit()
+    commit_or_flush(commit)
     return class_obj
 
-def delete_class(class_id: int) -> bool:
+def delete_class(class_id: int, commit: bool = True) -> bool:
     """
     Delete a class.
     
     Args:
         class_id: ID of the class to delete
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         True if successful, False otherwise
@@ -61,9 +68,10 @@ def delete_class(class_id: int) -> bool:
         return False
     
     db.session.delete(class_obj)
-    db.session.commit()
+    commit_or_flush(commit)
     return True
 
+@cached("class:{class_id}")
 def get_class_by_id(class_id: int) -> Optional[Class]:
     """
     Get a class by its ID.
@@ -88,6 +96,7 @@ def get_class_by_name(name: str) -> Optional[Class]:
     """
     return Class.query.filter_by(name=name).first()
 
+@read_only
 def get_classes_by_level(level: str) -> List[Class]:
     """
     Get all classes at a specific level.
@@ -100,6 +109,7 @@ def get_classes_by_level(level: str) -> List[Class]:
     """
     return Class.query.filter_by(level=level).all()
 
+@read_only
 def get_all_classes() -> List[Class]:
     """
     Get all classes.
@@ -109,52 +119,71 @@ def get_all_classes() -> List[Class]:
     """
     return Class.query.all()
 
-def add_teacher_to_class(class_id: int, teacher_id: int) -> Optional[Class]:
+def _teacher_exists(teacher_id: int) -> bool:
+    return db.session.execute(select(Teacher.id).where(Teacher.id == teacher_id)).first() is not None
+
+def _is_assigned(class_id: int, teacher_id: int) -> bool:
+    return db.session.execute(select(teacher_class.c.teacher_id).where(
+        teacher_class.c.teacher_id == teacher_id, teacher_class.c.class_id == class_id)).first() is not None
+
+def _junction_changed(class_id: int, teacher_id: int) -> None:
+    """Expire the loaded collections and cached entries the row changed."""
+    for instance in list(db.session.identity_map.values()):
+        if (isinstance(instance, Class) and instance.id == class_id) or \
+                (isinstance(instance, Teacher) and instance.id == teacher_id):
+            db.session.expire(instance, ["teachers" if isinstance(instance, Class) else "classes"])
+    invalidate(Class.__tablename__, class_id)
+    invalidate(Teacher.__tablename__, teacher_id)
+
+def add_teacher_to_class(class_id: int, teacher_id: int, commit: bool = True) -> Optional[Class]:
     """
     Add a teacher to a class.
     
     Args:
         class_id: ID of the class
         teacher_id: ID of the teacher
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Class object if successful, None otherwise
     """
     class_obj = get_class_by_id(class_id)
-    teacher = Teacher.query.get(teacher_id)
-    
-    if not class_obj or not teacher:
+    if not class_obj or not _teacher_exists(teacher_id):
         return None
     
-    if teacher not in class_obj.teachers:
-        class_obj.teachers.append(teacher)
-        db.session.commit()
+    # Membership is checked on the junction table, without loading class_obj.teachers
+    if not _is_assigned(class_id, teacher_id):
+        db.session.execute(insert(teacher_class).values(teacher_id=teacher_id, class_id=class_id))
+        _junction_changed(class_id, teacher_id)
+        commit_or_flush(commit)
     
     return class_obj
 
-def remove_teacher_from_class(class_id: int, teacher_id: int) -> Optional[Class]:
+def remove_teacher_from_class(class_id: int, teacher_id: int, commit: bool = True) -> Optional[Class]:
     """
     Remove a teacher from a class.
     
     Args:
         class_id: ID of the class
         teacher_id: ID of the teacher
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Class object if successful, None otherwise
     """
     class_obj = get_class_by_id(class_id)
-    teacher = Teacher.query.get(teacher_id)
-    
-    if not class_obj or not teacher:
+    if not class_obj or not _teacher_exists(teacher_id):
         return None
     
-    if teacher in class_obj.teachers:
-        class_obj.teachers.remove(teacher)
-        db.session.commit()
+    if _is_assigned(class_id, teacher_id):
+        db.session.execute(delete(teacher_class).where(teacher_class.c.teacher_id == teacher_id,
+                                                       teacher_class.c.class_id == class_id))
+        _junction_changed(class_id, teacher_id)
+        commit_or_flush(commit)
     
     return class_obj
 
+@cached("teachers:{teacher_id}", "class")
 def get_classes_by_teacher(teacher_id: int) -> List[Class]:
     """
     Get all classes taught by a specific teacher.
@@ -171,6 +200,7 @@ def get_classes_by_teacher(teacher_id: int) -> List[Class]:
     
     return teacher.classes
 
+@read_only
 def get_student_count_in_class(class_id: int) -> int:
     """
     Get the number of students in a class.
@@ -0,0 +1,117 @@
+from app.models.feed import Feed
+from app.models.article import Article
+from app.models.writer import Writer
+from app import db
+from app.services.settings_services import get_school_info
+from app.utils import as_naive_utc
+from flask import current_app, url_for
+from typing import Optional
+from datetime import datetime, timezone
+from sqlalchemy.orm import defer, joinedload
+import xml.etree.ElementTree as ET
+import hashlib
+
+ARTICLE_FEED = "articles.atom"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+def _base_url() -> str:
+    """Where the feed's links point: FEED_BASE_URL, else MAIL_BASE_URL."""
+    config = current_app.config
+    return config.get('FEED_BASE_URL') or config.get('MAIL_BASE_URL') or 'http://localhost:5000'
+
+def _link(endpoint: str, **values) -> str:
+    """Absolute URL against the configured base URL, never the current request's
+    host: a feed rebuilt from a request, the CLI or a job is the same document
+    (same ETag), and a Host header can't end up in the stored feed."""
+    with current_app.test_request_context(base_url=_base_url()):
+        return url_for(endpoint, _external=True, **values)
+
+def _atom_date(date_obj: Optional[datetime]) -> str:
+    """Format a (naive UTC) datetime as an RFC 3339 timestamp."""
+    date_obj = as_naive_utc(date_obj) or datetime(1970, 1, 1)
+    return date_obj.replace(microsecond=0).isoformat() + "Z"
+
+def render_article_feed(limit: int = 20) -> bytes:
+    """
+    Render the Atom feed of the latest published articles.
+
+    Args:
+        limit: Maximum number of entries in the feed
+
+    Returns:
+        The feed document as UTF-8 bytes
+    """
+    articles = (Article.query
+                .options(joinedload(Article.author).joinedload(Writer.user))
+                .filter_by(is_published=True)
+                .order_by(Article.created_at.desc(), Article.id.desc())
+                .limit(limit)
+                .all())
+
+    ET.register_namespace('', ATOM_NS)
+    feed = ET.Element(f"{{{ATOM_NS}}}feed")
+    ET.SubElement(feed, f"{{{ATOM_NS}}}title").text = f"{get_school_info().get('school_name', 'Aqsam')} News"
+    ET.SubElement(feed, f"{{{ATOM_NS}}}id").text = "urn:aqsam:articles"
+    ET.SubElement(feed, f"{{{ATOM_NS}}}link", rel="self", href=_link('articles.feed'))
+    ET.SubElement(feed, f"{{{ATOM_NS}}}link", rel="alternate", href=_link('articles.index'))
+    updated = max((as_naive_utc(a.last_edited or a.created_at) for a in articles), default=None)
+    ET.SubElement(feed, f"{{{ATOM_NS}}}updated").text = _atom_date(updated)
+
+    for article in articles:
+        entry = ET.SubElement(feed, f"{{{ATOM_NS}}}entry")
+        ET.SubElement(entry, f"{{{ATOM_NS}}}title").text = article.title
+        ET.SubElement(entry, f"{{{ATOM_NS}}}id").text = f"urn:aqsam:article:{article.id}"
+        ET.SubElement(entry, f"{{{ATOM_NS}}}link", href=_link('articles.view_article', id=article.id))
+        ET.SubElement(entry, f"{{{ATOM_NS}}}published").text = _atom_date(article.created_at)
+        ET.SubElement(entry, f"{{{ATOM_NS}}}updated").text = _atom_date(article.last_edited or article.created_at)
+        author = ET.SubElement(entry, f"{{{ATOM_NS}}}author")
+        username = article.author.user.username if article.author and article.author.user else "N/A"
+        ET.SubElement(author, f"{{{ATOM_NS}}}name").text = username
+        summary = article.content_md if len(article.content_md) <= 300 else article.content_md[:300] + "…"
+        ET.SubElement(entry, f"{{{ATOM_NS}}}summary", type="text").text = summary
+
+    return ET.tostring(feed, encoding="utf-8", xml_declaration=True)
+
+def rebuild_article_feed(commit: bool = True) -> Feed:
+    """
+    Re-render the article feed and store it. Called by the article services
+    whenever an article changes, so serving the feed never renders it.
+
+    If the rendered document did not change, its ETag and Last-Modified stay
+    the same and feed readers keep getting 304s.
+
+    Args:
+        commit: Commit the session. Pass False to store the feed as part of
+            the caller's transaction.
+
+    Returns:
+        The stored Feed object
+    """
+    content = render_article_feed()
+    etag = hashlib.sha1(content).hexdigest()
+
+    feed = Feed.query.get(ARTICLE_FEED)
+    if not feed:
+        feed = Feed(name=ARTICLE_FEED)
+        db.session.add(feed)
+    if feed.etag != etag:
+        feed.content = content
+        feed.etag = etag
+        feed.last_modified = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+    if commit:
+        db.session.commit()
+    return feed
+
+def get_feed_metadata(name: str) -> Optional[Feed]:
+    """
+    Get a stored feed without loading its content, which is only fetched
+    when the `content` attribute is accessed.
+
+    Args:
+        name: Identifier of the feed
+
+    Returns:
+        Feed object if found, None otherwise
+    """
+    return Feed.query.options(defer(Feed.content)).filter_by(name=name).first()
@@ -0,0 +1,111 @@
+from app.models.grade_event import GradeEvent
+from app.models.grade import Grade
+from app import db
+from app.database import commit_or_flush
+from app.jobs import task
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+GRADE_ACTIONS = ('created', 'updated', 'deleted')
+
+def record_grade_event(grade: Grade, action: str) -> GradeEvent:
+    """
+    Log a grade change for the real-time push. Only adds the event to the
+    session: it is committed together with the grade change.
+
+    Args:
+        grade: The created, updated or deleted grade (flushed, so it has an id)
+        action: 'created', 'updated' or 'deleted'
+
+    Returns:
+        The new GradeEvent
+    """
+    if action not in GRADE_ACTIONS:
+        raise ValueError(f"Unknown grade action {action!r}")
+    event = GradeEvent(student_id=grade.student_id, grade_id=grade.id, action=action)
+    db.session.add(event)
+    return event
+
+def get_last_grade_event_id() -> int:
+    """
+    Get the id of the newest grade event (the cursor of "now").
+
+    Returns:
+        The id, or 0 if there are no events
+    """
+    return db.session.query(func.max(GradeEvent.id)).scalar() or 0
+
+def get_grade_events_after(cursor: int, student_id: Optional[int] = None, limit: int = 1000) -> List[GradeEvent]:
+    """
+    Get the grade events after a cursor, oldest first.
+
+    Args:
+        cursor: Id of the last event already seen
+        student_id: Only the events of this student (None: of all students)
+        limit: Maximum number of events
+
+    Returns:
+        List of GradeEvent objects
+    """
+    query = GradeEvent.query.filter(GradeEvent.id > cursor)
+    if student_id is not None:
+        query = query.filter(GradeEvent.student_id == student_id)
+    return query.order_by(GradeEvent.id).limit(limit).all()
+
+def build_grade_updates(events: List[GradeEvent]) -> Dict[int, Dict[str, Any]]:
+    """
+    Coalesce grade events into one update per student: a grade changed
+    several times appears once, with its current values.
+
+    Args:
+        events: Grade events, oldest first
+
+    Returns:
+        Dict of student id -> {"cursor": id of the student's last event,
+        "grades": [{"id", "action", "subject", "grade", "date", "comment"}, ...]}
+    """
+    latest: Dict[int, Dict[int, GradeEvent]] = {}
+    for event in events:
+        latest.setdefault(event.student_id, {})[event.grade_id] = event
+
+    grade_ids = [event.grade_id for by_grade in latest.values() for event in by_grade.values()
+                 if event.action != 'deleted']
+    grades = {}
+    if grade_ids:
+        grades = {grade.id: grade for grade in
+                  Grade.query.options(joinedload(Grade.subject)).filter(Grade.id.in_(grade_ids)).all()}
+
+    updates = {}
+    for student_id, by_grade in latest.items():
+        items = []
+        for grade_id, event in by_grade.items():
+            grade = grades.get(grade_id)
+            if event.action == 'deleted' or grade is None:
+                items.append({"id": grade_id, "action": 'deleted'})
+                continue
+            items.append({"id": grade_id, "action": event.action, "subject": grade.subject.name,
+                          "grade": grade.grade, "date": grade.date.isoformat() if grade.date else None,
+                          "comment": grade.comment})
+        updates[student_id] = {"cursor": max(event.id for event in by_grade.values()), "grades": items}
+    return updates
+
+# Also run by `flask realtime prune`.
+@task('grades.prune_events')
+def prune_grade_events(max_age_days: int = 30, commit: bool = True) -> int:
+    """
+    Delete old grade events. Clients that were away longer than this reload
+    their grades instead of replaying the log.
+
+    Args:
+        max_age_days: Age of the oldest event kept
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of deleted events
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    deleted = GradeEvent.query.filter(GradeEvent.created_at < cutoff).delete(synchronize_session=False)
+    commit_or_flush(commit)
+    return deleted
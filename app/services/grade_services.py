@@ -3,11 +3,14 @@ from app.models.subject import Subject
 from app.models.student import Student
 from app.models.teacher import Teacher
 from app import db
+from app.database import read_only, commit_or_flush
+from app.services.grade_event_services import record_grade_event
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
-def create_grade(student_id: int, subject_id: int, teacher_id: int, grade: float, comment: Optional[str] = None) -> Optional[Grade]:
+def create_grade(student_id: int, subject_id: int, teacher_id: int, grade: float, comment: Optional[str] = None, commit: bool = True) -> Optional[Grade]:
     """
     Create a new grade for a student in a specific subject.
     
@@ -17,6 +20,7 @@ def create_grade(student_id: int, subject_id: int, teacher_id: int, grade: float
         teacher_id: ID of the teacher assigning the grade
         grade: The grade value
         comment: Optional comment about the grade
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Created Grade object if successful, None otherwise
@@ -38,11 +42,13 @@ def create_grade(student_id: int, subject_id: int, teacher_id: int, grade: float
     )
     
     db.session.add(new_grade)
-    db.session.commit()
+    db.session.flush()  # the event needs the grade's id
+    record_grade_event(new_grade, 'created')
+    commit_or_flush(commit)
     
     return new_grade
 
-def update_grade(grade_id: int, grade: Optional[float] = None, comment: Optional[str] = None) -> Optional[Grade]:
+def update_grade(grade_id: int, grade: Optional[float] = None, comment: Optional[str] = None, commit: bool = True) -> Optional[Grade]:
     """
     Update an existing grade.
     
@@ -50,6 +56,7 @@ def update_grade(grade_id: int, grade: Optional[float] = None, comment: Optional
         grade_id: ID of the grade to update
         grade: New grade value
         comment: New comment about the grade
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Grade object if found, None otherwise
@@ -65,16 +72,18 @@ def update_grade(grade_id: int, grade: Optional[float] = None, comment: Optional
     if comment is not None:
         grade_obj.comment = comment
     
-    db.session.commit()
+    record_grade_event(grade_obj, 'updated')
+    commit_or_flush(commit)
     
     return grade_obj
 
-def delete_grade(grade_id: int) -> bool:
+def delete_grade(grade_id: int, commit: bool = True) -> bool:
     """
     Delete a grade.
     
     Args:
         grade_id: ID of the grade to delete
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         True if successful, False otherwise
@@ -84,8 +93,9 @@ def delete_grade(grade_id: int) -> bool:
     if not grade_obj:
         return False
     
+    record_grade_event(grade_obj, 'deleted')
     db.session.delete(grade_obj)
-    db.session.commit()
+    commit_or_flush(commit)
     
     return True
 
@@ -101,6 +111,7 @@ def get_grade_by_id(grade_id: int) -> Optional[Grade]:
     """
     return Grade.query.get(grade_id)
 
+@read_only
 def get_grades_by_student(student_id: int) -> List[Grade]:
     """
     Get all grades for a specific student.
@@ -111,8 +122,9 @@ def get_grades_by_student(student_id: int) -> List[Grade]:
     Returns:
         List of Grade objects for the student
     """
-    return Grade.query.filter_by(student_id=student_id).all()
+    return Grade.query.options(joinedload(Grade.subject)).filter_by(student_id=student_id).all()
 
+@read_only
 def get_grades_by_subject(subject_id: int) -> List[Grade]:
     """
     Get all grades for a specific subject.
@@ -125,6 +137,7 @@ def get_grades_by_subject(subject_id: int) -> List[Grade]:
     """
     return Grade.query.filter_by(subject_id=subject_id).all()
 
+@read_only
 def get_grades_by_teacher(teacher_id: int) -> List[Grade]:
     """
     Get all grades assigned by a specific teacher.
@@ -137,6 +150,7 @@ def get_grades_by_teacher(teacher_id: int) -> List[Grade]:
     """
     return Grade.query.filter_by(teacher_id=teacher_id).all()
 
+@read_only
 def get_grades_by_student_and_subject(student_id: int, subject_id: int) -> List[Grade]:
     """
     Get all grades for a student in a specific subject.
@@ -150,6 +164,7 @@ def get_grades_by_student_and_subject(student_id: int, subject_id: int) -> List[
     """
     return Grade.query.filter_by(student_id=student_id, subject_id=subject_id).all()
 
+@read_only
 def get_average_grade_by_student(student_id: int) -> Optional[float]:
     """
     Get the average grade for a student across all subjects.
@@ -163,6 +178,7 @@ def get_average_grade_by_student(student_id: int) -> Optional[float]:
     result = db.session.query(func.avg(Grade.grade)).filter_by(student_id=student_id).scalar()
     return float(result) if result is not None else None
 
+@read_only
 def get_average_grade_by_subject(subject_id: int) -> Optional[float]:
     """
     Get the average grade for a subject across all students.
@@ -176,6 +192,7 @@ def get_average_grade_by_subject(subject_id: int) -> Optional[float]:
     result = db.session.query(func.avg(Grade.grade)).filter_by(subject_id=subject_id).scalar()
     return float(result) if result is not None else None
 
+@read_only
 def get_student_subject_grades_summary(student_id: int) -> Dict[str, Any]:
     """
     Get a summary of grades for a student grouped by subject.
@@ -186,7 +203,7 @@ def get_student_subject_grades_summary(student_id: int) -> Dict[str, Any]:
     Returns:
         Dictionary mapping subject names to average grades
     """
-    grades = Grade.query.filter_by(student_id=student_id).all()
+    grades = Grade.query.options(joinedload(Grade.subject)).filter_by(student_id=student_id).all()
     summary = {}
     
     for grade in grades:
@@ -206,6 +223,7 @@ def get_student_subject_grades_summary(student_id: int) -> Dict[str, Any]:
     
     return summary
 
+@read_only
 def get_recent_grades(limit: int = 10) -> List[Grade]:
     """
     Get the most recent grades.
@@ -216,4 +234,25 @@ def get_recent_grades(limit: int = 10) -> List[Grade]:
     Returns:
         List of Grade objects sorted by date (newest first)
     """
-    return Grade.query.order_by(Grade.date.desc()).limit(limit).all()
\ No newline at end of file
+    return Grade.query.order_by(Grade.date.desc()).limit(limit).all()
+
+@read_only
+def get_recent_grades_for_class(class_id: int, teacher_id: Optional[int] = None, limit: int = 20) -> List[Grade]:
+    """
+    Get the most recent grades of the students of a class.
+    
+    Args:
+        class_id: ID of the class
+        teacher_id: Only grades given by this teacher (optional)
+        limit: Maximum number of grades to return
+        
+    Returns:
+        List of Grade objects (student and subject loaded), newest first
+    """
+    query = (Grade.query
+             .join(Student, Grade.student_id == Student.id)
+             .filter(Student.class_id == class_id)
+             .options(joinedload(Grade.student).joinedload(Student.user), joinedload(Grade.subject)))
+    if teacher_id is not None:
+        query = query.filter(Grade.teacher_id == teacher_id)
+    return query.order_by(Grade.date.desc()).limit(limit).all()
@@ -0,0 +1,240 @@
+from app.models.job import Job
+from app import db
+from app.database import commit_or_flush
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from flask import has_request_context
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+import json
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+# Retry n waits RETRY_BASE_SECONDS * 2**(n-1) seconds.
+RETRY_BASE_SECONDS = 10
+
+def _now() -> datetime:
+    """Current time as naive UTC, the way job times are stored and compared."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def enqueue_job(name: str,
+                *args,
+                priority: int = 0,
+                dedup_key: Optional[str] = None,
+                delay: float = 0,
+                max_attempts: int = 3,
+                commit: bool = True,
+                **kwargs) -> Job:
+    """
+    Queue a task for the background workers.
+
+    Args:
+        name: Name of the task (see app.jobs.task)
+        *args, **kwargs: Arguments of the task; must be JSON serializable
+        priority: Higher runs first
+        dedup_key: If a job with this key is already waiting to run, it is
+            returned instead of queuing another one. A job that has started
+            no longer counts, so work queued while it runs is not lost
+        delay: Seconds before the job may run
+        max_attempts: Attempts before the job is marked failed
+        commit: Commit right away (False: the job is queued when the caller
+            commits, see transaction())
+
+    Returns:
+        The new (or deduplicated) Job
+    """
+    if dedup_key is not None:
+        existing = get_queued_job_by_dedup_key(dedup_key)
+        if existing:
+            return existing
+
+    created_by = None
+    if has_request_context():
+        from flask_login import current_user
+        if current_user.is_authenticated:
+            created_by = current_user.id
+
+    job = Job(
+        name=name,
+        payload=json.dumps({"args": list(args), "kwargs": kwargs}),
+        priority=priority,
+        dedup_key=dedup_key,
+        max_attempts=max_attempts,
+        run_at=_now() + timedelta(seconds=delay),
+        created_by=created_by
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(job)
+    except IntegrityError:
+        # Queued by someone else since the check above
+        return get_queued_job_by_dedup_key(dedup_key)
+    commit_or_flush(commit)
+    return job
+
+def get_job_by_id(job_id: int) -> Optional[Job]:
+    """Get a job by its ID."""
+    return db.session.get(Job, job_id)
+
+def get_queued_job_by_dedup_key(dedup_key: str) -> Optional[Job]:
+    """Get the job waiting to run with a deduplication key."""
+    return Job.query.filter(Job.dedup_key == dedup_key, Job.status == 'queued').first()
+
+def get_recent_jobs(status: Optional[str] = None, limit: int = 50) -> List[Job]:
+    """
+    Get the newest jobs.
+
+    Args:
+        status: Only jobs with this status (None: all)
+        limit: Maximum number of jobs
+
+    Returns:
+        List of Job objects, newest first
+    """
+    query = Job.query
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+def get_job_counts() -> Dict[str, int]:
+    """Get the number of jobs in each status."""
+    counts = dict.fromkeys(JOB_STATUSES, 0)
+    counts.update(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+    return counts
+
+def claim_job(worker_id: str) -> Optional[Job]:
+    """
+    Take the next job that is due, highest priority first, and mark it
+    running. The pick and the update are one statement, so two workers never
+    take the same job (and SQLite never has to upgrade a read transaction).
+
+    Args:
+        worker_id: Name of the claiming worker
+
+    Returns:
+        The claimed Job, or None if nothing is due
+    """
+    now = _now()
+    next_job = (select(Job.id)
+                .where(Job.status == 'queued', Job.run_at <= now)
+                .order_by(Job.priority.desc(), Job.id)
+                .limit(1).scalar_subquery())
+    job_id = db.session.execute(
+        update(Job)
+        .where(Job.id == next_job, Job.status == 'queued')
+        .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id) if job_id else None
+
+def complete_job(job: Job, result: Any = None, commit: bool = True) -> Job:
+    """
+    Mark a running job done.
+
+    Args:
+        job: The job
+        result: Return value of the task; stored if JSON serializable
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The updated Job
+    """
+    try:
+        job.result = json.dumps(result) if result is not None else None
+    except (TypeError, ValueError):
+        job.result = json.dumps(repr(result))
+    job.status = 'done'
+    job.finished_at = _now()
+    job.locked_by = None
+    commit_or_flush(commit)
+    return job
+
+def fail_job(job: Job, error: str, retry: bool = True, commit: bool = True) -> Job:
+    """
+    Record a failed attempt. The job is queued again with exponential backoff
+    until it has used its attempts, then marked failed.
+
+    Args:
+        job: The job
+        error: Traceback or message of the failure
+        retry: False to mark the job failed right away
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The updated Job
+    """
+    job.last_error = error
+    job.locked_by = None
+    if retry and job.dedup_key and get_queued_job_by_dedup_key(job.dedup_key):
+        retry = False  # a newer job with the same key is queued and will do the work
+    if retry and job.attempts < job.max_attempts:
+        job.status = 'queued'
+        job.run_at = _now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+    else:
+        job.status = 'failed'
+        job.finished_at = _now()
+    commit_or_flush(commit)
+    return job
+
+def retry_job(job_id: int, commit: bool = True) -> Optional[Job]:
+    """
+    Queue a failed job again, with a fresh set of attempts. If a job with
+    the same deduplication key is already queued, that one is returned.
+
+    Args:
+        job_id: ID of the job
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The Job, or None if it does not exist or has not failed
+    """
+    job = get_job_by_id(job_id)
+    if not job or job.status != 'failed':
+        return None
+    if job.dedup_key:
+        duplicate = get_queued_job_by_dedup_key(job.dedup_key)
+        if duplicate:
+            return duplicate
+    job.status = 'queued'
+    job.attempts = 0
+    job.run_at = _now()
+    job.finished_at = None
+    commit_or_flush(commit)
+    return job
+
+def requeue_stale_jobs(timeout: float, commit: bool = True) -> int:
+    """
+    Give back the jobs of workers that died: running jobs taken more than
+    `timeout` seconds ago are queued again, or failed if out of attempts.
+
+    Args:
+        timeout: Seconds after which a running job is considered abandoned
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of jobs given back
+    """
+    cutoff = _now() - timedelta(seconds=timeout)
+    stale = Job.query.filter(Job.status == 'running', Job.locked_at < cutoff).all()
+    for job in stale:
+        fail_job(job, f"Abandoned by worker {job.locked_by}", commit=False)
+    commit_or_flush(commit)
+    return len(stale)
+
+def prune_jobs(max_age_days: int = 7, commit: bool = True) -> int:
+    """
+    Delete finished jobs (done or failed) older than `max_age_days`.
+
+    Args:
+        max_age_days: Age of the oldest finished job kept
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of deleted jobs
+    """
+    cutoff = _now() - timedelta(days=max_age_days)
+    deleted = (Job.query.filter(Job.status.in_(('done', 'failed')), Job.finished_at < cutoff)
+               .delete(synchronize_session=False))
+    commit_or_flush(commit)
+    return deleted
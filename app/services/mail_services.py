@@ -0,0 +1,330 @@
+from app.models.outbound_email import OutboundEmail
+from app.models.user import User
+from app import db
+from app.database import commit_or_flush
+from app.jobs import task
+from app.mail import build_message, get_smtp_pool
+from app.services.job_services import enqueue_job
+from app.services.user_services import generate_email_verification_token, generate_password_reset_token
+from flask import current_app, render_template, url_for, has_request_context
+from jinja2 import TemplateNotFound
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from contextlib import nullcontext
+from sqlalchemy import func, insert, select, update
+import threading
+
+# Outgoing email goes through the outbox (the outbound_email table): the
+# request renders the message and queues it, and the 'mail.flush' job sends
+# the outbox in batches over pooled SMTP connections (see app/mail.py).
+
+MAIL_STATUSES = ('queued', 'sending', 'sent', 'failed')
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONNECTIONS = 2
+DEFAULT_MAX_ATTEMPTS = 5
+# Attempt n is retried RETRY_BASE_SECONDS * 2**(n-1) seconds later.
+RETRY_BASE_SECONDS = 30
+# Emails a dead sender left in 'sending' for this long are queued again.
+SENDING_TIMEOUT_SECONDS = 600
+PRIORITY_BULK = 0
+PRIORITY_TRANSACTIONAL = 10
+
+def _now() -> datetime:
+    """Current time as naive UTC, the way outbox times are stored and compared."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _mail_context():
+    """Links in emails must be absolute: outside of a request (CLI, jobs),
+    build them against MAIL_BASE_URL."""
+    if has_request_context():
+        return nullcontext()
+    return current_app.test_request_context(base_url=current_app.config.get('MAIL_BASE_URL', 'http://localhost:5000'))
+
+def render_email(template: str, **context) -> Dict[str, Optional[str]]:
+    """
+    Render mail/<template>.txt and, if it exists, mail/<template>.html.
+
+    Args:
+        template: Name of the template, without extension
+        **context: Template variables
+
+    Returns:
+        Dict with "body_text" and "body_html" (None without an HTML template)
+    """
+    with _mail_context():
+        body_text = render_template(f'mail/{template}.txt', **context)
+        try:
+            body_html = render_template(f'mail/{template}.html', **context)
+        except TemplateNotFound:
+            body_html = None
+    return {"body_text": body_text, "body_html": body_html}
+
+def queue_email(to_address: str, subject: str, template: str, priority: int = PRIORITY_TRANSACTIONAL,
+                commit: bool = True, **context) -> OutboundEmail:
+    """
+    Render an email and put it in the outbox. It is sent by the next
+    'mail.flush' job, which this queues as well.
+
+    Args:
+        to_address: Recipient
+        subject: Subject line
+        template: Name of the template under templates/mail/, without extension
+        priority: Higher is sent first
+        commit: Commit right away (False: the caller commits, see transaction())
+        **context: Template variables
+
+    Returns:
+        The queued OutboundEmail
+    """
+    email = OutboundEmail(to_address=to_address, subject=subject, priority=priority, next_attempt_at=_now(),
+                          **render_email(template, **context))
+    db.session.add(email)
+    schedule_flush(commit=False)
+    commit_or_flush(commit)
+    return email
+
+def queue_emails(messages: List[Dict[str, Any]], priority: int = PRIORITY_BULK, commit: bool = True) -> int:
+    """
+    Put many rendered emails in the outbox with one INSERT.
+
+    Args:
+        messages: Dicts with "to_address", "subject", "body_text" and "body_html"
+        priority: Higher is sent first
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of queued emails
+    """
+    if not messages:
+        return 0
+    now = _now()
+    db.session.execute(insert(OutboundEmail), [
+        dict(message, priority=priority, status='queued', attempts=0, next_attempt_at=now, created_at=now)
+        for message in messages
+    ])
+    schedule_flush(commit=False)
+    commit_or_flush(commit)
+    return len(messages)
+
+def schedule_flush(delay: float = 0, commit: bool = True) -> None:
+    """Queue a 'mail.flush' job unless one is already waiting to run."""
+    enqueue_job('mail.flush', priority=PRIORITY_TRANSACTIONAL, dedup_key='mail.flush', delay=delay, commit=commit)
+
+def send_verification_email(user: User, commit: bool = True) -> Optional[OutboundEmail]:
+    """
+    Generate an email verification token for a user and queue the email.
+
+    Args:
+        user: The user (needs an email address)
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The queued OutboundEmail, or None if the user has no email address
+    """
+    if not user.email:
+        return None
+    token = generate_email_verification_token(user, commit=False)
+    with _mail_context():
+        link = url_for('auth.verify_email_link', token=token, _external=True)
+    return queue_email(user.email, "Confirm your email address", 'verify_email', commit=commit,
+                       user=user, link=link)
+
+def send_verification_emails(users: List[User], commit: bool = True) -> int:
+    """
+    Generate verification tokens for many users and queue their emails in
+    one transaction (e.g. when a school year's students are onboarded).
+    Users without an email address are skipped.
+
+    Args:
+        users: The users
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of queued emails
+    """
+    messages = []
+    with _mail_context():
+        for user in users:
+            if not user.email:
+                continue
+            token = generate_email_verification_token(user, commit=False)
+            messages.append(dict(to_address=user.email, subject="Confirm your email address",
+                                 **render_email('verify_email', user=user,
+                                                link=url_for('auth.verify_email_link', token=token, _external=True))))
+    return queue_emails(messages, priority=PRIORITY_BULK, commit=commit)
+
+def send_password_reset_email(user: User, commit: bool = True) -> Optional[OutboundEmail]:
+    """
+    Generate a password reset token for a user and queue the email.
+
+    Args:
+        user: The user (needs an email address)
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The queued OutboundEmail, or None if the user has no email address
+    """
+    if not user.email:
+        return None
+    token = generate_password_reset_token(user, commit=False)
+    with _mail_context():
+        link = url_for('auth.reset_password_link', token=token, _external=True)
+    return queue_email(user.email, "Reset your password", 'reset_password', priority=PRIORITY_TRANSACTIONAL,
+                       commit=commit, user=user, link=link)
+
+def get_outbox_counts() -> Dict[str, int]:
+    """Get the number of emails in each status."""
+    counts = dict.fromkeys(MAIL_STATUSES, 0)
+    counts.update(db.session.query(OutboundEmail.status, func.count(OutboundEmail.id))
+                  .group_by(OutboundEmail.status).all())
+    return counts
+
+def claim_emails(limit: int) -> List[OutboundEmail]:
+    """
+    Take up to `limit` due emails, highest priority first, and mark them
+    'sending'. One statement, so concurrent senders never share an email.
+
+    Args:
+        limit: Maximum number of emails
+
+    Returns:
+        List of OutboundEmail objects
+    """
+    now = _now()
+    due = (select(OutboundEmail.id)
+           .where(OutboundEmail.status == 'queued', OutboundEmail.next_attempt_at <= now)
+           .order_by(OutboundEmail.priority.desc(), OutboundEmail.id)
+           .limit(limit))
+    ids = db.session.execute(
+        update(OutboundEmail)
+        .where(OutboundEmail.id.in_(due), OutboundEmail.status == 'queued')
+        .values(status='sending', claimed_at=now, attempts=OutboundEmail.attempts + 1)
+        .returning(OutboundEmail.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.commit()
+    if not ids:
+        return []
+    return OutboundEmail.query.filter(OutboundEmail.id.in_(ids)).order_by(OutboundEmail.id).all()
+
+def _record_failure(email: OutboundEmail, error: str, permanent: bool) -> None:
+    email.last_error = error
+    max_attempts = current_app.config.get('MAIL_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    if permanent or email.attempts >= max_attempts:
+        email.status = 'failed'
+    else:
+        email.status = 'queued'
+        email.next_attempt_at = _now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (email.attempts - 1))
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies will not get better with time; 4xx and lost connections may."""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(500 <= code < 600 for code in codes)
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and 500 <= code < 600
+
+def send_batch(emails: List[OutboundEmail]) -> Dict[str, int]:
+    """
+    Send claimed emails over one pooled connection and record the outcome
+    with one UPDATE for the sent ones. If the connection breaks, the rest of
+    the batch is queued again for a later attempt.
+
+    Args:
+        emails: Emails in status 'sending'
+
+    Returns:
+        Dict with the number of `sent`, `retried` and `failed` emails
+    """
+    import smtplib  # only loaded by the processes that send
+    stats = {"sent": 0, "retried": 0, "failed": 0}
+    sent_ids = []
+    pending = list(emails)
+    try:
+        with get_smtp_pool().connection() as connection:
+            while pending:
+                email = pending[0]
+                try:
+                    connection.send(build_message(email.to_address, email.subject, email.body_text, email.body_html))
+                    sent_ids.append(email.id)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as error:
+                    permanent = _is_permanent(error)
+                    _record_failure(email, f"{type(error).__name__}: {error}", permanent)
+                    stats["failed" if email.status == 'failed' else "retried"] += 1
+                pending.pop(0)
+    except (smtplib.SMTPException, OSError) as error:
+        # Connection lost or refused: nothing more goes through it.
+        current_app.logger.warning("SMTP connection failed: %s", error)
+        for email in pending:
+            _record_failure(email, f"{type(error).__name__}: {error}", permanent=False)
+            stats["failed" if email.status == 'failed' else "retried"] += 1
+    if sent_ids:
+        db.session.execute(update(OutboundEmail).where(OutboundEmail.id.in_(sent_ids))
+                           .values(status='sent', sent_at=_now(), last_error=None)
+                           .execution_options(synchronize_session=False))
+    db.session.commit()
+    stats["sent"] = len(sent_ids)
+    return stats
+
+def requeue_stale_emails(commit: bool = True) -> int:
+    """
+    Queue again the emails that a dead sender left in 'sending'.
+
+    Args:
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of emails queued again
+    """
+    cutoff = _now() - timedelta(seconds=SENDING_TIMEOUT_SECONDS)
+    count = (OutboundEmail.query.filter(OutboundEmail.status == 'sending', OutboundEmail.claimed_at < cutoff)
+             .update({OutboundEmail.status: 'queued'}, synchronize_session=False))
+    commit_or_flush(commit)
+    return count
+
+@task('mail.flush')
+def flush_outbox(connections: Optional[int] = None) -> Dict[str, int]:
+    """
+    Send every due email in the outbox: MAIL_CONNECTIONS threads, each with
+    its own SMTP connection, take batches of MAIL_BATCH_SIZE until none is
+    left. If emails wait for a retry, another flush is queued for then.
+
+    Args:
+        connections: Number of parallel SMTP connections (default MAIL_CONNECTIONS)
+
+    Returns:
+        Dict with the number of `sent`, `retried` and `failed` emails
+    """
+    app = current_app._get_current_object()
+    connections = connections or app.config.get('MAIL_CONNECTIONS', DEFAULT_CONNECTIONS)
+    batch_size = app.config.get('MAIL_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    requeue_stale_emails()
+
+    totals = {"sent": 0, "retried": 0, "failed": 0}
+    totals_lock = threading.Lock()
+
+    def drain():
+        while True:
+            with app.app_context():
+                batch = claim_emails(batch_size)
+                if not batch:
+                    return
+                stats = send_batch(batch)
+            with totals_lock:
+                for key, value in stats.items():
+                    totals[key] += value
+            if stats["sent"] == 0 and stats["retried"]:
+                return  # the server is unreachable: leave the rest for the retry
+
+    senders = [threading.Thread(target=drain, name=f"mail-sender-{index}") for index in range(connections)]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+
+    next_retry = (db.session.query(func.min(OutboundEmail.next_attempt_at))
+                  .filter(OutboundEmail.status == 'queued').scalar())
+    if next_retry is not None:
+        schedule_flush(delay=max((next_retry - _now()).total_seconds(), 0))
+    return totals
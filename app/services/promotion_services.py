@@ -0,0 +1,155 @@
+from app.models.promotion_batch import PromotionBatch, promotion_move
+from app.models.student import Student
+from app.models.class_ import Class
+from app import db
+from app.database import read_only, commit_or_flush
+from app.cache import invalidate
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone
+from sqlalchemy import select, insert, update, case, func, literal
+import re
+
+# A promotion plan maps source class ids to target class ids; None as a target
+# means the students leave (graduate) and get no class. Classes that are not in
+# the plan keep their students. Every move happens at once, so 1A -> 2A and
+# 2A -> 3A in the same plan do what they say.
+
+def _level_key(level: str) -> list:
+    """Sort key putting "2nd Year" before "10th Year"."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', level)]
+
+@read_only
+def suggest_promotion_plan() -> Dict[int, Optional[int]]:
+    """
+    Suggest a plan from the class levels: every class moves to the class of
+    the next level with the same name (or at the same rank), and the last
+    level graduates.
+
+    Returns:
+        Dict of source class id -> target class id (None: graduate)
+    """
+    by_level: Dict[str, List[Any]] = {}
+    for row in db.session.execute(select(Class.id, Class.name, Class.level).order_by(Class.name)):
+        by_level.setdefault(row.level, []).append(row)
+    levels = sorted(by_level, key=_level_key)
+    plan: Dict[int, Optional[int]] = {}
+    for index, level in enumerate(levels):
+        if index + 1 == len(levels):
+            plan.update((row.id, None) for row in by_level[level])
+            continue
+        targets = by_level[levels[index + 1]]
+        target_by_name = {row.name: row.id for row in targets}
+        for rank, row in enumerate(by_level[level]):
+            plan[row.id] = target_by_name.get(row.name, targets[min(rank, len(targets) - 1)].id)
+    return plan
+
+@read_only
+def preview_promotion(plan: Dict[int, Optional[int]]) -> Dict[str, Any]:
+    """
+    Show what a promotion would do, without changing anything.
+
+    Args:
+        plan: Dict of source class id -> target class id (None: graduate)
+
+    Returns:
+        Dict with `moves` (one dict per source class: `source`, `target`
+        (None: graduate) and `students`), the number of `students` moved,
+        and `warnings` (unknown classes, classes that would end up merged)
+    """
+    classes = {row.id: row for row in db.session.execute(select(Class.id, Class.name, Class.level))}
+    counts = dict(db.session.execute(
+        select(Student.class_id, func.count(Student.id)).group_by(Student.class_id)).all())
+    moves, warnings = [], []
+    for source_id, target_id in plan.items():
+        if source_id not in classes or (target_id is not None and target_id not in classes):
+            warnings.append(f"Unknown class in the plan: {source_id} -> {target_id}.")
+            continue
+        moves.append({"source": classes[source_id], "target": classes.get(target_id),
+                      "students": counts.get(source_id, 0)})
+    # A target receives students from several classes, or keeps students that don't move on
+    incoming: Dict[int, int] = {}
+    for move in moves:
+        if move["target"] is not None and move["source"].id != move["target"].id:
+            incoming[move["target"].id] = incoming.get(move["target"].id, 0) + 1
+    for target_id, sources in incoming.items():
+        target = classes[target_id]
+        if sources > 1:
+            warnings.append(f"{target.level} {target.name} receives students from {sources} classes.")
+        if target_id not in plan and counts.get(target_id):
+            warnings.append(f"{target.level} {target.name} keeps its {counts[target_id]} current students.")
+    moves.sort(key=lambda move: (_level_key(move["source"].level), move["source"].name))
+    return {"moves": moves, "students": sum(move["students"] for move in moves), "warnings": warnings}
+
+def promote_students(plan: Dict[int, Optional[int]], created_by: Optional[int] = None,
+                     commit: bool = True) -> Optional[PromotionBatch]:
+    """
+    Move the students of every class of the plan at once: one INSERT ...
+    SELECT to remember where everyone was (for undo_promotion) and one UPDATE
+    of the student table.
+
+    Args:
+        plan: Dict of source class id -> target class id (None: graduate)
+        created_by: ID of the admin applying it
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        The PromotionBatch, None if the plan names a class that doesn't exist
+    """
+    plan = {source_id: target_id for source_id, target_id in plan.items() if source_id != target_id}
+    if not plan:
+        return None
+    known = set(db.session.execute(select(Class.id)).scalars())
+    if not set(plan) <= known or not {target for target in plan.values() if target is not None} <= known:
+        return None
+
+    batch = PromotionBatch(created_by=created_by)
+    db.session.add(batch)
+    db.session.flush()
+    target = case(plan, value=Student.class_id)
+    moved = Student.class_id.in_(list(plan))
+    db.session.execute(insert(promotion_move).from_select(
+        ["batch_id", "student_id", "from_class_id", "to_class_id"],
+        select(literal(batch.id), Student.id, Student.class_id, target).where(moved)))
+    batch.students = db.session.execute(
+        update(Student).where(moved).values(class_id=target).execution_options(synchronize_session=False)
+    ).rowcount
+    invalidate(Student.__tablename__)
+    commit_or_flush(commit)
+    return batch
+
+def undo_promotion(batch_id: int, commit: bool = True) -> Optional[int]:
+    """
+    Put the students of a promotion back in their previous class. Students
+    moved again since (by hand or by a later promotion) are left alone.
+
+    Args:
+        batch_id: ID of the PromotionBatch
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of students moved back, None if the batch doesn't exist or was already undone
+    """
+    batch = db.session.get(PromotionBatch, batch_id)
+    if not batch or batch.undone_at:
+        return None
+    move = (select(promotion_move.c.from_class_id)
+            .where(promotion_move.c.batch_id == batch_id, promotion_move.c.student_id == Student.id)
+            .scalar_subquery())
+    still_there = (select(promotion_move.c.student_id)
+                   .where(promotion_move.c.batch_id == batch_id,
+                          promotion_move.c.student_id == Student.id,
+                          # IS: graduated students have no class
+                          Student.class_id.is_not_distinct_from(promotion_move.c.to_class_id)))
+    restored = db.session.execute(
+        update(Student).where(still_there.exists()).values(class_id=move)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    batch.undone_at = datetime.now(timezone.utc)
+    invalidate(Student.__tablename__)
+    commit_or_flush(commit)
+    return restored
+
+@read_only
+def get_promotion_batches(limit: int = 20) -> List[PromotionBatch]:
+    """Get the latest promotions, newest first."""
+    return PromotionBatch.query.order_by(PromotionBatch.id.desc()).limit(limit).all()
@@ -0,0 +1,137 @@
+from app.models.article import Article
+from app.models.article_revision import ArticleRevision
+from app import db
+from typing import Optional, List
+from sqlalchemy import func
+from sqlalchemy.orm import defer
+import difflib
+import json
+import zlib
+
+# A delta is a list of operations applied to the lines of the newer body:
+#   ["c", start, end]  copy newer_lines[start:end]
+#   ["i", [lines]]     insert these lines
+# serialized as JSON and zlib-compressed.
+
+def _make_delta(newer: str, older: str) -> bytes:
+    """Build the compressed delta that turns `newer` into `older`."""
+    newer_lines = newer.splitlines(keepends=True)
+    older_lines = older.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, newer_lines, older_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(["c", i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(["i", older_lines[j1:j2]])
+        # 'delete': lines of the newer body that the older one did not have
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'), 9)
+
+def _apply_delta(newer: str, delta: bytes) -> str:
+    """Apply a delta built by `_make_delta` to `newer`, giving the older body."""
+    newer_lines = newer.splitlines(keepends=True)
+    older_lines = []
+    for op in json.loads(zlib.decompress(delta)):
+        if op[0] == "c":
+            older_lines.extend(newer_lines[op[1]:op[2]])
+        else:
+            older_lines.extend(op[1])
+    return ''.join(older_lines)
+
+def record_article_revision(article: Article, new_content_md: str) -> ArticleRevision:
+    """
+    Store the current version of an article as a revision, just before it is
+    overwritten with `new_content_md`. Does not commit: called from
+    `update_article` as part of its transaction.
+
+    Args:
+        article: The article, still holding its current title and body
+        new_content_md: The body that is about to replace the current one
+
+    Returns:
+        The new ArticleRevision object
+    """
+    last_number = (db.session.query(func.max(ArticleRevision.number))
+                   .filter_by(article_id=article.id).scalar()) or 0
+    delta = _make_delta(new_content_md, article.content_md)
+    revision = ArticleRevision(
+        article_id=article.id,
+        number=last_number + 1,
+        title=article.title,
+        created_at=article.last_edited,
+        content_length=len(article.content_md),
+        delta=delta,
+        delta_size=len(delta)
+    )
+    db.session.add(revision)
+    return revision
+
+def get_article_history(article_id: int) -> List[ArticleRevision]:
+    """
+    Get the revisions of an article, newest first, without loading their deltas.
+
+    Args:
+        article_id: ID of the article
+
+    Returns:
+        List of ArticleRevision objects (the current version is the article itself)
+    """
+    return (ArticleRevision.query
+            .options(defer(ArticleRevision.delta))
+            .filter_by(article_id=article_id)
+            .order_by(ArticleRevision.number.desc())
+            .all())
+
+def get_article_revision(article_id: int, number: int) -> Optional[ArticleRevision]:
+    """Get a single revision of an article, without loading its delta."""
+    return (ArticleRevision.query
+            .options(defer(ArticleRevision.delta))
+            .filter_by(article_id=article_id, number=number)
+            .first())
+
+def get_article_revision_content(article_id: int, number: int) -> Optional[str]:
+    """
+    Rebuild the body of an article at a given revision, starting from the
+    current body and applying the deltas of the newer revisions in turn.
+
+    Args:
+        article_id: ID of the article
+        number: Revision number
+
+    Returns:
+        The body at that revision, None if the article or revision does not exist
+    """
+    article = Article.query.get(article_id)
+    if not article:
+        return None
+    deltas = (db.session.query(ArticleRevision.number, ArticleRevision.delta)
+              .filter(ArticleRevision.article_id == article_id, ArticleRevision.number >= number)
+              .order_by(ArticleRevision.number.desc())
+              .all())
+    if not deltas or deltas[-1].number != number:
+        return None
+
+    content = article.content_md
+    for revision in deltas:
+        content = _apply_delta(content, revision.delta)
+    return content
+
+def restore_article_revision(article_id: int, number: int) -> Optional[Article]:
+    """
+    Restore the title and body of an article from a revision. The version
+    being replaced is kept as a new revision, so a restore can be undone.
+
+    Args:
+        article_id: ID of the article
+        number: Revision number to restore
+
+    Returns:
+        Updated Article object if successful, None otherwise
+    """
+    from app.services.article_services import update_article
+
+    revision = get_article_revision(article_id, number)
+    content = get_article_revision_content(article_id, number)
+    if not revision or content is None:
+        return None
+    return update_article(article_id, title=revision.title, content_md=content)
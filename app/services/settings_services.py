@@ -0,0 +1,132 @@
+from app.utils import file_lock
+from app.metrics import record_cache_access
+from typing import Dict, Any, Optional, Mapping
+from types import MappingProxyType
+import json
+import os
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config.json')
+SCHOOL_INFO_PATH = os.path.join(PROJECT_ROOT, 'school_info.json')
+
+DEFAULT_CONFIG = {"language": "en",
+                  "SECRET_KEY": "super-secret-dev-key",
+                  "DATABASE_URI": "sqlite:///../instance/school.db",
+                  "first_load": True}
+
+DEFAULT_SCHOOL_INFO = {"school_name": "Pardefaut",
+                       "school_address": "123 Main St.",
+                       "school_phone": "01-2345-6789",
+                       "school_email": "contact@pardefaut.com",
+                       "school_website": "www.pardefaut.com",
+                       "school_logo": "static/assets/uploads/logo.png"}
+
+# How often (seconds) a worker checks whether a settings file changed on disk.
+RELOAD_INTERVAL = 1.0
+
+# path -> {"data": MappingProxyType, "version": (mtime_ns, size, inode), "checked_at": float}
+_settings_cache: Dict[str, Dict[str, Any]] = {}
+_cache_lock = threading.Lock()
+
+def _file_version(path: str) -> Optional[tuple]:
+    """Identify the current content of a file without reading it."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # os.replace gives the file a new inode, so same-second writes are still seen.
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def _read(path: str, defaults: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
+    """Read and cache a settings file, creating it from `defaults` if missing."""
+    if not os.path.exists(path) and defaults is not None:
+        _write_atomic(path, defaults)
+    version = _file_version(path)
+    with open(path, encoding='utf-8') as f:
+        data = MappingProxyType(json.load(f))
+    _settings_cache[path] = {"data": data, "version": version, "checked_at": time.monotonic()}
+    return data
+
+def _write_atomic(path: str, data: Dict[str, Any]) -> None:
+    """Write JSON to a temporary file and move it in place, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_settings(path: str, defaults: Optional[Dict[str, Any]] = None) -> Mapping[str, Any]:
+    """
+    Get the parsed content of a JSON settings file from memory.
+
+    The file is read once per process. Afterwards its version (mtime, size,
+    inode) is checked at most every RELOAD_INTERVAL seconds, and the file is
+    only parsed again when another process replaced it.
+
+    Args:
+        path: Path of the JSON file
+        defaults: Content to create the file with if it does not exist
+
+    Returns:
+        Read-only mapping of the settings
+    """
+    entry = _settings_cache.get(path)
+    now = time.monotonic()
+    if entry and now - entry["checked_at"] < RELOAD_INTERVAL:
+        record_cache_access("settings", True)
+        return entry["data"]
+
+    with _cache_lock:
+        entry = _settings_cache.get(path)
+        if entry and _file_version(path) == entry["version"]:
+            entry["checked_at"] = now
+            record_cache_access("settings", True)
+            return entry["data"]
+        record_cache_access("settings", False)
+        return _read(path, defaults)
+
+def save_settings(path: str, changes: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Mapping[str, Any]:
+    """
+    Apply changes to a JSON settings file. The file is re-read under a lock
+    so that concurrent writers in other workers do not lose each other's
+    changes, then replaced atomically.
+
+    Args:
+        path: Path of the JSON file
+        changes: Keys to set
+        defaults: Content to create the file with if it does not exist
+
+    Returns:
+        Read-only mapping of the updated settings
+    """
+    with file_lock(path + '.lock'), _cache_lock:
+        current = dict(_read(path, defaults)) if os.path.exists(path) or defaults is not None else {}
+        current.update(changes)
+        _write_atomic(path, current)
+        return _read(path, None)
+
+def get_config() -> Mapping[str, Any]:
+    """Get the application config (config.json)."""
+    return load_settings(CONFIG_PATH, DEFAULT_CONFIG)
+
+def get_school_info() -> Mapping[str, Any]:
+    """Get the school information (school_info.json)."""
+    return load_settings(SCHOOL_INFO_PATH, DEFAULT_SCHOOL_INFO)
+
+def update_config(**changes) -> Mapping[str, Any]:
+    """Update keys of the application config."""
+    return save_settings(CONFIG_PATH, changes, DEFAULT_CONFIG)
+
+def update_school_info(**changes) -> Mapping[str, Any]:
+    """Update keys of the school information, in a single atomic write."""
+    return save_settings(SCHOOL_INFO_PATH, changes, DEFAULT_SCHOOL_INFO)
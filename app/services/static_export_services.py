@@ -0,0 +1,138 @@
+from app.models.article import Article
+from app.models.writer import Writer
+from app.models.user import User
+from app.services.article_services import get_article_by_id
+from app import db
+from app.utils import as_naive_utc
+from app.jobs import task
+from flask import current_app, render_template
+from typing import Dict, List, Optional
+from sqlalchemy.orm import defer, joinedload
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz siblings are written
+    brotli = None
+
+MANIFEST_FILENAME = '.export_manifest.json'
+
+def _write_file(path: str, content: bytes, precompress: bool = True) -> None:
+    """Atomically write a file and, unless told otherwise, its pre-compressed .gz/.br siblings."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = {path: content}
+    if precompress:
+        variants[path + '.gz'] = gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants[path + '.br'] = brotli.compress(content)
+    for target, data in variants.items():
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+
+def _load_manifest(output_dir: str) -> Dict:
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {"articles": {}, "pages": {}}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _page_url(page: int) -> str:
+    """Public URL of an exported index page (page 1 is the news index itself)."""
+    base = current_app.config.get('STATIC_EXPORT_URL_PREFIX', '/articles/')
+    return base if page == 1 else f"{base}page/{page}/"
+
+def _page_path(output_dir: str, page: int) -> str:
+    if page == 1:
+        return os.path.join(output_dir, 'index.html')
+    return os.path.join(output_dir, 'page', str(page), 'index.html')
+
+# Queued by the article services when STATIC_EXPORT_ON_CHANGE is set.
+@task('articles.export_static')
+def export_static_site(output_dir: Optional[str] = None, per_page: int = 20, force: bool = False) -> Dict[str, int]:
+    """
+    Render every published article and the paginated news index into a
+    directory that a web server can serve without Python:
+
+        <output_dir>/index.html            news index, page 1 (/articles/)
+        <output_dir>/page/<n>/index.html   news index, page n
+        <output_dir>/<id>/index.html       article page (/articles/<id>)
+
+    Each file gets pre-compressed .gz (and .br, if brotli is installed)
+    siblings. Articles whose `last_edited` did not change since the previous
+    export, and index pages whose entries did not change, are not rendered
+    again. Files of articles that were deleted or unpublished are removed.
+
+    Args:
+        output_dir: Target directory, defaults to the STATIC_EXPORT_DIR config
+        per_page: Number of articles per index page
+        force: Render everything again (e.g. after a template change)
+
+    Returns:
+        Dict with the number of `rendered`, `skipped` and `removed` articles
+        and of rendered `pages`
+    """
+    output_dir = output_dir or current_app.config.get(
+        'STATIC_EXPORT_DIR', os.path.join(current_app.instance_path, 'static_export'))
+    os.makedirs(output_dir, exist_ok=True)
+    previous = _load_manifest(output_dir)
+    manifest = {"articles": {}, "pages": {}}
+    stats = {"rendered": 0, "skipped": 0, "removed": 0, "pages": 0}
+
+    # Metadata only: bodies are loaded one by one for changed articles.
+    articles: List[Article] = (Article.query
+        .options(defer(Article.content_md),
+                 joinedload(Article.author).joinedload(Writer.user)
+                    .load_only(User.username, User.first_name, User.last_name))
+        .filter_by(is_published=True)
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .all())
+
+    with current_app.test_request_context():
+        for article in articles:
+            key = str(article.id)
+            version = as_naive_utc(article.last_edited or article.created_at).isoformat()
+            manifest["articles"][key] = version
+            if not force and previous["articles"].get(key) == version:
+                stats["skipped"] += 1
+                continue
+            full_article = get_article_by_id(article.id)
+            html = render_template('articles/article.html', article=full_article)
+            _write_file(os.path.join(output_dir, key, 'index.html'), html.encode('utf-8'))
+            db.session.expire(full_article, ['content_md'])  # don't keep bodies around
+            stats["rendered"] += 1
+
+        page_count = max(1, (len(articles) + per_page - 1) // per_page)
+        for page in range(1, page_count + 1):
+            page_articles = articles[(page - 1) * per_page:page * per_page]
+            key = str(page)
+            signature = hashlib.sha1(json.dumps(
+                [(a.id, a.title, manifest["articles"][str(a.id)]) for a in page_articles]
+                + [page_count]).encode('utf-8')).hexdigest()
+            manifest["pages"][key] = signature
+            if not force and previous["pages"].get(key) == signature:
+                continue
+            html = render_template(
+                'articles/index.html',
+                articles=page_articles,
+                next_url=_page_url(page + 1) if page < page_count else None,
+                prev_url=_page_url(page - 1) if page > 1 else None,
+            )
+            _write_file(_page_path(output_dir, page), html.encode('utf-8'))
+            stats["pages"] += 1
+
+    # Remove what is no longer published
+    for key in set(previous["articles"]) - set(manifest["articles"]):
+        shutil.rmtree(os.path.join(output_dir, key), ignore_errors=True)
+        stats["removed"] += 1
+    for key in set(previous["pages"]) - set(manifest["pages"]):
+        shutil.rmtree(os.path.join(output_dir, 'page', key), ignore_errors=True)
+
+    _write_file(os.path.join(output_dir, MANIFEST_FILENAME), json.dumps(manifest).encode('utf-8'), precompress=False)
+    return stats
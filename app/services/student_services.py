@@ -1,8 +1,10 @@
 from app.models.student import Student
 from app.services.user_services import create_user
 from app import db
+from app.database import read_only, commit_or_flush
 from werkzeug.security import generate_password_hash
 from typing import Optional, List
+from sqlalchemy.orm import joinedload
 from app.utils import format_date, format_date_to_obj
 
 def create_student(username: str, 
@@ -12,9 +14,11 @@ def create_student(username: str,
                    last_name: str, 
                    birth_date: str,
                    phone_number: str,
-                   class_id: Optional[int] = None) -> Student:
+                   class_id: Optional[int] = None,
+                   commit: bool = True) -> Student:
                     # i cannot believe there isn't a easier way than Optional[int] = None
-    """Create a new student."""
+    """Create a new student (user and student rows, one commit).
+    Pass commit=False to let the caller commit, see transaction()."""
     new_user = create_user(
         username=username,
         password=password, # Will be hashed in create_user
@@ -23,10 +27,9 @@ def create_student(username: str,
         first_name=first_name,
         last_name=last_name,
         birth_date=birth_date, # LEAVE AS STRING, CONVERT IN USER SERVICES
-        phone_number=phone_number
+        phone_number=phone_number,
+        commit=False
     )
-    db.session.add(new_user)
-    db.session.commit()
 
     # Create a new student record
     new_student = Student(
@@ -34,7 +37,7 @@ def create_student(username: str,
         class_id=class_id
     )
     db.session.add(new_student)
-    db.session.commit()
+    commit_or_flush(commit)
     return new_student
 
 def update_student(student_id: int, 
@@ -45,10 +48,12 @@ def update_student(student_id: int,
                    last_name: Optional[str] = None, 
                    birth_date: Optional[str] = None,
                    phone_number: Optional[str] = None,
-                   class_id: Optional[int] = None) -> Student:
+                   class_id: Optional[int] = None,
+                   commit: bool = True) -> Student:
     """Update a student's information.
     All parameters are optional. Birth date should be in the format 'YYYY-MM-DD'.
     Password will be hashed. Pass as plaintext.
+    Pass commit=False to let the caller commit, see transaction().
     """
     student = Student.query.get(student_id)
     if not student:
@@ -68,14 +73,14 @@ def update_student(student_id: int,
     if phone_number:
         student.user.phone_number = phone_number
     if class_id:
-        student_obj = Student.query.get(student_id)
-        student_obj.class_id = class_id
-    db.session.commit()
+        student.class_id = class_id
+    commit_or_flush(commit)
     return student
     
+@read_only
 def get_all_student_by_class_id(class_id: int) -> List[Student]:
     """Get all students in a specific class."""
-    return Student.query.filter_by(class_id=class_id).all()
+    return Student.query.options(joinedload(Student.user)).filter_by(class_id=class_id).all()
 
 def get_student_by_id(student_id: int) -> Optional[Student]:
     """Get a student by their User-ID."""
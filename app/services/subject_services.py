@@ -1,13 +1,16 @@
 from app.models.subject import Subject
 from app import db
+from app.database import read_only
+from app.cache import cached
 from typing import Optional
 
-def create_subject(name: str) -> Optional[Subject]:
+def create_subject(name: str, weekly_periods: Optional[int] = None) -> Optional[Subject]:
     """
     Create a new subject.
     
     Args:
         name: Name of the subject
+        weekly_periods: Lessons per week for each class (default 3)
         
     Returns:
         Created Subject object if successful, None otherwise
@@ -16,17 +19,21 @@ def create_subject(name: str) -> Optional[Subject]:
         return None
     
     subject = Subject(name=name)
+    if weekly_periods is not None:
+        subject.weekly_periods = weekly_periods
     db.session.add(subject)
     db.session.commit()
     return subject
 
-def update_subject(subject_id: int, name: Optional[str] = None) -> Optional[Subject]:
+def update_subject(subject_id: int, name: Optional[str] = None,
+                   weekly_periods: Optional[int] = None) -> Optional[Subject]:
     """
     Update a subject's information.
     
     Args:
         subject_id: ID of the subject to update
         name: New name for the subject
+        weekly_periods: New number of lessons per week for each class
         
     Returns:
         Updated Subject object if found, None otherwise
@@ -37,6 +44,8 @@ def update_subject(subject_id: int, name: Optional[str] = None) -> Optional[Subj
     
     if name:
         subject.name = name
+    if weekly_periods is not None:
+        subject.weekly_periods = weekly_periods
     
     db.session.commit()
     return subject
@@ -59,6 +68,7 @@ def delete_subject(subject_id: int) -> bool:
     db.session.commit()
     return True
 
+@cached("subject:{subject_id}")
 def get_subject_by_id(subject_id: int) -> Optional[Subject]:
     """
     Get a subject by its ID.
@@ -83,6 +93,7 @@ def get_subject_by_name(name: str) -> Optional[Subject]:
     """
     return Subject.query.filter_by(name=name).first()
 
+@read_only
 def get_all_subjects() -> list[Subject]:
     """
     Get all subjects.
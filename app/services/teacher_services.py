@@ -2,9 +2,13 @@ from app.services.user_services import create_user, get_user_by_id, get_teacher_
 from app.models.teacher import Teacher
 from app.models.subject import Subject
 from app.models.class_ import Class
+from app.models.teacher_junction import teacher_class, teacher_subject
 from app import db
+from app.database import read_only, commit_or_flush
+from app.cache import invalidate
 from werkzeug.security import generate_password_hash
-from typing import Optional, List
+from sqlalchemy import select, insert, delete, tuple_
+from typing import Optional, List, Dict, Iterable
 
 def create_teacher(username: str, 
                    password: str, # Plain password
@@ -15,8 +19,8 @@ def create_teacher(username: str,
                    phone_number: str,
                    subjects_ids: List[int] = None, # Changed from subjects to subjects_ids
                    classes_ids: List[int] = None,  # Changed from classes to classes_ids
-                   activated: bool = True
-                   ) -> Optional[Teacher]:
+                   activated: bool = True,
+                   commit: bool = True) -> Optional[Teacher]:
     """
     Create a new teacher.
     
@@ -31,6 +35,7 @@ def create_teacher(username: str,
         subjects_ids: Optional list of Subject IDs to associate with the teacher
         classes_ids: Optional list of Class IDs to associate with the teacher
         activated: Activation status for the user
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         The newly created Teacher object or None if user creation failed
@@ -44,12 +49,12 @@ def create_teacher(username: str,
         first_name=first_name,
         last_name=last_name,
         birth_date=birth_date,
-        phone_number=phone_number
+        phone_number=phone_number,
+        activated=activated,
+        commit=False # Flushed, so new_user.id is set
     )
     if not new_user:
         return None
-    
-    new_user.activated = activated # Set activation status for user
 
     # Create a new teacher record
     new_teacher = Teacher(id=new_user.id) # Link by user_id
@@ -65,7 +70,7 @@ def create_teacher(username: str,
         teacher_classes = Class.query.filter(Class.id.in_(classes_ids)).all()
         new_teacher.classes = teacher_classes
         
-    db.session.commit() # Commit once after all associations
+    commit_or_flush(commit) # Commit once: user, teacher and all associations
     return new_teacher
 
 def update_teacher(
@@ -79,7 +84,8 @@ def update_teacher(
     phone_number: str = None,
     activated: bool = None,
     subjects_id: List[int] = None,
-    classes_id: List[int] = None
+    classes_id: List[int] = None,
+    commit: bool = True
 ) -> Optional[Teacher]:
     """
     Update teacher information.
@@ -96,6 +102,7 @@ def update_teacher(
         activated: New activation status
         subjects_id: List of subject IDs to assign
         classes_id: List of class IDs to assign
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Teacher object if found, None otherwise
@@ -127,26 +134,23 @@ def update_teacher(
     if password:
         user.password = generate_password_hash(password)
 
-    # Update subjects if provided
+    # Only the junction rows that change are written
     if subjects_id is not None:
-        teacher_subjects = Subject.query.filter(Subject.id.in_(subjects_id)).all()
-        teacher.subjects = teacher_subjects
-
-    # Update classes if provided
+        sync_teacher_subjects({teacher_id: subjects_id}, commit=False)
     if classes_id is not None:
-        teacher_classes = Class.query.filter(Class.id.in_(classes_id)).all()
-        teacher.classes = teacher_classes
+        sync_teacher_classes({teacher_id: classes_id}, commit=False)
             
-    db.session.commit()
+    commit_or_flush(commit)
     return teacher
 
-def add_subject_to_teacher(teacher_id: int, subject) -> Optional[Teacher]:
+def add_subject_to_teacher(teacher_id: int, subject, commit: bool = True) -> Optional[Teacher]:
     """
     Add a subject to a teacher.
     
     Args:
         teacher_id: ID of the teacher
         subject: Subject object to add
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Teacher object if found, None otherwise
@@ -156,16 +160,17 @@ def add_subject_to_teacher(teacher_id: int, subject) -> Optional[Teacher]:
         return teacher
     
     teacher.subjects.append(subject)
-    db.session.commit()
+    commit_or_flush(commit)
     return teacher
 
-def remove_subject_from_teacher(teacher_id: int, subject) -> Optional[Teacher]:
+def remove_subject_from_teacher(teacher_id: int, subject, commit: bool = True) -> Optional[Teacher]:
     """
     Remove a subject from a teacher.
     
     Args:
         teacher_id: ID of the teacher
         subject: Subject object to remove
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Teacher object if found, None otherwise
@@ -175,16 +180,17 @@ def remove_subject_from_teacher(teacher_id: int, subject) -> Optional[Teacher]:
         return teacher
     
     teacher.subjects.remove(subject)
-    db.session.commit()
+    commit_or_flush(commit)
     return teacher
 
-def add_class_to_teacher(teacher_id: int, class_obj) -> Optional[Teacher]:
+def add_class_to_teacher(teacher_id: int, class_obj, commit: bool = True) -> Optional[Teacher]:
     """
     Add a class to a teacher.
     
     Args:
         teacher_id: ID of the teacher
         class_obj: Class object to add
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Teacher object if found, None otherwise
@@ -194,16 +200,17 @@ def add_class_to_teacher(teacher_id: int, class_obj) -> Optional[Teacher]:
         return teacher
     
     teacher.classes.append(class_obj)
-    db.session.commit()
+    commit_or_flush(commit)
     return teacher
 
-def remove_class_from_teacher(teacher_id: int, class_obj) -> Optional[Teacher]:
+def remove_class_from_teacher(teacher_id: int, class_obj, commit: bool = True) -> Optional[Teacher]:
     """
     Remove a class from a teacher.
     
     Args:
         teacher_id: ID of the teacher
         class_obj: Class object to remove
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         Updated Teacher object if found, None otherwise
@@ -213,9 +220,10 @@ def remove_class_from_teacher(teacher_id: int, class_obj) -> Optional[Teacher]:
         return teacher
     
     teacher.classes.remove(class_obj)
-    db.session.commit()
+    commit_or_flush(commit)
     return teacher
 
+@read_only
 def get_teachers_by_subject(subject) -> List[Teacher]:
     """
     Get all teachers associated with a specific subject.
@@ -226,4 +234,94 @@ def get_teachers_by_subject(subject) -> List[Teacher]:
     Returns:
         List of Teacher objects associated with the subject
     """
-    return Teacher.query.filter(Teacher.subjects.contains(subject)).all()
\ No newline at end of file
+    return Teacher.query.filter(Teacher.subjects.contains(subject)).all()
+
+# ===========================
+# ASSIGNMENT SYNC
+# ===========================
+
+def _sync_junction(table, other_model, assignments: Dict[int, Iterable[int]], commit: bool) -> Dict[str, int]:
+    """
+    Make the teacher_class or teacher_subject rows of the given teachers
+    match `assignments`, with id-only queries: one SELECT of the current
+    pairs, then one DELETE and one INSERT for the pairs that differ.
+    """
+    other_column = table.c.class_id if other_model is Class else table.c.subject_id
+    teacher_ids = set(db.session.execute(
+        select(Teacher.id).where(Teacher.id.in_(list(assignments)))).scalars())
+    wanted_ids = {other_id for other_ids in assignments.values() for other_id in other_ids}
+    known_ids = set(db.session.execute(
+        select(other_model.id).where(other_model.id.in_(wanted_ids))).scalars()) if wanted_ids else set()
+    wanted = {(teacher_id, other_id) for teacher_id, other_ids in assignments.items() if teacher_id in teacher_ids
+              for other_id in other_ids if other_id in known_ids}
+    current = {tuple(row) for row in db.session.execute(
+        select(table.c.teacher_id, other_column).where(table.c.teacher_id.in_(teacher_ids)))}
+
+    removed, added = current - wanted, wanted - current
+    if not removed and not added:
+        return {"added": 0, "removed": 0}
+    db.session.flush()  # pending ORM changes to these collections go first
+    if removed:
+        db.session.execute(delete(table).where(tuple_(table.c.teacher_id, other_column).in_(removed)))
+    if added:
+        db.session.execute(insert(table), [{"teacher_id": teacher_id, other_column.name: other_id}
+                                           for teacher_id, other_id in added])
+
+    # Loaded collections and cached entries of the touched rows are now stale
+    changed = removed | added
+    touched_teachers = {teacher_id for teacher_id, _ in changed}
+    touched_others = {other_id for _, other_id in changed}
+    for instance in list(db.session.identity_map.values()):
+        if isinstance(instance, Teacher) and instance.id in touched_teachers:
+            db.session.expire(instance, ["classes" if other_model is Class else "subjects"])
+        elif isinstance(instance, other_model) and instance.id in touched_others:
+            db.session.expire(instance, ["teachers"])
+    for teacher_id in touched_teachers:
+        invalidate(Teacher.__tablename__, teacher_id)
+    for other_id in touched_others:
+        invalidate(other_model.__tablename__, other_id)
+    commit_or_flush(commit)
+    return {"added": len(added), "removed": len(removed)}
+
+def sync_teacher_classes(assignments: Dict[int, Iterable[int]], commit: bool = True) -> Dict[str, int]:
+    """
+    Set the classes of several teachers at once, writing only what changed.
+
+    Args:
+        assignments: Dict of teacher id -> the class ids they should have
+            (teachers left out are not touched; unknown ids are ignored)
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Dict with the number of assignments `added` and `removed`
+    """
+    return _sync_junction(teacher_class, Class, assignments, commit)
+
+def sync_teacher_subjects(assignments: Dict[int, Iterable[int]], commit: bool = True) -> Dict[str, int]:
+    """
+    Set the subjects of several teachers at once, writing only what changed.
+
+    Args:
+        assignments: Dict of teacher id -> the subject ids they should have
+            (teachers left out are not touched; unknown ids are ignored)
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Dict with the number of assignments `added` and `removed`
+    """
+    return _sync_junction(teacher_subject, Subject, assignments, commit)
+
+@read_only
+def get_teacher_assignments() -> Dict[str, Dict[int, List[int]]]:
+    """
+    Get the class and subject ids of every teacher, from the junction tables only.
+
+    Returns:
+        Dict with `classes` and `subjects`, each a dict of teacher id -> ids
+    """
+    assignments: Dict[str, Dict[int, List[int]]] = {"classes": {}, "subjects": {}}
+    for key, table, column in (("classes", teacher_class, teacher_class.c.class_id),
+                               ("subjects", teacher_subject, teacher_subject.c.subject_id)):
+        for teacher_id, other_id in db.session.execute(select(table.c.teacher_id, column)):
+            assignments[key].setdefault(teacher_id, []).append(other_id)
+    return assignments
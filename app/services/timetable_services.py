@@ -0,0 +1,275 @@
+from app.models.room import Room
+from app.models.period import Period
+from app.models.timetable_entry import TimetableEntry
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.models.user import User
+from app.models.teacher_junction import teacher_subject, teacher_class
+from app import db
+from app.database import read_only, commit_or_flush
+from app.cache import invalidate
+from app.jobs import task
+from app.timetable import Lesson, Slot, solve
+from flask import current_app
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import joinedload
+
+DEFAULT_TIME_LIMIT = 20
+
+# ===========================
+# ROOMS AND PERIODS
+# ===========================
+
+def create_room(name: str, commit: bool = True) -> Optional[Room]:
+    """
+    Create a new room.
+
+    Args:
+        name: Name of the room (e.g. "B12")
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Created Room object if successful, None if the name is empty or taken
+    """
+    if not name or Room.query.filter_by(name=name).first():
+        return None
+    room = Room(name=name)
+    db.session.add(room)
+    commit_or_flush(commit)
+    return room
+
+def delete_room(room_id: int, commit: bool = True) -> bool:
+    """
+    Delete a room and its lessons from the timetable (re-solve afterwards).
+
+    Args:
+        room_id: ID of the room
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        True if successful, False otherwise
+    """
+    room = db.session.get(Room, room_id)
+    if not room:
+        return False
+    TimetableEntry.query.filter_by(room_id=room_id).delete(synchronize_session=False)
+    invalidate(TimetableEntry.__tablename__)
+    db.session.delete(room)
+    commit_or_flush(commit)
+    return True
+
+@read_only
+def get_all_rooms() -> List[Room]:
+    """Get all rooms, by name."""
+    return Room.query.order_by(Room.name).all()
+
+@read_only
+def get_all_periods() -> List[Period]:
+    """Get the periods of the week, in order."""
+    return Period.query.order_by(Period.day, Period.slot).all()
+
+def create_week(days: int = 5, slots_per_day: int = 8, start_time: str = "08:00", minutes: int = 55,
+                break_minutes: int = 5, commit: bool = True) -> int:
+    """
+    Create the periods of a regular week; existing (day, slot) periods are kept.
+
+    Args:
+        days: Number of school days, from Monday
+        slots_per_day: Periods per day
+        start_time: Start of the first period ("HH:MM")
+        minutes: Length of a period
+        break_minutes: Time between two periods
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Number of created periods
+    """
+    existing = set(db.session.execute(select(Period.day, Period.slot)).all())
+    first = datetime.strptime(start_time, "%H:%M")
+    created = 0
+    for day in range(days):
+        for slot in range(1, slots_per_day + 1):
+            if (day, slot) in existing:
+                continue
+            start = first + timedelta(minutes=(slot - 1) * (minutes + break_minutes))
+            db.session.add(Period(day=day, slot=slot, start_time=start.strftime("%H:%M"),
+                                  end_time=(start + timedelta(minutes=minutes)).strftime("%H:%M")))
+            created += 1
+    commit_or_flush(commit)
+    return created
+
+# ===========================
+# SOLVING
+# ===========================
+
+def _current_entries() -> Dict[Tuple[int, int, int], Any]:
+    """(class id, subject id, lesson number) -> row of the stored timetable."""
+    rows = db.session.execute(select(TimetableEntry.class_id, TimetableEntry.subject_id, TimetableEntry.lesson_number,
+                                     TimetableEntry.teacher_id, TimetableEntry.period_id, TimetableEntry.room_id)).all()
+    return {(row.class_id, row.subject_id, row.lesson_number): row for row in rows}
+
+def build_lessons(current: Optional[Dict[Tuple[int, int, int], Any]] = None) -> List[Lesson]:
+    """
+    Derive the week's lessons from the teacher_class and teacher_subject
+    tables: a class has every subject that one of its teachers teaches,
+    `Subject.weekly_periods` times a week, taught by one of them. The teacher
+    of the current timetable is kept if still possible; otherwise the least
+    loaded candidate gets it.
+
+    Args:
+        current: The stored timetable (see _current_entries), to keep its teachers
+
+    Returns:
+        List of Lesson objects
+    """
+    if current is None:
+        current = _current_entries()
+    active = select(Teacher.id).join(User, User.id == Teacher.id).where(User.activated.is_(True))
+    subjects_of: Dict[int, List[int]] = {}
+    for teacher_id, subject_id in db.session.execute(
+            select(teacher_subject.c.teacher_id, teacher_subject.c.subject_id)
+            .where(teacher_subject.c.teacher_id.in_(active))):
+        subjects_of.setdefault(teacher_id, []).append(subject_id)
+    teachers_of: Dict[int, List[int]] = {}
+    for teacher_id, class_id in db.session.execute(
+            select(teacher_class.c.teacher_id, teacher_class.c.class_id)
+            .where(teacher_class.c.teacher_id.in_(active))):
+        teachers_of.setdefault(class_id, []).append(teacher_id)
+    weekly = dict(db.session.execute(select(Subject.id, Subject.weekly_periods)).all())
+    previous_teacher = {(class_id, subject_id): row.teacher_id
+                        for (class_id, subject_id, _), row in current.items()}
+
+    candidates: Dict[Tuple[int, int], List[int]] = {}
+    for class_id in sorted(teachers_of):
+        for teacher_id in sorted(teachers_of[class_id]):
+            for subject_id in subjects_of.get(teacher_id, ()):
+                candidates.setdefault((class_id, subject_id), []).append(teacher_id)
+
+    load: Dict[int, int] = {}
+    chosen: Dict[Tuple[int, int], int] = {}
+    # Kept teachers first, so that the load of the others accounts for them
+    for pair, teachers in candidates.items():
+        if previous_teacher.get(pair) in teachers:
+            chosen[pair] = previous_teacher[pair]
+            load[chosen[pair]] = load.get(chosen[pair], 0) + weekly.get(pair[1], 0)
+    for pair, teachers in candidates.items():
+        if pair not in chosen:
+            chosen[pair] = min(teachers, key=lambda teacher_id: (load.get(teacher_id, 0), teacher_id))
+            load[chosen[pair]] = load.get(chosen[pair], 0) + weekly.get(pair[1], 0)
+
+    return [Lesson(class_id, subject_id, teacher_id, number)
+            for (class_id, subject_id), teacher_id in sorted(chosen.items())
+            for number in range(weekly.get(subject_id, 0))]
+
+@task('timetable.solve')
+def solve_timetable(full: bool = False, time_limit: Optional[float] = None, seed: int = 0,
+                    commit: bool = True) -> Dict[str, Any]:
+    """
+    Compute the weekly timetable and store it (only if it is conflict-free).
+
+    By default the stored timetable is the starting point: lessons keep
+    their period and room when they still fit, so a changed assignment only
+    moves the lessons it has to.
+
+    Args:
+        full: Start from scratch instead of the stored timetable
+        time_limit: Seconds the search may take (default TIMETABLE_TIME_LIMIT, 20)
+        seed: Random seed
+        commit: Commit right away (False: the caller commits, see transaction())
+
+    Returns:
+        Dict with the number of `lessons`, `conflicts`, `moved` lessons,
+        `seconds`, and whether the result was `saved`
+    """
+    current = _current_entries()
+    lessons = build_lessons(current)
+    slots = [Slot(period_id, day) for period_id, day in
+             db.session.execute(select(Period.id, Period.day).order_by(Period.day, Period.slot)).all()]
+    room_ids = list(db.session.execute(select(Room.id).order_by(Room.name)).scalars())
+    stats = {"lessons": len(lessons), "periods": len(slots), "rooms": len(room_ids)}
+    if not slots or not room_ids:
+        return dict(stats, conflicts=len(lessons), moved=0, seconds=0.0, saved=False)
+
+    result = solve(lessons, slots, room_ids,
+                   previous=None if full else {key: row.period_id for key, row in current.items()},
+                   previous_rooms=None if full else {key: row.room_id for key, row in current.items()},
+                   time_limit=time_limit or current_app.config.get('TIMETABLE_TIME_LIMIT', DEFAULT_TIME_LIMIT),
+                   seed=seed)
+    stats.update(conflicts=result.conflicts, moved=result.moved, seconds=round(result.seconds, 3),
+                 iterations=result.iterations, saved=False)
+    if result.conflicts:
+        current_app.logger.warning("Timetable: %s lessons still clash, not saved", result.conflicts)
+        return stats
+
+    # Replaced as a whole: one DELETE and one multi-row INSERT
+    db.session.execute(delete(TimetableEntry))
+    if lessons:
+        db.session.execute(insert(TimetableEntry), [
+            {"class_id": lesson.class_id, "subject_id": lesson.subject_id, "teacher_id": lesson.teacher_id,
+             "lesson_number": lesson.number, "period_id": result.assignment[lesson.key],
+             "room_id": result.rooms[lesson.key]}
+            for lesson in lessons
+        ])
+    invalidate(TimetableEntry.__tablename__)
+    commit_or_flush(commit)
+    stats["saved"] = True
+    return stats
+
+def get_timetable_changes() -> Dict[str, int]:
+    """
+    Compare the stored timetable with the current teacher/class/subject
+    assignments.
+
+    Returns:
+        Dict with the number of lessons to `add`, to `remove`, and whose
+        `teacher` changed; all 0 when the timetable is up to date
+    """
+    current = _current_entries()
+    lessons = {lesson.key: lesson for lesson in build_lessons(current)}
+    return {
+        "add": sum(1 for key in lessons if key not in current),
+        "remove": sum(1 for key in current if key not in lessons),
+        "teacher": sum(1 for key, lesson in lessons.items()
+                       if key in current and current[key].teacher_id != lesson.teacher_id),
+    }
+
+# ===========================
+# READING
+# ===========================
+
+def _grid(query) -> Dict[Tuple[int, int], TimetableEntry]:
+    entries = query.options(joinedload(TimetableEntry.subject),
+                            joinedload(TimetableEntry.room),
+                            joinedload(TimetableEntry.class_),
+                            joinedload(TimetableEntry.teacher).joinedload(Teacher.user)
+                            .load_only(User.username, User.first_name, User.last_name),
+                            joinedload(TimetableEntry.period)).all()
+    return {(entry.period.day, entry.period.slot): entry for entry in entries}
+
+@read_only
+def get_class_timetable(class_id: int) -> Dict[Tuple[int, int], TimetableEntry]:
+    """
+    Get the week of a class.
+
+    Args:
+        class_id: ID of the class
+
+    Returns:
+        Dict of (day, slot) -> TimetableEntry
+    """
+    return _grid(TimetableEntry.query.filter_by(class_id=class_id))
+
+@read_only
+def get_teacher_timetable(teacher_id: int) -> Dict[Tuple[int, int], TimetableEntry]:
+    """
+    Get the week of a teacher.
+
+    Args:
+        teacher_id: ID of the teacher
+
+    Returns:
+        Dict of (day, slot) -> TimetableEntry
+    """
+    return _grid(TimetableEntry.query.filter_by(teacher_id=teacher_id))
@@ -3,12 +3,15 @@ from app.models.student import Student
 from app.models.teacher import Teacher
 from app.models.writer import Writer
 from app import db
+from app.database import read_only, commit_or_flush
+from app.cache import cached
 from werkzeug.security import generate_password_hash
 from typing import Optional, List
 from datetime import datetime, timedelta
 import secrets
 from app.utils import format_date, format_date_to_obj
 
+@read_only
 def get_all_users(role : Optional[str] = None) -> List[User]:
     """Get all users.
     Attributes:
@@ -20,6 +23,7 @@ def get_all_users(role : Optional[str] = None) -> List[User]:
         return User.query.filter_by(role=role).all()
     return User.query.all()
 
+@cached("user:{user_id}")
 def get_user_by_id(user_id: int) -> Optional[User]:
     """Get a user by their ID."""
     return User.query.get(user_id)
@@ -28,6 +32,7 @@ def get_student_by_id(student_id: int) -> Optional[Student]:
     """Get a student by their ID."""
     return Student.query.get(student_id)
 
+@cached("teachers:{teacher_id}")
 def get_teacher_by_id(teacher_id: int) -> Optional[Teacher]:
     """Get a teacher by their ID."""
     return Teacher.query.get(teacher_id)
@@ -44,22 +49,35 @@ def get_user_by_username(username: str) -> Optional[User]:
     """Get a user by their username."""
     return User.query.filter_by(username=username).first()
 
+@read_only
 def get_users_by_role(role: str) -> List[User]:
     """Get all users with a specific role."""
     return User.query.filter_by(role=role).all()
 
-def delete_user(user_id: int) -> bool:
+def get_unverified_users(role: Optional[str] = None) -> List[User]:
+    """Get the activated users with an email address that is not verified yet.
+    Attributes:
+        role (str): OPTIONAL - Only users with this role.
+    """
+    query = User.query.filter(User.email.isnot(None), User.email != '',
+                              User.email_verified.isnot(True), User.activated.is_(True))
+    if role:
+        query = query.filter_by(role=role)
+    return query.order_by(User.id).all()
+
+def delete_user(user_id: int, commit: bool = True) -> bool:
     """Soft delete a user by setting activated to False."""
     get_user_by_id(user_id=user_id).activated = False
-    db.session.commit()
+    commit_or_flush(commit)
     return True
 
-def generate_email_verification_token(user: User, expiry_hours: int = 24) -> str:
+def generate_email_verification_token(user: User, expiry_hours: int = 24, commit: bool = True) -> str:
     """Generate an email verification token for a user.
     
     Args:
         user: The user to generate a token for
         expiry_hours: Number of hours until token expires
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         The generated token
@@ -67,14 +85,15 @@ def generate_email_verification_token(user: User, expiry_hours: int = 24) -> str
     token = secrets.token_urlsafe(32)  # Generate a secure random token
     user.email_verification_token = token
     user.email_verification_expiry = datetime.utcnow() + timedelta(hours=expiry_hours)
-    db.session.commit()
+    commit_or_flush(commit)
     return token
 
-def verify_email(token: str) -> Optional[User]:
+def verify_email(token: str, commit: bool = True) -> Optional[User]:
     """Verify a user's email using a token.
     
     Args:
         token: The verification token
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         The user if verification was successful, None otherwise
@@ -92,15 +111,16 @@ def verify_email(token: str) -> Optional[User]:
     user.email_verified = True
     user.email_verification_token = None  # Clear the token
     user.email_verification_expiry = None  # Clear the expiry date
-    db.session.commit()
+    commit_or_flush(commit)
     return user
 
-def generate_password_reset_token(user: User, expiry_hours: int = 1) -> str:
+def generate_password_reset_token(user: User, expiry_hours: int = 1, commit: bool = True) -> str:
     """Generate a password reset token for a user.
     
     Args:
         user: The user to generate a token for
         expiry_hours: Number of hours until token expires
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         The generated token
@@ -108,15 +128,16 @@ def generate_password_reset_token(user: User, expiry_hours: int = 1) -> str:
     token = secrets.token_urlsafe(32)  # Generate a secure random token
     user.password_reset_token = token
     user.password_reset_expiry = datetime.utcnow() + timedelta(hours=expiry_hours)
-    db.session.commit()
+    commit_or_flush(commit)
     return token
 
-def reset_password(token: str, new_password: str) -> Optional[User]:
+def reset_password(token: str, new_password: str, commit: bool = True) -> Optional[User]:
     """Reset a user's password using a token.
     
     Args:
         token: The password reset token
         new_password: The new password to set
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         The user if reset was successful, None otherwise
@@ -134,20 +155,21 @@ def reset_password(token: str, new_password: str) -> Optional[User]:
     user.password = generate_password_hash(new_password)
     user.password_reset_token = None  # Clear the token
     user.password_reset_expiry = None  # Clear the expiry date
-    db.session.commit()
+    commit_or_flush(commit)
     return user
 
-def activate_user(user: User) -> bool:
+def activate_user(user: User, commit: bool = True) -> bool:
     """Activate a user account.
     
     Args:
         user: The user to activate
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         True if successful
     """
     user.activated = True
-    db.session.commit()
+    commit_or_flush(commit)
     return True
 
 def is_account_active(user: User) -> bool:
@@ -163,7 +185,7 @@ def is_account_active(user: User) -> bool:
 
 def create_user(username: str, password: str, role: str, email: Optional[str] = None, 
                 first_name: Optional[str] = None, last_name: Optional[str] = None, birth_date: Optional[str] = None, 
-                phone_number: Optional[str] = None) -> User:
+                phone_number: Optional[str] = None, activated: bool = True, commit: bool = True) -> User:
     """Create a new user.
     
     Args:
@@ -175,6 +197,9 @@ def create_user(username: str, password: str, role: str, email: Optional[str] =
         last_name: The last name of the new user
         birth_date: The birth date of the new user (in 'YYYY-MM-DD' format)
         phone_number: The phone number of the new user (optional)
+        activated: Whether the account is active (default True)
+        commit: Commit right away (False: the caller commits, see transaction());
+            the user is flushed either way, so `user.id` is set
         
     Returns:
         The newly created user
@@ -195,19 +220,20 @@ def create_user(username: str, password: str, role: str, email: Optional[str] =
         email_verification_expiry=None,
         password_reset_token=None,
         password_reset_expiry=None,
-        activated=True  # Activate by default, can be changed as needed
+        activated=activated
     )
     
     db.session.add(user)
-    db.session.commit()
+    commit_or_flush(commit)
     return user
 
-def set_user_pfp(user_id: int, pfp_filename: str) -> bool:
+def set_user_pfp(user_id: int, pfp_filename: str, commit: bool = True) -> bool:
     """Set the profile picture filename for a user.
     
     Args:
         user_id: The ID of the user
         pfp_filename: The filename of the profile picture
+        commit: Commit right away (False: the caller commits, see transaction())
         
     Returns:
         True if successful
@@ -217,5 +243,5 @@ def set_user_pfp(user_id: int, pfp_filename: str) -> bool:
         return False
     
     user.profile_picture_filename = pfp_filename
-    db.session.commit()
+    commit_or_flush(commit)
     return True
\ No newline at end of file
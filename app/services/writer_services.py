@@ -2,6 +2,7 @@ from app.models.writer import Writer
 from app.models.article import Article
 from app.services.user_services import create_user
 from app import db
+from app.database import read_only, commit_or_flush
 from typing import Optional, List
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.utils import format_date, format_date_to_obj
@@ -12,8 +13,10 @@ def create_writer(username: Optional[str] = None,
                   first_name: Optional[str] = None, 
                   last_name: Optional[str] = None, 
                   birth_date: Optional[str] = None,
-                  phone_number: Optional[str] = None) -> Writer:
-    """Create a new writer."""
+                  phone_number: Optional[str] = None,
+                  commit: bool = True) -> Writer:
+    """Create a new writer (user and writer rows, one commit).
+    Pass commit=False to let the caller commit, see transaction()."""
     new_user = create_user(
         username=username,
         password=password, # Pass as plain text, will be hashed in user_services
@@ -22,17 +25,16 @@ def create_writer(username: Optional[str] = None,
         first_name=first_name,
         last_name=last_name,
         birth_date=birth_date,  # LEAVE AS STRING, CONVERT IN USER SERVICES
-        phone_number=phone_number
+        phone_number=phone_number,
+        commit=False
     )
-    db.session.add(new_user)
-    db.session.commit()
 
     # Create a new writer record
     new_writer = Writer(
         user=new_user
     )
     db.session.add(new_writer)
-    db.session.commit()
+    commit_or_flush(commit)
     return new_writer
 
 def update_writer(writer_id: int,
@@ -42,9 +44,11 @@ def update_writer(writer_id: int,
                      first_name: Optional[str] = None, 
                      last_name: Optional[str] = None, 
                      birth_date: Optional[str] = None,
-                     phone_number: Optional[str] = None) -> Writer:
+                     phone_number: Optional[str] = None,
+                     commit: bool = True) -> Writer:
      """Update a writer's information.
      All parameters are optional. Birth date should be in the format 'YYYY-MM-DD'.
+     Pass commit=False to let the caller commit, see transaction().
      """
      writer = Writer.query.get(writer_id)
      if not writer:
@@ -65,9 +69,10 @@ def update_writer(writer_id: int,
      if phone_number:
           writer.user.phone_number = phone_number
     
-     db.session.commit()
+     commit_or_flush(commit)
      return writer
 
+@read_only
 def get_all_authored_articles(writer_id: int) -> List[Article]:
     """Get all articles authored by a specific writer."""
     writer = Writer.query.get(writer_id)
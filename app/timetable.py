@@ -0,0 +1,324 @@
+from flask import Flask
+from flask.cli import AppGroup
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import click
+import random
+import time
+
+# Weekly timetable solver.
+#
+# A lesson is one period of a subject taught to a class by a teacher. The
+# solver gives every lesson a period such that no teacher and no class has two
+# lessons at once and no period has more lessons than there are rooms; rooms
+# are then handed out per period. It works in two phases:
+#
+#   1. Construction with constraint propagation. The free periods of every
+#      teacher and class are bitsets, so the periods still open to a lesson
+#      are `~teacher_busy & ~class_busy & rooms_left`. The lesson with the
+#      fewest open periods is placed next (its group of identical lessons, in
+#      fact), in the open period that best spreads the subject over the week.
+#   2. Local search, if construction got stuck: the stuck lessons are placed
+#      anyway, and conflicted lessons are moved to their least-conflicted
+#      period (min-conflicts) with a tabu list against cycling, until no
+#      conflict is left or the time is up.
+#
+# Given a previous timetable, lessons keep their period when they still fit,
+# and the search prefers moving new lessons over old ones: changing one
+# assignment moves a handful of lessons, not the whole school.
+#
+# This module only knows ids; reading the lessons from the database and
+# storing the result is done by timetable_services.solve_timetable.
+
+# Soft costs, used to choose among conflict-free periods.
+SAME_SUBJECT_SAME_DAY = 10
+BUSY_DAY = 1
+TABU_TENURE = 10
+
+LessonKey = Tuple[int, int, int]  # (class id, subject id, n-th lesson of that subject in the week)
+
+@dataclass(frozen=True)
+class Lesson:
+    class_id: int
+    subject_id: int
+    teacher_id: int
+    number: int
+
+    @property
+    def key(self) -> LessonKey:
+        return (self.class_id, self.subject_id, self.number)
+
+@dataclass
+class Slot:
+    period_id: int
+    day: int
+
+@dataclass
+class SolveResult:
+    assignment: Dict[LessonKey, int]         # lesson key -> period id
+    rooms: Dict[LessonKey, int]              # lesson key -> room id
+    conflicts: int                           # lessons still clashing (0: valid timetable)
+    moved: int                               # lessons placed in another period than before
+    seconds: float
+    iterations: int
+    stats: Dict[str, int] = field(default_factory=dict)
+
+def _bits(mask: int) -> List[int]:
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+class _State:
+    """Occupation counters of a (partial) timetable, by index."""
+
+    def __init__(self, lessons: Sequence[Lesson], slots: Sequence[Slot], room_count: int):
+        self.lessons = lessons
+        self.slots = slots
+        self.rooms = room_count
+        self.teacher_index = {t: i for i, t in enumerate(sorted({lesson.teacher_id for lesson in lessons}))}
+        self.class_index = {c: i for i, c in enumerate(sorted({lesson.class_id for lesson in lessons}))}
+        self.teacher_of = [self.teacher_index[lesson.teacher_id] for lesson in lessons]
+        self.class_of = [self.class_index[lesson.class_id] for lesson in lessons]
+        self.day_of = [slot.day for slot in slots]
+        self.days = sorted(set(self.day_of))
+        self.teacher_at = [[0] * len(slots) for _ in self.teacher_index]
+        self.class_at = [[0] * len(slots) for _ in self.class_index]
+        self.load = [0] * len(slots)
+        self.teacher_busy = [0] * len(self.teacher_index)  # bitsets of periods with >= 1 lesson
+        self.class_busy = [0] * len(self.class_index)
+        self.full = 0                                       # bitset of periods without a free room
+        # (class, subject) -> lessons per day, for the soft cost
+        self.subject_day: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self.class_day = [dict.fromkeys(self.days, 0) for _ in self.class_index]
+        self.period_of: List[Optional[int]] = [None] * len(lessons)
+        self.at_period: List[set] = [set() for _ in slots]
+
+    def place(self, i: int, p: int) -> None:
+        t, c, d = self.teacher_of[i], self.class_of[i], self.day_of[p]
+        self.period_of[i] = p
+        self.at_period[p].add(i)
+        self.teacher_at[t][p] += 1
+        self.class_at[c][p] += 1
+        self.load[p] += 1
+        self.teacher_busy[t] |= 1 << p
+        self.class_busy[c] |= 1 << p
+        if self.load[p] >= self.rooms:
+            self.full |= 1 << p
+        days = self.subject_day.setdefault((c, self.lessons[i].subject_id), {})
+        days[d] = days.get(d, 0) + 1
+        self.class_day[c][d] += 1
+
+    def remove(self, i: int) -> int:
+        p = self.period_of[i]
+        t, c, d = self.teacher_of[i], self.class_of[i], self.day_of[p]
+        self.period_of[i] = None
+        self.at_period[p].discard(i)
+        self.teacher_at[t][p] -= 1
+        self.class_at[c][p] -= 1
+        self.load[p] -= 1
+        if not self.teacher_at[t][p]:
+            self.teacher_busy[t] &= ~(1 << p)
+        if not self.class_at[c][p]:
+            self.class_busy[c] &= ~(1 << p)
+        if self.load[p] < self.rooms:
+            self.full &= ~(1 << p)
+        self.subject_day[(c, self.lessons[i].subject_id)][d] -= 1
+        self.class_day[c][d] -= 1
+        return p
+
+    def open_periods(self, i: int, all_periods: int) -> int:
+        return all_periods & ~self.teacher_busy[self.teacher_of[i]] & ~self.class_busy[self.class_of[i]] & ~self.full
+
+    def soft_cost(self, i: int, p: int) -> int:
+        c, d = self.class_of[i], self.day_of[p]
+        same = self.subject_day.get((c, self.lessons[i].subject_id), {}).get(d, 0)
+        return same * SAME_SUBJECT_SAME_DAY + self.class_day[c][d] * BUSY_DAY
+
+    def hard_cost(self, i: int, p: int) -> int:
+        """Clashes lesson i would be part of at period p (not counting itself)."""
+        own = 1 if self.period_of[i] == p else 0
+        return ((self.teacher_at[self.teacher_of[i]][p] - own)
+                + (self.class_at[self.class_of[i]][p] - own)
+                + (1 if self.load[p] - own >= self.rooms else 0))
+
+    def is_conflicted(self, i: int) -> bool:
+        p = self.period_of[i]
+        return (self.teacher_at[self.teacher_of[i]][p] > 1 or self.class_at[self.class_of[i]][p] > 1
+                or self.load[p] > self.rooms)
+
+def solve(lessons: Sequence[Lesson],
+          slots: Sequence[Slot],
+          room_ids: Sequence[int],
+          previous: Optional[Dict[LessonKey, int]] = None,
+          previous_rooms: Optional[Dict[LessonKey, int]] = None,
+          time_limit: float = 20.0,
+          seed: int = 0) -> SolveResult:
+    """
+    Build a weekly timetable.
+
+    Args:
+        lessons: The lessons to place
+        slots: The periods of the week
+        room_ids: The rooms (interchangeable)
+        previous: Period of each lesson in the current timetable, kept where possible
+        previous_rooms: Room of each lesson in the current timetable, kept where possible
+        time_limit: Seconds before the search gives up
+        seed: Random seed (same inputs and seed, same timetable)
+
+    Returns:
+        SolveResult; `conflicts` is 0 for a valid timetable
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    previous = previous or {}
+    state = _State(lessons, slots, len(room_ids))
+    period_index = {slot.period_id: p for p, slot in enumerate(slots)}
+    all_periods = (1 << len(slots)) - 1
+    stats = {"kept": 0, "constructed": 0, "forced": 0}
+
+    # Lessons already in the timetable stay where they are, if they still fit.
+    preferred = [period_index.get(previous.get(lesson.key)) for lesson in lessons]
+    unplaced = []
+    for i, p in enumerate(preferred):
+        if p is not None and state.open_periods(i, all_periods) >> p & 1:
+            state.place(i, p)
+            stats["kept"] += 1
+        else:
+            unplaced.append(i)
+
+    # Phase 1: most constrained first. Lessons of the same class, subject and
+    # teacher have the same open periods, so they are handled as one group.
+    groups: Dict[Tuple[int, int, int], List[int]] = {}
+    for i in unplaced:
+        lesson = lessons[i]
+        groups.setdefault((lesson.class_id, lesson.subject_id, lesson.teacher_id), []).append(i)
+    pending = list(groups.values())
+    forced = []
+    while pending:
+        best = min(range(len(pending)), key=lambda g: (state.open_periods(pending[g][0], all_periods).bit_count()
+                                                       - len(pending[g])))
+        group = pending[best]
+        i = group.pop()
+        if not group:
+            pending[best] = pending[-1]
+            pending.pop()
+        candidates = _bits(state.open_periods(i, all_periods))
+        if candidates:
+            costs = [(state.soft_cost(i, p), rng.random(), p) for p in candidates]
+            state.place(i, min(costs)[2])
+            stats["constructed"] += 1
+        else:
+            forced.append(i)
+
+    # Stuck lessons go where they clash least; phase 2 sorts it out.
+    for i in forced:
+        costs = [(state.hard_cost(i, p), state.soft_cost(i, p), rng.random(), p) for p in range(len(slots))]
+        state.place(i, min(costs)[3])
+        stats["forced"] += 1
+
+    # Phase 2: min-conflicts with a tabu list.
+    iterations = 0
+    conflicted = {i for i in range(len(lessons)) if state.is_conflicted(i)}
+    tabu: Dict[Tuple[int, int], int] = {}
+    while conflicted and time.perf_counter() - started < time_limit:
+        iterations += 1
+        i = rng.choice(tuple(conflicted))
+        current = state.period_of[i]
+        best_cost, moves = None, []
+        for p in range(len(slots)):
+            if p == current:
+                continue
+            cost = state.hard_cost(i, p)
+            if tabu.get((i, p), 0) > iterations and cost > 0:
+                continue  # tabu, unless it solves the lesson's clashes outright
+            # Old lessons move only if that helps more than moving a new one
+            key = (cost, 0 if preferred[i] is None or p == preferred[i] else 1)
+            if best_cost is None or key < best_cost:
+                best_cost, moves = key, [p]
+            elif key == best_cost:
+                moves.append(p)
+        if not moves:
+            continue
+        target = rng.choice(moves)
+        state.remove(i)
+        tabu[(i, current)] = iterations + TABU_TENURE
+        state.place(i, target)
+        for j in state.at_period[current] | state.at_period[target]:
+            if state.is_conflicted(j):
+                conflicted.add(j)
+            else:
+                conflicted.discard(j)
+        if not state.is_conflicted(i):
+            conflicted.discard(i)
+
+    assignment = {lessons[i].key: slots[state.period_of[i]].period_id for i in range(len(lessons))}
+    moved = sum(1 for lesson in lessons if lesson.key in previous and previous[lesson.key] != assignment[lesson.key])
+    return SolveResult(assignment=assignment,
+                       rooms=_assign_rooms(state, room_ids, previous_rooms or {}),
+                       conflicts=sum(1 for i in range(len(lessons)) if state.is_conflicted(i)),
+                       moved=moved,
+                       seconds=time.perf_counter() - started,
+                       iterations=iterations,
+                       stats=stats)
+
+def _assign_rooms(state: _State, room_ids: Sequence[int], previous_rooms: Dict[LessonKey, int]) -> Dict[LessonKey, int]:
+    """Rooms per period: a lesson keeps its previous room if it is free, and
+    a class otherwise gets the same room all week when possible."""
+    rooms: Dict[LessonKey, int] = {}
+    if not room_ids:
+        return rooms
+    home = {c: room_ids[index % len(room_ids)] for index, c in enumerate(sorted(state.class_index))}
+    for lessons_here in state.at_period:
+        free = list(room_ids)
+        free_set = set(room_ids)
+        ordered = sorted(lessons_here, key=lambda i: (state.lessons[i].key not in previous_rooms, state.lessons[i].class_id))
+        for i in ordered:
+            lesson = state.lessons[i]
+            for wish in (previous_rooms.get(lesson.key), home[lesson.class_id]):
+                if wish in free_set:
+                    room = wish
+                    break
+            else:
+                room = next((r for r in free if r in free_set), None)
+            if room is None:
+                break  # more lessons than rooms: left unassigned, counted as conflicts
+            free_set.discard(room)
+            rooms[lesson.key] = room
+    return rooms
+
+timetable_cli = AppGroup('timetable', help='Timetable commands.')
+
+@timetable_cli.command('setup')
+@click.option('--days', default=5, show_default=True, help='School days, from Monday.')
+@click.option('--slots', default=8, show_default=True, help='Periods per day.')
+@click.option('--start', default='08:00', show_default=True, help='Start of the first period.')
+@click.option('--rooms', default=0, show_default=True, help='Rooms to create (R1, R2, ...).')
+def setup_command(days, slots, start, rooms):
+    """Create the periods of the week and, optionally, rooms."""
+    from app.services.timetable_services import create_week, create_room
+    click.echo(f"[INFO] {create_week(days, slots, start)} periods created.")
+    created = sum(1 for n in range(1, rooms + 1) if create_room(f"R{n}"))
+    click.echo(f"[INFO] {created} rooms created.")
+
+@timetable_cli.command('solve')
+@click.option('--full', is_flag=True, help='Start from scratch instead of the stored timetable.')
+@click.option('--time-limit', default=None, type=float, help='Seconds the search may take (default TIMETABLE_TIME_LIMIT).')
+@click.option('--seed', default=0, show_default=True, help='Random seed.')
+def solve_command(full, time_limit, seed):
+    """Compute the timetable now, without a job worker."""
+    from app.services.timetable_services import solve_timetable
+    stats = solve_timetable(full=full, time_limit=time_limit, seed=seed)
+    click.echo(f"[INFO] {stats['lessons']} lessons, {stats['periods']} periods, {stats['rooms']} rooms: "
+               f"{stats['conflicts']} conflicts, {stats['moved']} moved, {stats['seconds']} s.")
+    if not stats['saved']:
+        raise click.ClickException("No conflict-free timetable found; the stored one is unchanged.")
+
+def init_timetable(app: Flask) -> None:
+    """Add the `flask timetable` commands.
+
+    TIMETABLE_TIME_LIMIT: seconds a solve may take (default 20).
+    """
+    app.cli.add_command(timetable_cli)
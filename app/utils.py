@@ -1,5 +1,12 @@
 from datetime import datetime, timezone
 from typing import Dict, Any, List
+from contextlib import contextmanager
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, fine for the dev server
+    fcntl = None
 
 def format_date(date_obj: datetime) -> str:
     """Format a datetime object to a readable string."""
@@ -26,6 +33,13 @@ def get_current_utc_time() -> datetime:
     """Get the current UTC time."""
     return datetime.now(timezone.utc)
 
+def as_naive_utc(date_obj: datetime) -> datetime:
+    """Convert a datetime to naive UTC, the way the database stores it.
+    Objects fresh from the services are timezone-aware, reloaded ones are not."""
+    if date_obj and date_obj.tzinfo is not None:
+        return date_obj.astimezone(timezone.utc).replace(tzinfo=None)
+    return date_obj
+
 # i don't think this is used anywhere
 def paginate_results(items: List[Any], page: int, per_page: int) -> Dict:
     """Paginate a list of items."""
@@ -39,4 +53,17 @@ def paginate_results(items: List[Any], page: int, per_page: int) -> Dict:
         "per_page": per_page,
         "total": total,
         "pages": (total + per_page - 1) // per_page
-    }
\ No newline at end of file
+    }
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive advisory lock on `path` (created if needed) across processes."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,196 @@
+# benchmarks/bench.py
+# Times the hot service functions and admin/public pages against synthetic
+# databases of several sizes (see datagen.py), offline and in-process.
+#
+#   python benchmarks/bench.py                                   # small + medium
+#   python benchmarks/bench.py --sizes small medium large --json after.json
+#   python benchmarks/bench.py --baseline before.json            # compare, exit 1 on regressions
+#   python benchmarks/bench.py -k grades                         # only benchmarks matching "grades"
+#
+# Each sample runs in a fresh app context (a new session, like a request),
+# and records how many SQL statements it issued next to its duration.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from datagen import PROJECT_ROOT, SIZES, create_database
+
+DEFAULT_SIZES = ["small", "medium"]
+DEFAULT_ROUNDS = 15
+# Stop sampling a benchmark after this many seconds, even below --rounds.
+TIME_BUDGET = 5.0
+# A median this much slower than the baseline counts as a regression.
+DEFAULT_THRESHOLD = 0.20
+
+def service_benchmarks(rng: random.Random, counts: dict) -> dict:
+    """name -> zero-argument callable, run inside an app context."""
+    from app.services.user_services import get_all_users
+    from app.services.grade_services import (get_grades_by_student, get_grades_by_subject, get_average_grade_by_student,
+                                             get_student_subject_grades_summary, get_recent_grades)
+    from app.services.class_services import get_all_classes, get_student_count_in_class
+    from app.services.article_services import get_article_listing, search_articles
+
+    first_student = counts["teachers"] + 2  # ids: admin, teachers, students, writers
+    student_ids = [first_student + rng.randrange(counts["students"]) for _ in range(50)]
+    subject_ids = [1 + rng.randrange(counts["subjects"]) for _ in range(50)]
+    picks = {"student": iter(student_ids * 1000), "subject": iter(subject_ids * 1000)}
+
+    def class_sizes():
+        return [get_student_count_in_class(class_obj.id) for class_obj in get_all_classes()]
+
+    return {
+        "get_all_users": lambda: get_all_users(),
+        "get_all_users[student]": lambda: get_all_users(role="student"),
+        "get_grades_by_student": lambda: get_grades_by_student(next(picks["student"])),
+        "get_grades_by_subject": lambda: get_grades_by_subject(next(picks["subject"])),
+        "get_average_grade_by_student": lambda: get_average_grade_by_student(next(picks["student"])),
+        "get_student_subject_grades_summary": lambda: get_student_subject_grades_summary(next(picks["student"])),
+        "get_recent_grades[50]": lambda: get_recent_grades(50),
+        "class_sizes": class_sizes,
+        "get_article_listing": lambda: get_article_listing(),
+        "search_articles": lambda: search_articles("school project"),
+    }
+
+VIEW_BENCHMARKS = [
+    "/admin/view_users",
+    "/admin/view_students",
+    "/admin/view_teachers",
+    "/admin/view_classes",
+    "/admin/view_articles",
+    "/articles/",
+    "/articles/search?q=school",
+    "/articles/feed.atom",
+]
+
+def measure(run, rounds: int, query_counter: list) -> dict:
+    run()  # warm-up: template compilation, statement cache
+    durations, queries = [], []
+    started = time.perf_counter()
+    while len(durations) < rounds and (time.perf_counter() - started < TIME_BUDGET or len(durations) < 3):
+        query_counter[0] = 0
+        t0 = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - t0)
+        queries.append(query_counter[0])
+    return {"rounds": len(durations), "min_ms": min(durations) * 1000,
+            "median_ms": statistics.median(durations) * 1000, "max_ms": max(durations) * 1000,
+            "queries": max(queries)}
+
+def run_size(size: str, rounds: int, seed: int, keyword: str, workdir: str) -> dict:
+    from app import db
+    from sqlalchemy import event
+
+    started = time.perf_counter()
+    app, counts = create_database(os.path.join(workdir, f"bench_{size}.db"), SIZES[size], seed)
+    print(f"\n[{size}] generated {counts['students']} students, {counts['grades']} grades, "
+          f"{counts['articles']} articles in {time.perf_counter() - started:.1f} s")
+
+    query_counter = [0]
+    def count_query(*args):
+        query_counter[0] += 1
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", count_query)
+
+    results = {}
+    def record(name, run):
+        if keyword and keyword not in name:
+            return
+        results[name] = measure(run, rounds, query_counter)
+        r = results[name]
+        print(f"  {name:<44} median {r['median_ms']:8.2f} ms  min {r['min_ms']:8.2f}  "
+              f"queries {r['queries']:>5}  ({r['rounds']} rounds)")
+
+    for name, func in service_benchmarks(random.Random(seed), counts).items():
+        def run(func=func):
+            with app.app_context():
+                func()
+        record(f"service:{name}", run)
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin'})
+    for path in VIEW_BENCHMARKS:
+        def run(path=path):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        record(f"view:{path}", run)
+
+    with app.app_context():
+        db.engine.dispose()
+    return {"counts": counts, "benchmarks": results}
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(), "commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the change of every median against the baseline; return the regressions."""
+    regressions = []
+    print(f"\nCompared with baseline {baseline['environment'].get('commit')} (threshold {threshold:.0%}):")
+    for size, data in results["sizes"].items():
+        base_size = baseline["sizes"].get(size)
+        if not base_size:
+            continue
+        for name, result in data["benchmarks"].items():
+            base = base_size["benchmarks"].get(name)
+            if not base:
+                continue
+            change = result["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, name, change))
+            elif change < -threshold:
+                flag = "  faster"
+            queries = ""
+            if result["queries"] != base["queries"]:
+                queries = f"  queries {base['queries']} -> {result['queries']}"
+            print(f"  [{size}] {name:<44} {base['median_ms']:8.2f} -> {result['median_ms']:8.2f} ms "
+                  f"({change:+.0%}){queries}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Aqsam services and views.')
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-k', dest='keyword', default='', help='Only run benchmarks whose name contains this.')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+    parser.add_argument('--baseline', help='Results file from an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative slowdown that counts as a regression (default 0.2).')
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "seed": args.seed, "sizes": {}}
+    with tempfile.TemporaryDirectory(prefix='aqsam-bench-') as workdir:
+        for size in args.sizes:
+            results["sizes"][size] = run_size(size, args.rounds, args.seed, args.keyword, workdir)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# benchmarks/datagen.py
+# Builds a synthetic school database: classes, subjects, teachers, students,
+# grades, writers and articles. The same seed always gives the same data.
+# Rows are written with bulk INSERTs (no ORM objects), so even the large
+# preset only takes a few seconds.
+#
+#   python benchmarks/datagen.py                         # small preset -> instance/bench_small.db
+#   python benchmarks/datagen.py --size large --seed 7
+#   python benchmarks/datagen.py --students 2000 --out /tmp/school.db
+#
+# Every generated account has the password "password"; the admin is admin/admin.
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Row counts per preset. Grades and articles dominate the database size.
+SIZES = {
+    "small":  {"classes": 12,  "subjects": 8,  "teachers": 24,  "students": 360,
+               "grades_per_student": 24, "writers": 4,  "articles": 60},
+    "medium": {"classes": 40,  "subjects": 12, "teachers": 80,  "students": 1500,
+               "grades_per_student": 30, "writers": 10, "articles": 300},
+    "large":  {"classes": 150, "subjects": 16, "teachers": 300, "students": 6000,
+               "grades_per_student": 40, "writers": 25, "articles": 1500},
+}
+
+DEFAULT_PASSWORD = "password"
+# Fixed "today" so that the same seed always produces the same dates.
+REFERENCE_DATE = datetime(2025, 6, 1, 8, 0, 0)
+CHUNK_SIZE = 5000
+
+FIRST_NAMES = ["Adam", "Amina", "Youssef", "Salma", "Omar", "Lina", "Mehdi", "Sara", "Anas", "Hiba",
+               "Hamza", "Nour", "Ilyas", "Imane", "Rayan", "Aya", "Zakaria", "Meryem", "Karim", "Yasmine",
+               "Lucas", "Emma", "Noah", "Chloe", "Ethan", "Ines", "Hugo", "Lea", "Nathan", "Manon"]
+LAST_NAMES = ["Alaoui", "Bennani", "Tazi", "Idrissi", "Chraibi", "El Amrani", "Berrada", "Fassi", "Kettani",
+              "Lahlou", "Martin", "Bernard", "Dubois", "Moreau", "Laurent", "Simon", "Michel", "Garcia"]
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Biology", "Arabic", "French", "English", "History",
+            "Geography", "Philosophy", "Computer Science", "Physical Education", "Islamic Studies",
+            "Economics", "Art", "Music", "Spanish", "German", "Engineering", "Statistics"]
+LEVELS = ["1st Year", "2nd Year", "3rd Year", "4th Year", "5th Year", "6th Year"]
+WORDS = ("school students teachers exam term results class project science library sport trip "
+         "competition award parents meeting schedule holiday music theatre robotics club campus "
+         "the a of and to in for with on new this year our will be is are was were week month").split()
+
+def _name(rng: random.Random) -> tuple:
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+def _birth_date(rng: random.Random, min_age: int, max_age: int) -> date:
+    return (REFERENCE_DATE - timedelta(days=rng.randint(min_age * 365, max_age * 365))).date()
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    paragraphs = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(40, 120))]
+        paragraphs.append(" ".join(words).capitalize() + ".")
+    return "\n\n".join(paragraphs)
+
+def _user_row(user_id: int, username: str, role: str, password_hash: str, rng: random.Random,
+              min_age: int, max_age: int) -> dict:
+    first_name, last_name = _name(rng)
+    return {"id": user_id, "username": username, "password": password_hash, "role": role,
+            "email": f"{username}@example.org", "first_name": first_name, "last_name": last_name,
+            "birth_date": _birth_date(rng, min_age, max_age), "phone_number": f"06{rng.randint(0, 99999999):08d}",
+            "email_verified": False, "activated": True}
+
+def _bulk_insert(table, rows: list) -> None:
+    from app import db
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+def build_database(app, sizes: dict, seed: int = 42) -> dict:
+    """Fill the (empty) database of `app` with synthetic data.
+
+    Args:
+        app: A Flask app created with the target DATABASE_URI.
+        sizes: Row counts, see SIZES.
+        seed: Random seed.
+
+    Returns:
+        dict: Number of rows created per table.
+    """
+    from app import db
+    from app.models.user import User
+    from app.models.student import Student
+    from app.models.teacher import Teacher
+    from app.models.writer import Writer
+    from app.models.class_ import Class
+    from app.models.subject import Subject
+    from app.models.grade import Grade
+    from app.models.article import Article
+    from app.models.teacher_junction import teacher_subject, teacher_class
+    from app.services.article_services import ensure_article_search_index
+    from app.services.feed_services import rebuild_article_feed
+    from app.cache import invalidate
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    # Hashing is deliberately slow: hash once and share it.
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+    classes = [{"id": i + 1, "name": chr(ord("A") + i % 26) + (str(i // 26) if i >= 26 else ""),
+                "level": LEVELS[i % len(LEVELS)]} for i in range(sizes["classes"])]
+    subjects = [{"id": i + 1, "name": SUBJECTS[i] if i < len(SUBJECTS) else f"Subject {i + 1}"}
+                for i in range(sizes["subjects"])]
+
+    users = [{"id": 1, "username": "admin", "password": generate_password_hash("admin"), "role": "admin",
+              "email": None, "first_name": None, "last_name": None, "birth_date": None,
+              "phone_number": None, "email_verified": False, "activated": True}]
+    next_id = 2
+    teacher_ids, student_ids, writer_ids = [], [], []
+    for i in range(sizes["teachers"]):
+        users.append(_user_row(next_id, f"teacher{i + 1}", "teacher", password_hash, rng, 25, 60))
+        teacher_ids.append(next_id)
+        next_id += 1
+    for i in range(sizes["students"]):
+        users.append(_user_row(next_id, f"student{i + 1}", "student", password_hash, rng, 11, 18))
+        student_ids.append(next_id)
+        next_id += 1
+    for i in range(sizes["writers"]):
+        users.append(_user_row(next_id, f"writer{i + 1}", "writer", password_hash, rng, 20, 60))
+        writer_ids.append(next_id)
+        next_id += 1
+
+    # Each teacher teaches one or two subjects, in three to five classes.
+    teacher_subject_rows, teacher_class_rows = [], []
+    teachers_by_subject = {subject["id"]: [] for subject in subjects}
+    for index, teacher_id in enumerate(teacher_ids):
+        subject_ids = {subjects[index % len(subjects)]["id"]}  # every subject has a teacher
+        if rng.random() < 0.4:
+            subject_ids.add(rng.choice(subjects)["id"])
+        for subject_id in subject_ids:
+            teacher_subject_rows.append({"teacher_id": teacher_id, "subject_id": subject_id})
+            teachers_by_subject[subject_id].append(teacher_id)
+        for class_row in rng.sample(classes, min(len(classes), rng.randint(3, 5))):
+            teacher_class_rows.append({"teacher_id": teacher_id, "class_id": class_row["id"]})
+
+    student_rows = [{"id": student_id, "class_id": rng.choice(classes)["id"]} for student_id in student_ids]
+
+    grade_rows = []
+    for student_id in student_ids:
+        for _ in range(sizes["grades_per_student"]):
+            subject_id = rng.choice(subjects)["id"]
+            grade_rows.append({
+                "id": len(grade_rows) + 1,
+                "student_id": student_id,
+                "subject_id": subject_id,
+                "teacher_id": rng.choice(teachers_by_subject[subject_id]),
+                "grade": round(min(20.0, max(0.0, rng.gauss(12, 3.5))), 2),
+                "date": REFERENCE_DATE - timedelta(days=rng.randint(0, 270), minutes=rng.randint(0, 600)),
+                "comment": rng.choice([None, None, "Good work", "Needs revision", "Excellent"]),
+            })
+
+    article_rows = []
+    for i in range(sizes["articles"]):
+        created_at = REFERENCE_DATE - timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440))
+        article_rows.append({
+            "id": i + 1,
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).capitalize(),
+            "author_id": rng.choice(writer_ids),
+            "content_md": _paragraphs(rng, rng.randint(3, 12)),
+            "created_at": created_at,
+            "last_edited": created_at + timedelta(hours=rng.randint(0, 48)),
+            "is_published": rng.random() < 0.8,
+        })
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        _bulk_insert(User.__table__, users)
+        _bulk_insert(Class.__table__, classes)
+        _bulk_insert(Subject.__table__, subjects)
+        _bulk_insert(Teacher.__table__, [{"id": teacher_id} for teacher_id in teacher_ids])
+        _bulk_insert(Student.__table__, student_rows)
+        _bulk_insert(Writer.__table__, [{"id": writer_id} for writer_id in writer_ids])
+        _bulk_insert(teacher_subject, teacher_subject_rows)
+        _bulk_insert(teacher_class, teacher_class_rows)
+        _bulk_insert(Grade.__table__, grade_rows)
+        _bulk_insert(Article.__table__, article_rows)
+        # Bulk inserts bypass the ORM: tell the service cache (it may remember an older database at this path).
+        for table in db.metadata.sorted_tables:
+            invalidate(table.name)
+        db.session.commit()
+        ensure_article_search_index()
+        rebuild_article_feed()
+
+    return {"users": len(users), "classes": len(classes), "subjects": len(subjects),
+            "teachers": len(teacher_ids), "students": len(student_ids), "writers": len(writer_ids),
+            "grades": len(grade_rows), "articles": len(article_rows)}
+
+def app_config(path: str) -> dict:
+    """create_app() config for a benchmark database at `path`.
+
+    The service cache, metrics and profiles live next to the database instead
+    of in instance/, so a run in a temporary directory cleans up after itself.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    return {"DATABASE_URI": f"sqlite:///{os.path.abspath(path)}", "first_load": False,
+            "CACHE_URL": os.path.abspath(path) + ".cache",
+            "METRICS_DIR": os.path.join(directory, "metrics"),
+            "PROFILE_DIR": os.path.join(directory, "profiles"),
+            # Listing pages are N+1 by design for now; don't flood the output.
+            "SQL_N_PLUS_ONE_THRESHOLD": 10 ** 9}
+
+def create_database(path: str, sizes: dict, seed: int = 42):
+    """Create a fresh SQLite database at `path` and return (app, row counts)."""
+    from app import create_app
+    path = os.path.abspath(path)
+    for suffix in ("", "-wal", "-shm", ".cache", ".cache-wal", ".cache-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    app = create_app(app_config(path))
+    return app, build_database(app, sizes, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Aqsam database.')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='SQLite file to create (default: instance/bench_<size>.db).')
+    for key in SIZES['small']:
+        parser.add_argument('--' + key.replace('_', '-'), type=int, dest=key, help=f'Override the number of {key}.')
+    args = parser.parse_args()
+
+    sizes = dict(SIZES[args.size])
+    sizes.update({key: getattr(args, key) for key in sizes if getattr(args, key) is not None})
+    out = args.out or os.path.join(PROJECT_ROOT, 'instance', f'bench_{args.size}.db')
+
+    started = time.perf_counter()
+    _, counts = create_database(out, sizes, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Created {out} in {elapsed:.1f} s")
+    for table, count in counts.items():
+        print(f"{table:>10}: {count}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+# benchmarks/loadtest.py
+# Load test over real HTTP on localhost. It generates a seeded database (see
+# datagen.py) and starts the app in a separate process under Werkzeug's
+# threaded WSGI server ("one worker"). Virtual users then log in and run
+# scripted sessions concurrently:
+#
+#   admin    browses the admin lists
+#   teacher  opens a class and submits grades
+#   student  looks at the dashboard and grade list
+#   visitor  reads the public news pages (no login)
+#
+#   python benchmarks/loadtest.py                                  # 20 users, 30 s, small data
+#   python benchmarks/loadtest.py --users 50 --duration 60 --size medium
+#   python benchmarks/loadtest.py --mix teacher=1 student=4 --json load.json
+#
+# Reports requests per second and latency percentiles per route. Only the
+# standard library is used on the client side; no external services needed.
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from datagen import PROJECT_ROOT, SIZES, DEFAULT_PASSWORD, app_config, create_database
+
+DEFAULT_MIX = {"admin": 1, "teacher": 3, "student": 5, "visitor": 1}
+# Actions per login session before logging out and in again.
+ACTIONS_PER_SESSION = 10
+
+_CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+_OPTION = r'<select id="{}"[^>]*>\s*<option value="(\d+)"'
+_NUMBERS = re.compile(r"/\d+(?=/|$)")
+
+# ===========================
+# SERVER
+# ===========================
+
+def serve(database_path: str, port: int) -> None:
+    """Child process: run the app on localhost:port until killed."""
+    sys.path.insert(0, PROJECT_ROOT)
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app, warm_up
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app(app_config(database_path))
+    warm_up(app)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    print(f"listening on {server.server_port}", flush=True)
+    server.serve_forever()
+
+def start_server(database_path: str) -> tuple:
+    process = subprocess.Popen([sys.executable, __file__, '--serve', database_path],
+                               stdout=subprocess.PIPE, text=True, cwd=PROJECT_ROOT)
+    line = process.stdout.readline()
+    if not line.startswith('listening on'):
+        process.kill()
+        raise RuntimeError('The server did not start.')
+    return process, int(line.split()[-1])
+
+# ===========================
+# CLIENT
+# ===========================
+
+class Stats:
+    """Latencies per route, shared by all virtual users."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+class VirtualUser:
+    """One browser: a keep-alive connection and a cookie jar."""
+
+    def __init__(self, port: int, stats: Stats):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.cookies = {}
+        self.stats = stats
+
+    def request(self, method: str, path: str, form: dict = None, expect=(200,)) -> str:
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        route = f"{method} {_NUMBERS.sub('/<id>', path.split('?')[0])}"
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # reconnects on the next request
+            self.stats.record(route, time.perf_counter() - started, False)
+            return ''
+        self.stats.record(route, time.perf_counter() - started, response.status in expect)
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return content
+
+    def login(self, username: str, password: str) -> None:
+        self.cookies.clear()
+        page = self.request('GET', '/auth/login')
+        token = _CSRF.search(page)
+        self.request('POST', '/auth/login', {'username': username, 'password': password,
+                                              'csrf_token': token.group(1) if token else ''}, expect=(302,))
+
+    def logout(self) -> None:
+        self.request('GET', '/auth/logout', expect=(302,))
+
+def admin_session(user: VirtualUser, rng: random.Random, counts: dict) -> None:
+    user.login('admin', 'admin')
+    pages = ['/admin/view_classes', '/admin/view_subjects', '/admin/view_articles', '/admin/view_teachers',
+             '/admin/view_users', '/admin/view_students']
+    for _ in range(ACTIONS_PER_SESSION):
+        user.request('GET', rng.choices(pages, weights=[4, 4, 3, 2, 1, 1])[0])
+    user.logout()
+
+def teacher_session(user: VirtualUser, rng: random.Random, counts: dict) -> None:
+    user.login(f"teacher{rng.randint(1, counts['teachers'])}", DEFAULT_PASSWORD)
+    classes = re.findall(r'href="(/teacher/class/\d+/grades)"', user.request('GET', '/teacher/'))
+    if not classes:
+        return user.logout()
+    path = rng.choice(classes)
+    page = user.request('GET', path)
+    for _ in range(ACTIONS_PER_SESSION // 2):
+        student = re.search(_OPTION.format('student_id'), page)
+        subject = re.search(_OPTION.format('subject_id'), page)
+        token = _CSRF.search(page)
+        if not (student and subject and token):
+            break
+        user.request('POST', path, {'student_id': student.group(1), 'subject_id': subject.group(1),
+                                    'grade': round(rng.uniform(5, 20), 2), 'comment': '',
+                                    'csrf_token': token.group(1)}, expect=(302,))
+        page = user.request('GET', path)  # follow the redirect, like a browser
+    user.logout()
+
+def student_session(user: VirtualUser, rng: random.Random, counts: dict) -> None:
+    user.login(f"student{rng.randint(1, counts['students'])}", DEFAULT_PASSWORD)
+    for _ in range(ACTIONS_PER_SESSION):
+        user.request('GET', rng.choice(['/student/', '/student/grades']))
+    user.logout()
+
+def visitor_session(user: VirtualUser, rng: random.Random, counts: dict) -> None:
+    for _ in range(ACTIONS_PER_SESSION):
+        path = rng.choices(['/articles/', f"/articles/{rng.randint(1, counts['articles'])}",
+                            '/articles/search?q=school', '/articles/feed.atom'], weights=[4, 4, 1, 1])[0]
+        user.request('GET', path, expect=(200, 404))  # unpublished articles are 404
+
+SCENARIOS = {"admin": admin_session, "teacher": teacher_session,
+             "student": student_session, "visitor": visitor_session}
+
+def run_user(port: int, scenario: str, seed: int, counts: dict, stats: Stats, deadline: float) -> None:
+    rng = random.Random(seed)
+    user = VirtualUser(port, stats)
+    while time.perf_counter() < deadline:
+        SCENARIOS[scenario](user, rng, counts)
+
+# ===========================
+# REPORT
+# ===========================
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(stats: Stats, elapsed: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(stats.latencies.items()):
+        values = sorted(latencies)
+        routes[route] = {"requests": len(values), "errors": stats.errors.get(route, 0),
+                         "rps": len(values) / elapsed,
+                         "p50_ms": percentile(values, 0.50) * 1000, "p90_ms": percentile(values, 0.90) * 1000,
+                         "p99_ms": percentile(values, 0.99) * 1000, "max_ms": values[-1] * 1000,
+                         "mean_ms": statistics.fmean(values) * 1000}
+    total = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    all_values = sorted(v for latencies in stats.latencies.values() for v in latencies)
+    overall = {"requests": total, "errors": errors, "rps": total / elapsed,
+               "p50_ms": percentile(all_values, 0.50) * 1000 if all_values else 0.0,
+               "p99_ms": percentile(all_values, 0.99) * 1000 if all_values else 0.0}
+    return {"elapsed": elapsed, "overall": overall, "routes": routes}
+
+def print_report(report: dict) -> None:
+    print(f"\n{'route':<36} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for route, r in report["routes"].items():
+        print(f"{route:<36} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+    o = report["overall"]
+    print(f"\nTotal: {o['requests']} requests in {report['elapsed']:.1f} s = {o['rps']:.1f} req/s, "
+          f"{o['errors']} errors, p50 {o['p50_ms']:.1f} ms, p99 {o['p99_ms']:.1f} ms")
+
+def parse_mix(items: list) -> dict:
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test Aqsam over HTTP on localhost.')
+    parser.add_argument('--serve', metavar='DATABASE', help=argparse.SUPPRESS)
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users (default 20).')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of load (default 30).')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='Dataset preset (default small).')
+    parser.add_argument('--mix', nargs='+', default=None,
+                        help='Scenario weights, e.g. admin=1 teacher=3 student=5 visitor=1.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file.')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, 0)
+        return
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix='aqsam-load-') as workdir:
+        database_path = os.path.join(workdir, 'load.db')
+        _, counts = create_database(database_path, SIZES[args.size], args.seed)
+        process, port = start_server(database_path)
+        try:
+            stats = Stats()
+            scenarios = rng.choices(list(mix), weights=list(mix.values()), k=args.users)
+            print(f"{args.users} users ({', '.join(f'{s}={scenarios.count(s)}' for s in mix)}) "
+                  f"for {args.duration:.0f} s against http://127.0.0.1:{port}")
+            started = time.perf_counter()
+            deadline = started + args.duration
+            threads = [threading.Thread(target=run_user, daemon=True,
+                                        args=(port, scenario, args.seed + i, counts, stats, deadline))
+                       for i, scenario in enumerate(scenarios)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            report = summarize(stats, time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait()
+
+    report.update({"users": args.users, "mix": mix, "size": args.size, "counts": counts})
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Report written to {args.json_path}")
+
+if __name__ == '__main__':
+    main()
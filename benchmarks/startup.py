@@ -0,0 +1,77 @@
+# benchmarks/startup.py
+# Measures how long Aqsam takes to start: importing the package, running
+# create_app() and serving the first request. Every sample runs in a fresh
+# interpreter, so nothing is shared between samples.
+#
+#   python benchmarks/startup.py                 # 10 samples
+#   python benchmarks/startup.py -n 20 --json startup.json
+#   python benchmarks/startup.py --importtime    # slowest imports
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in the child interpreter and prints one JSON line of timings (seconds).
+CHILD_SCRIPT = '''
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app()
+t2 = time.perf_counter()
+flask_app.test_client().get('/auth/login')
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2, "total": t3 - t0}))
+'''
+
+def run_sample() -> dict:
+    result = subprocess.run([sys.executable, '-c', CHILD_SCRIPT], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(limit: int = 15) -> list:
+    """Top-level cumulative import times from `python -X importtime`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:  # modules imported directly by `app`
+            rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Aqsam startup time.')
+    parser.add_argument('-n', '--samples', type=int, default=10)
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+    parser.add_argument('--importtime', action='store_true', help='List the slowest imports instead.')
+    args = parser.parse_args()
+
+    if args.importtime:
+        for cumulative_us, name in slowest_imports():
+            print(f"{cumulative_us / 1000:8.1f} ms  {name}")
+        return
+
+    samples = [run_sample() for _ in range(args.samples)]
+    results = {}
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        values = [sample[phase] for sample in samples]
+        results[phase] = {"min": min(values), "median": statistics.median(values), "max": max(values)}
+        print(f"{phase:>14}: median {results[phase]['median'] * 1000:7.1f} ms "
+              f"(min {results[phase]['min'] * 1000:.1f}, max {results[phase]['max'] * 1000:.1f})")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"samples": len(samples), "results": results}, f, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,10 @@
 # run.py
 
 from app import create_app
+from app.realtime import socketio
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # socketio.run serves the WebSocket connections of the real-time grades.
+    socketio.run(app, debug=True)
@@ -0,0 +1,40 @@
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A fresh app on its own SQLite file, with the tables and the admin user."""
+    app = create_app({
+        "DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "first_load": False,
+        "CACHE_BACKEND": "memory",
+        "METRICS_ENABLED": False,
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+    })
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        from app.services.user_services import create_user
+        db.create_all(bind_key=None)
+        create_user(username="admin", password="admin", role="admin")
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password="password"):
+    return client.post("/auth/login", data={"username": username, "password": password})
+
+
+@pytest.fixture
+def writer(app):
+    from app.services.writer_services import create_writer
+    return create_writer("writer", "password", "writer@example.com", "Wanda", "Writer",
+                         "1990-01-01 00:00:00", "0600000000")
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.user_services import create_user
+from tests.conftest import login
+
+ADMIN_PAGES = [
+    ("GET", "/admin/"),
+    ("GET", "/admin/view_users"),
+    ("GET", "/admin/profiles"),
+    ("GET", "/admin/profiles/0123456789abcdef"),
+]
+
+
+@pytest.mark.parametrize("method, path", ADMIN_PAGES)
+def test_admin_pages_need_a_login(client, method, path):
+    response = client.open(path, method=method)
+    assert response.status_code == 302
+    assert "/auth/login" in response.headers["Location"]
+
+
+@pytest.mark.parametrize("method, path", ADMIN_PAGES)
+def test_admin_pages_refuse_other_roles(client, method, path):
+    create_user(username="teacher", password="password", role="teacher")
+    login(client, "teacher")
+    assert client.open(path, method=method).status_code == 403
+
+
+def test_admin_pages_open_to_admins(client):
+    login(client, "admin", "admin")
+    assert client.get("/admin/profiles").status_code == 200
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.services.article_services import create_article, get_article_listing
+
+
+@pytest.fixture
+def articles(app, writer):
+    """Seven articles; three share a timestamp, one is a draft."""
+    created = [datetime(2026, 9, day) for day in (1, 2, 3, 3, 3, 4)]
+    result = []
+    for n, created_at in enumerate(created):
+        article = create_article(f"Article {n}", "Body", writer.id, is_published=True)
+        article.created_at = created_at
+        result.append(article)
+    draft = create_article("Draft", "Body", writer.id)
+    draft.created_at = datetime(2026, 9, 5)
+    db.session.commit()
+    db.session.expire_all()
+    return result
+
+
+def _all_pages(per_page, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page, cursor = get_article_listing(cursor=cursor, per_page=per_page, **kwargs)
+        pages.append([article.title for article in page])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("per_page", [1, 2, 3, 4, 6, 10])
+def test_pages_cover_every_article_once(articles, per_page):
+    pages = _all_pages(per_page)
+    titles = [title for page in pages for title in page]
+    # Newest first, ties broken by id (newest first too)
+    assert titles == ["Article 5", "Article 4", "Article 3", "Article 2", "Article 1", "Article 0"]
+    assert all(len(page) == per_page for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= per_page
+
+
+def test_full_last_page_has_no_next_cursor(articles):
+    page, cursor = get_article_listing(per_page=6)
+    assert len(page) == 6
+    assert cursor is None
+
+
+def test_cursor_splitting_a_tie(articles):
+    page, cursor = get_article_listing(per_page=2)
+    assert [a.title for a in page] == ["Article 5", "Article 4"]
+    page, _ = get_article_listing(cursor=cursor, per_page=2)
+    assert [a.title for a in page] == ["Article 3", "Article 2"]
+
+
+def test_drafts_are_listed_on_request(articles):
+    assert "Draft" not in [t for page in _all_pages(3) for t in page]
+    assert _all_pages(3, published_only=False)[0][0] == "Draft"
+
+
+@pytest.mark.parametrize("cursor", ["", "garbage", "2026-09-03_x", "_12"])
+def test_malformed_cursor_restarts_from_the_first_page(articles, cursor):
+    page, _ = get_article_listing(cursor=cursor, per_page=2)
+    assert [a.title for a in page] == ["Article 5", "Article 4"]
+
+
+def test_listing_page_renders(client, articles):
+    response = client.get("/articles/")
+    assert response.status_code == 200
+    assert "Article 5" in response.get_data(as_text=True)
+
+
+def test_cursor_of_an_article_still_in_the_session(app, writer):
+    # Fresh from create_article, created_at is timezone-aware
+    first = create_article("First", "Body", writer.id, is_published=True)
+    second = create_article("Second", "Body", writer.id, is_published=True)
+    page, cursor = get_article_listing(per_page=1)
+    assert [a.id for a in page] == [second.id]
+    page, cursor = get_article_listing(cursor=cursor, per_page=1)
+    assert [a.id for a in page] == [first.id]
+    assert cursor is None
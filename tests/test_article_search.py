@@ -0,0 +1,77 @@
+import pytest
+
+from app.services import article_services
+from app.services.article_services import create_article, delete_article, search_articles, update_article
+
+
+@pytest.fixture
+def articles(app, writer):
+    def make(title, body, published=True):
+        return create_article(title, body, writer.id, is_published=published)
+    return {
+        "title": make("Volcanoes of Iceland", "A trip report."),
+        "body": make("Field trip", "We saw two volcanoes and a glacier."),
+        "html": make("Markup", "Use <script> tags and volcanoes carefully."),
+        "draft": make("Volcanoes draft", "Not ready.", published=False),
+        "percent": make("Discount 50% off", "Sale."),
+        "plain": make("Discount 500 off", "Sale."),
+        "underscore": make("snake_case names", "Style."),
+        "letters": make("snakeXcase names", "Style."),
+    }
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+def test_title_matches_rank_above_body_matches(articles):
+    results = search_articles("volcanoes")
+    assert _ids(results)[0] == articles["title"].id
+    assert set(_ids(results)) == {articles["title"].id, articles["body"].id, articles["html"].id}
+    assert results == sorted(results, key=lambda result: result["rank"])
+
+
+def test_last_word_matches_as_a_prefix(articles):
+    assert _ids(search_articles("glac")) == [articles["body"].id]
+    assert _ids(search_articles("trip glac")) == [articles["body"].id]
+    assert search_articles("glac trip") == []  # only the last word is a prefix
+
+
+def test_fts_operators_in_the_query_are_literal(articles):
+    assert search_articles('volcanoes NOT glacier') == []  # "not" is just a word no article has
+    assert search_articles('"') == []
+    assert search_articles("title:volcanoes") == []
+
+
+def test_snippets_are_escaped_and_highlighted(articles):
+    (result,) = [r for r in search_articles("script") if r["id"] == articles["html"].id]
+    assert "&lt;<mark>script</mark>&gt;" in result["snippet"]
+    assert "<script>" not in result["snippet"]
+
+
+def test_drafts_are_found_only_on_request(articles):
+    assert articles["draft"].id not in _ids(search_articles("draft"))
+    assert articles["draft"].id in _ids(search_articles("draft", published_only=False))
+
+
+def test_index_follows_updates_and_deletes(articles):
+    update_article(articles["body"].id, content_md="Nothing to see.")
+    assert articles["body"].id not in _ids(search_articles("glacier"))
+    delete_article(articles["title"].id)
+    assert articles["title"].id not in _ids(search_articles("volcanoes"))
+
+
+@pytest.fixture
+def without_fts(monkeypatch):
+    monkeypatch.setattr(article_services, "_search_supported", lambda: False)
+
+
+def test_fallback_matches_titles(articles, without_fts):
+    results = search_articles("Volcanoes")
+    assert _ids(results) == [articles["title"].id]
+    assert results[0]["snippet"] == ""
+
+
+@pytest.mark.parametrize("query, expected", [("50%", "percent"), ("snake_case", "underscore")])
+def test_fallback_matches_wildcards_literally(articles, without_fts, query, expected):
+    assert _ids(search_articles(query)) == [articles[expected].id]
@@ -0,0 +1,58 @@
+import gzip
+import os
+
+from flask import Flask
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from app.assets import AssetMiddleware, build_assets, fingerprint
+
+CSS = b"body { color: black; }\n" * 200
+
+
+def _client(static):
+    return Client(AssetMiddleware(Response("app"), str(static)))
+
+
+def _url(static, name):
+    return f"/assets/{fingerprint(str(static / name))}/{name}"
+
+
+def test_requests_never_write_compressed_files(tmp_path):
+    (tmp_path / "style.css").write_bytes(CSS)
+    response = _client(tmp_path).get(_url(tmp_path, "style.css"), headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == CSS
+    assert sorted(os.listdir(tmp_path)) == ["style.css"]
+
+
+def test_build_compresses_and_requests_use_it(tmp_path):
+    (tmp_path / "style.css").write_bytes(CSS)
+    stats = build_assets(Flask(__name__, static_folder=str(tmp_path)))
+    assert stats["files"] == 1 and stats["compressed"] >= 1
+
+    response = _client(tmp_path).get(_url(tmp_path, "style.css"), headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == CSS
+
+
+def test_stale_compressed_file_is_not_served(tmp_path):
+    path = tmp_path / "style.css"
+    path.write_bytes(CSS)
+    build_assets(Flask(__name__, static_folder=str(tmp_path)))
+    path.write_bytes(CSS + b"a { }\n")
+    variant = os.stat(str(path) + ".gz")
+    os.utime(path, ns=(variant.st_atime_ns, variant.st_mtime_ns + 1))
+
+    response = _client(tmp_path).get(_url(tmp_path, "style.css"), headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data().endswith(b"a { }\n")
+
+
+def test_warm_up_build_does_not_compress(tmp_path):
+    (tmp_path / "style.css").write_bytes(CSS)
+    stats = build_assets(Flask(__name__, static_folder=str(tmp_path)), compress=False)
+    assert stats == {"files": 1, "compressed": 0}
+    assert os.listdir(tmp_path) == ["style.css"]
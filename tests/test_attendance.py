@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+
+from app.services.attendance_services import (get_attendance, get_class_absence_rates, get_student_absence_rate,
+                                              pack_positions, record_attendance, unpack_positions)
+from app.services.class_services import create_class
+from app.services.student_services import create_student
+
+
+@pytest.mark.parametrize("positions", [[], [0], [7], [8], [0, 1, 2, 3], [3, 64, 65, 999], list(range(40))])
+def test_pack_unpack_round_trip(positions):
+    bitmap = pack_positions(positions)
+    assert unpack_positions(bitmap) == sorted(positions)
+    assert len(bitmap) == (max(positions) // 8 + 1 if positions else 0)
+
+
+def test_pack_little_endian():
+    assert pack_positions([]) == b""
+    assert pack_positions([0, 9]) == b"\x01\x02"
+    assert pack_positions([2, 2]) == b"\x04"
+
+
+def _class_with_students(name, count):
+    school_class = create_class(name, "1st Year")
+    students = [create_student(f"{name}-{n}", "password", f"{name}-{n}@example.com", "First", "Last",
+                               "2010-01-01 00:00:00", "0600000000", class_id=school_class.id)
+                for n in range(count)]
+    return school_class, students
+
+
+def test_roll_call_round_trip_and_correction(app):
+    school_class, students = _class_with_students("A", 10)
+    ids = [student.id for student in students]
+    day = date(2026, 10, 5)
+
+    summary = record_attendance(school_class.id, day, absent_ids=[ids[1], ids[9]], late_ids=[ids[3], ids[9]])
+    assert summary == {"students": 10, "absent": 2, "late": 1}  # absent wins over late
+    assert get_attendance(school_class.id, day) == {"absent": [ids[1], ids[9]], "late": [ids[3]]}
+
+    # A corrected roll call replaces the first one
+    record_attendance(school_class.id, day, absent_ids=[ids[2]])
+    assert get_attendance(school_class.id, day) == {"absent": [ids[2]], "late": []}
+    assert get_attendance(school_class.id, day, slot=1) is None
+
+
+def test_students_outside_the_class_are_ignored(app):
+    school_class, students = _class_with_students("A", 3)
+    _, others = _class_with_students("B", 2)
+    summary = record_attendance(school_class.id, date(2026, 10, 5), absent_ids=[others[0].id, students[0].id])
+    assert summary["absent"] == 1
+
+
+def test_absence_rates_follow_students_across_rosters(app):
+    school_class, students = _class_with_students("A", 4)
+    ids = [student.id for student in students]
+    record_attendance(school_class.id, date(2026, 10, 5), absent_ids=[ids[0]])
+    record_attendance(school_class.id, date(2026, 10, 6), absent_ids=[ids[0], ids[3]], late_ids=[ids[1]])
+    # A new student joins: the class gets a new roster
+    newcomer = create_student("new", "password", "new@example.com", "New", "Comer",
+                              "2010-01-01 00:00:00", "0600000000", class_id=school_class.id)
+    record_attendance(school_class.id, date(2026, 10, 7), absent_ids=[newcomer.id, ids[3]])
+
+    rates = get_class_absence_rates(school_class.id, date(2026, 10, 1), date(2026, 10, 31))
+    assert rates[ids[0]] == {"sessions": 3, "absences": 2, "late": 0, "rate": 2 / 3}
+    assert rates[ids[1]]["late"] == 1
+    assert rates[ids[3]]["absences"] == 2
+    assert rates[newcomer.id] == {"sessions": 1, "absences": 1, "late": 0, "rate": 1.0}
+
+    assert get_student_absence_rate(ids[3], date(2026, 10, 1), date(2026, 10, 31)) == rates[ids[3]]
+    assert get_student_absence_rate(ids[3], date(2026, 10, 6), date(2026, 10, 6))["absences"] == 1
+    assert get_student_absence_rate(ids[2], date(2026, 11, 1), date(2026, 11, 30))["rate"] is None
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event, update
+
+from app import db
+from app.cache import _MISSING, LRUCache, invalidate
+from app.models.user import User
+from app.services.user_services import get_user_by_id, get_user_by_username
+
+
+@pytest.fixture
+def queries(app):
+    """The SQL statements run against the database."""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", listener)
+
+
+@pytest.fixture
+def admin_id(app):
+    user_id = get_user_by_username("admin").id
+    get_user_by_id(user_id)  # cached
+    db.session.remove()
+    return user_id
+
+
+def test_cached_lookup_runs_no_query(admin_id, queries):
+    assert get_user_by_id(admin_id).username == "admin"
+    assert queries == []
+
+
+def test_commit_invalidates_the_changed_row(admin_id, queries):
+    get_user_by_id(admin_id).first_name = "Ada"
+    db.session.commit()
+    db.session.remove()
+
+    assert get_user_by_id(admin_id).first_name == "Ada"
+    assert queries  # the version was bumped: read again
+
+
+def test_rollback_keeps_the_cached_entries(admin_id, queries):
+    get_user_by_id(admin_id).first_name = "Ada"
+    db.session.flush()
+    db.session.rollback()
+    db.session.remove()
+    del queries[:]
+
+    assert get_user_by_id(admin_id).first_name != "Ada"
+    assert queries == []
+
+
+def test_transaction_with_writes_bypasses_the_cache(admin_id):
+    db.session.execute(update(User).where(User.id == admin_id).values(first_name="Ada"))
+    invalidate("user", admin_id)
+
+    assert get_user_by_id(admin_id).first_name == "Ada"  # its own uncommitted change
+    db.session.rollback()
+
+
+def test_bulk_writes_are_seen_once_invalidated(admin_id):
+    db.session.execute(update(User).where(User.id == admin_id).values(first_name="Ada"))
+    db.session.commit()
+    db.session.remove()
+    assert get_user_by_id(admin_id).first_name != "Ada"  # stale: the ORM did not see the write
+
+    invalidate("user")
+    db.session.commit()
+    db.session.remove()
+    assert get_user_by_id(admin_id).first_name == "Ada"
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    lru = LRUCache(2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.get("b") is _MISSING
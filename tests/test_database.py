@@ -0,0 +1,207 @@
+import time
+
+import pytest
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.database import (DEFAULT_DATABASE_OPTIONS, build_engine_options,
+                          get_database_options, sqlite_pragmas)
+
+
+def _make_app(tmp_path, **config):
+    app = create_app({
+        "DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "first_load": False,
+        "CACHE_BACKEND": "memory",
+        "METRICS_ENABLED": False,
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+        **config,
+    })
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+def _pragma(name):
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_connections_get_the_default_pragmas(app):
+    assert _pragma("journal_mode") == "wal"
+    assert _pragma("synchronous") == 1  # NORMAL
+    assert _pragma("cache_size") == -20000
+    assert _pragma("busy_timeout") == 5000
+
+
+def test_database_options_override_the_defaults(tmp_path):
+    app = _make_app(tmp_path, DATABASE_OPTIONS={"synchronous": "full", "busy_timeout": 250})
+    with app.app_context():
+        assert _pragma("synchronous") == 2  # FULL
+        assert _pragma("busy_timeout") == 250
+        assert _pragma("journal_mode") == "wal"
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_get_database_options_keeps_unset_defaults():
+    options = get_database_options({"DATABASE_OPTIONS": {"pool_size": 3}})
+
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == DEFAULT_DATABASE_OPTIONS["max_overflow"]
+    assert get_database_options({}) == DEFAULT_DATABASE_OPTIONS
+
+
+@pytest.mark.parametrize("key, value", [
+    ("journal_mode", "wal; DROP TABLE user"),
+    ("synchronous", "sometimes"),
+])
+def test_invalid_pragma_values_are_rejected(key, value):
+    with pytest.raises(ValueError):
+        sqlite_pragmas({**DEFAULT_DATABASE_OPTIONS, key: value})
+
+
+def test_invalid_pragma_values_fail_app_startup(tmp_path):
+    with pytest.raises(ValueError):
+        _make_app(tmp_path, DATABASE_OPTIONS={"journal_mode": "bogus"})
+
+
+def test_sqlite_engine_options_only_set_the_busy_timeout():
+    options = build_engine_options("sqlite:///school.db", DEFAULT_DATABASE_OPTIONS)
+
+    assert options == {"connect_args": {"timeout": 5.0}}
+
+
+def test_server_engine_options_configure_the_pool():
+    options = build_engine_options("postgresql://user@db/school",
+                                   {**DEFAULT_DATABASE_OPTIONS, "pool_recycle": None})
+
+    assert options == {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True}
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """An app whose read replica is a second, empty SQLite file with the same schema.
+
+    Yielded outside an app context, so that each request gets its own session.
+    """
+    app = _make_app(tmp_path, DATABASE_REPLICA_URI=f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        from app.services.user_services import create_user
+        db.create_all(bind_key=None)
+        db.metadata.create_all(db.engines["replica"])
+        create_user(username="admin", password="admin", role="admin")
+        db.session.remove()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_read_only_functions_query_the_replica(replica_app):
+    from app.services.user_services import get_all_users, get_user_by_username
+
+    with replica_app.app_context():
+        # The replica has not caught up with the admin yet; plain lookups use the primary.
+        assert get_all_users() == []
+        assert get_user_by_username("admin") is not None
+
+
+def test_reads_go_to_the_primary_after_a_write(replica_app):
+    from app.services.user_services import create_user, get_all_users
+
+    with replica_app.app_context():
+        create_user(username="teacher", password="password", role="teacher")
+
+        assert sorted(user.username for user in get_all_users()) == ["admin", "teacher"]
+
+
+def test_writes_never_go_to_the_replica(replica_app):
+    from app.database import replica_reads
+    from app.models.user import User
+
+    with replica_app.app_context(), replica_reads():
+        assert db.session.get_bind(clause=db.select(User)) is db.engines["replica"]
+        assert db.session.get_bind(clause=db.delete(User)) is db.engine
+
+
+def test_a_request_that_wrote_pins_the_browser_to_the_primary(replica_app):
+    from app.services.user_services import create_user, get_all_users
+
+    @replica_app.post("/_write")
+    def _write():
+        create_user(username="teacher", password="password", role="teacher")
+        return ""
+
+    @replica_app.get("/_read")
+    def _read():
+        return ",".join(sorted(user.username for user in get_all_users()))
+
+    client = replica_app.test_client()
+    assert client.get("/_read").text == ""
+
+    client.post("/_write")
+    with client.session_transaction() as session:
+        until = session["_db_primary_until"]
+    assert 0 < until - time.time() <= 5
+    assert client.get("/_read").text == "admin,teacher"
+
+    # Another browser is not pinned and still reads the lagging replica.
+    assert replica_app.test_client().get("/_read").text == ""
+
+
+@pytest.fixture
+def commits(app):
+    """Counts the commits of the app's session."""
+    from app.database import RoutingSession
+    count = []
+    listener = lambda session: count.append(session)
+    event.listen(RoutingSession, "after_commit", listener)
+    yield count
+    event.remove(RoutingSession, "after_commit", listener)
+
+
+def test_transaction_commits_once_at_the_end(app, commits):
+    from app.database import transaction
+    from app.services.class_services import add_teacher_to_class, create_class, get_class_by_id
+    from app.services.teacher_services import create_teacher
+
+    with transaction():
+        school_class = create_class("A", "1st Year")
+        teacher = create_teacher("teacher", "password", "teacher@example.com", "First", "Last",
+                                 "1980-01-01 00:00:00", "0600000000")
+        add_teacher_to_class(school_class.id, teacher.id)
+        assert commits == []
+
+    assert len(commits) == 1
+    db.session.expire_all()
+    assert [t.id for t in get_class_by_id(school_class.id).teachers] == [teacher.id]
+
+
+def test_transaction_rolls_back_every_call_when_the_block_raises(app, commits):
+    from app.database import transaction
+    from app.services.class_services import create_class, get_all_classes
+    from app.services.user_services import create_user, get_user_by_username
+
+    with pytest.raises(RuntimeError):
+        with transaction():
+            create_class("A", "1st Year")
+            create_user(username="teacher", password="password", role="teacher")
+            raise RuntimeError("boom")
+
+    assert commits == []
+    assert get_all_classes() == []
+    assert get_user_by_username("teacher") is None
+
+
+def test_nested_transactions_join_the_outer_one(app, commits):
+    from app.database import in_transaction, transaction
+    from app.services.class_services import create_class, get_all_classes
+
+    with pytest.raises(RuntimeError):
+        with transaction():
+            with transaction():
+                create_class("A", "1st Year")
+            assert in_transaction() and commits == []
+            raise RuntimeError("boom")
+
+    assert not in_transaction()
+    assert get_all_classes() == []
@@ -0,0 +1,39 @@
+from app.services.article_services import create_article, update_article
+from app.services.feed_services import ARTICLE_FEED, get_feed_metadata, rebuild_article_feed
+
+
+def test_second_published_article_rebuilds_the_feed(app, writer):
+    # The first article is reloaded from the database (naive datetimes),
+    # the second one is still in the session (aware): the feed must compare both.
+    first = create_article("First", "Body", writer.id, is_published=True)
+    second = create_article("Second", "Body", writer.id, is_published=True)
+    update_article(first.id, title="First, edited")
+
+    content = get_feed_metadata(ARTICLE_FEED).content.decode()
+    assert "First, edited" in content
+    assert "Second" in content
+    assert second.id
+
+
+def test_feed_answers_304_to_a_conditional_get(client, writer):
+    create_article("Published", "Body", writer.id, is_published=True)
+    response = client.get("/articles/feed.atom")
+    assert response.status_code == 200
+
+    again = client.get("/articles/feed.atom", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_feed_links_use_the_configured_base_url(app, client, writer):
+    app.config["FEED_BASE_URL"] = "https://school.example.com"
+    article = create_article("Published", "Body", writer.id, is_published=True)
+    built_outside_a_request = get_feed_metadata(ARTICLE_FEED).etag
+
+    # Rebuilt during a request from another host: same document
+    with app.test_request_context("/", base_url="http://evil.example"):
+        rebuild_article_feed()
+    feed = get_feed_metadata(ARTICLE_FEED)
+    assert feed.etag == built_outside_a_request
+    content = feed.content.decode()
+    assert f'href="https://school.example.com/articles/{article.id}"' in content
+    assert "evil.example" not in content
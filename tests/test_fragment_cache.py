@@ -0,0 +1,62 @@
+from flask_wtf.csrf import generate_csrf
+
+from app import db
+from app.cache import _CSRF_PLACEHOLDER, _get_cache
+from app.services.user_services import get_user_by_username
+
+TEMPLATE = ("{% cache cache_version('user', user.id) %}"
+            "{{ user.first_name }}<input name=csrf_token value={{ token() }}>"
+            "{% endcache %}")
+
+
+def _render(app, user, calls=None):
+    """Render TEMPLATE in a new request, i.e. for a new browser session (and a new `g`)."""
+    def token():
+        if calls is not None:
+            calls.append(1)
+        return generate_csrf()
+    with app.app_context(), app.test_request_context():
+        html = app.jinja_env.from_string(TEMPLATE).render(user=user, token=token)
+        return html, generate_csrf()
+
+
+def _stored_fragments(app):
+    lru = _get_cache().lru._data
+    return [value for key, value in lru.items() if "fragment:" in key]
+
+
+def test_fragment_is_rendered_once_with_each_session_token(app):
+    admin = get_user_by_username("admin")
+    calls = []
+
+    first, first_token = _render(app, admin, calls)
+    second, second_token = _render(app, admin, calls)
+
+    assert calls == [1]  # the second render came from the cache
+    assert first_token != second_token
+    assert first_token in first and second_token in second
+    assert first_token not in second
+    assert [_CSRF_PLACEHOLDER in html for html in _stored_fragments(app)] == [True]
+
+
+def test_fragment_is_rendered_again_after_the_row_changes(app):
+    admin = get_user_by_username("admin")
+    _render(app, admin)
+
+    admin.first_name = "Ada"
+    db.session.commit()
+
+    assert _render(app, admin)[0].startswith("Ada")
+
+
+def test_uncommitted_changes_are_not_stored(app):
+    admin = get_user_by_username("admin")
+    admin.first_name = "Ada"
+    db.session.flush()
+
+    with app.test_request_context():  # same database session
+        html = app.jinja_env.from_string(TEMPLATE).render(user=admin, token=generate_csrf)
+
+    assert html.startswith("Ada")
+    assert _stored_fragments(app) == []
+    db.session.rollback()
@@ -0,0 +1,38 @@
+import pytest
+
+from app.services.class_services import create_class
+from app.services.grade_services import get_grades_by_student
+from app.services.student_services import create_student
+from app.services.subject_services import create_subject
+from app.services.teacher_services import create_teacher
+from tests.conftest import login
+
+
+@pytest.fixture
+def grading(app, client):
+    school_class = create_class("A", "1st Year")
+    subject = create_subject("Maths")
+    create_teacher("teacher", "password", "teacher@example.com", "First", "Last", "1980-01-01 00:00:00",
+                   "0600000000", classes_ids=[school_class.id], subjects_ids=[subject.id])
+    student = create_student("student", "password", "student@example.com", "First", "Last",
+                             "2010-01-01 00:00:00", "0600000000", class_id=school_class.id)
+    login(client, "teacher")
+    return f"/teacher/class/{school_class.id}/grades", student.id, subject.id
+
+
+@pytest.mark.parametrize("grade", ["0", "12.5", "20"])
+def test_teacher_can_enter_any_grade_in_range(client, grading, grade):
+    url, student_id, subject_id = grading
+    response = client.post(url, data={"student_id": student_id, "subject_id": subject_id, "grade": grade})
+
+    assert response.status_code == 302
+    assert [g.grade for g in get_grades_by_student(student_id)] == [float(grade)]
+
+
+@pytest.mark.parametrize("grade", ["", "-1", "20.5"])
+def test_missing_or_out_of_range_grades_are_rejected(client, grading, grade):
+    url, student_id, subject_id = grading
+    response = client.post(url, data={"student_id": student_id, "subject_id": subject_id, "grade": grade})
+
+    assert response.status_code == 200
+    assert get_grades_by_student(student_id) == []
@@ -0,0 +1,20 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+
+def test_failed_statement_does_not_skew_the_next_one(app):
+    with app.test_request_context("/"):
+        app.preprocess_request()
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        db.session.rollback()
+        db.session.execute(text("SELECT 1"))
+
+        stats = g._sql_stats
+        assert stats["count"] == 1
+        assert stats["statements"]["SELECT 1"] == 1
+        assert 0 <= stats["duration"] < 1
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from app import db
+from app.jobs import Worker, run_job, task
+from app.services.job_services import (RETRY_BASE_SECONDS, _now, claim_job, enqueue_job, fail_job,
+                                       get_queued_job_by_dedup_key)
+
+calls = []
+
+
+@task("tests.record")
+def record(value):
+    calls.append(value)
+    return value
+
+
+@task("tests.explode")
+def explode():
+    raise RuntimeError("boom")
+
+
+def test_dedup_returns_the_queued_job(app):
+    first = enqueue_job("tests.record", 1, dedup_key="export")
+    again = enqueue_job("tests.record", 2, dedup_key="export")
+    assert again.id == first.id
+    assert get_queued_job_by_dedup_key("export").id == first.id
+
+
+def test_dedup_ignores_a_running_job(app):
+    first = enqueue_job("tests.record", 1, dedup_key="export")
+    assert claim_job("worker-1").id == first.id
+
+    # Changes made while the first export runs need an export of their own.
+    second = enqueue_job("tests.record", 2, dedup_key="export")
+    assert second.id != first.id
+    assert get_queued_job_by_dedup_key("export").id == second.id
+
+
+def test_failed_attempt_is_retried_with_backoff(app):
+    job = enqueue_job("tests.explode", max_attempts=3)
+
+    claimed = claim_job("worker-1")
+    assert not run_job(claimed)
+    assert claimed.status == "queued"
+    assert claimed.attempts == 1
+    assert "boom" in claimed.last_error
+    assert claimed.run_at >= _now() + timedelta(seconds=RETRY_BASE_SECONDS - 1)
+    assert claim_job("worker-1") is None  # not due yet
+
+    claimed.run_at = _now()
+    claim_job("worker-1")
+    fail_job(claimed, "boom")
+    assert claimed.status == "queued"
+    assert claimed.run_at >= _now() + timedelta(seconds=2 * RETRY_BASE_SECONDS - 1)
+
+    claimed.run_at = _now()
+    claim_job("worker-1")
+    fail_job(claimed, "boom")
+    assert claimed.id == job.id
+    assert claimed.status == "failed"
+    assert claimed.attempts == 3
+
+
+def test_failed_job_is_not_retried_when_a_newer_one_is_queued(app):
+    enqueue_job("tests.explode", dedup_key="export")
+    running = claim_job("worker-1")
+    newer = enqueue_job("tests.explode", dedup_key="export")
+
+    fail_job(running, "boom")
+    assert running.status == "failed"
+    assert get_queued_job_by_dedup_key("export").id == newer.id
+
+
+def test_successful_job_is_done(app):
+    enqueue_job("tests.record", "hello")
+    job = claim_job("worker-1")
+    assert run_job(job)
+    assert job.status == "done"
+    assert job.result == '"hello"'
+    assert calls[-1] == "hello"
+
+
+def test_worker_gives_back_abandoned_jobs_while_running(app, monkeypatch):
+    app.config["JOB_TIMEOUT"] = 60
+    clock = [1000.0]
+    monkeypatch.setattr("app.jobs.time.monotonic", lambda: clock[0])
+    worker = Worker(app, threads=1)
+
+    def abandon():
+        job = enqueue_job("tests.record", 1)
+        claim_job("dead-worker")
+        job.locked_at = _now() - timedelta(seconds=120)
+        db.session.commit()
+        return job
+
+    first = abandon()
+    worker.requeue_stale_jobs()
+    assert first.status == "queued"
+
+    second = abandon()
+    clock[0] += 29  # less than JOB_TIMEOUT/2 since the last check
+    worker.requeue_stale_jobs()
+    assert second.status == "running"
+
+    clock[0] += 1
+    worker.requeue_stale_jobs()
+    assert second.status == "queued"
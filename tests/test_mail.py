@@ -0,0 +1,132 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+
+from app import db
+from app.models.outbound_email import OutboundEmail
+from app.services.job_services import claim_job, get_queued_job_by_dedup_key
+from app.services.mail_services import (PRIORITY_BULK, RETRY_BASE_SECONDS, _now, flush_outbox, queue_emails,
+                                        send_verification_emails)
+from app.services.user_services import create_user
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP. `failures` maps a recipient to the error
+    its message raises; SMTPServerDisconnected also breaks the connection."""
+
+    connections = []
+    failures = {}
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.open = True
+        FakeSMTP.connections.append(self)
+
+    def send_message(self, message):
+        if not self.open:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        error = FakeSMTP.failures.get(message["To"])
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            self.open = False
+        if error is not None:
+            raise error
+        self.sent.append(message["To"])
+
+    def noop(self):
+        return (250, b"OK") if self.open else (421, b"closed")
+
+    def quit(self):
+        self.open = False
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    monkeypatch.setattr(FakeSMTP, "connections", [])
+    monkeypatch.setattr(FakeSMTP, "failures", {})
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    app.config.update(MAIL_CONNECTIONS=1, MAIL_BATCH_SIZE=2)
+    return FakeSMTP
+
+
+def _queue(*addresses):
+    queue_emails([{"to_address": address, "subject": "Hello", "body_text": "Hi", "body_html": None}
+                  for address in addresses])
+
+
+def _email(address):
+    return OutboundEmail.query.filter_by(to_address=address).one()
+
+
+def test_batches_reuse_one_pooled_connection(smtp):
+    _queue("a@example.com", "b@example.com", "c@example.com", "d@example.com", "e@example.com")
+    assert flush_outbox() == {"sent": 5, "retried": 0, "failed": 0}
+
+    _queue("f@example.com")
+    flush_outbox()
+
+    assert len(smtp.connections) == 1
+    assert smtp.connections[0].sent == ["a@example.com", "b@example.com", "c@example.com", "d@example.com",
+                                        "e@example.com", "f@example.com"]
+    assert {email.status for email in OutboundEmail.query} == {"sent"}
+
+
+def test_temporary_refusal_is_retried_with_backoff(smtp):
+    smtp.failures["busy@example.com"] = smtplib.SMTPRecipientsRefused({"busy@example.com": (451, b"Try later")})
+    _queue("busy@example.com", "ok@example.com")
+    claim_job("worker")  # the mail.flush job that runs flush_outbox()
+
+    assert flush_outbox() == {"sent": 1, "retried": 1, "failed": 0}
+
+    email = _email("busy@example.com")
+    assert (email.status, email.attempts) == ("queued", 1)
+    assert email.next_attempt_at - _now() > timedelta(seconds=RETRY_BASE_SECONDS - 5)
+    assert "451" in email.last_error
+    assert get_queued_job_by_dedup_key("mail.flush").run_at > _now()  # the next flush waits for the retry
+
+
+def test_permanent_refusal_fails_at_once(smtp):
+    smtp.failures["nobody@example.com"] = smtplib.SMTPRecipientsRefused(
+        {"nobody@example.com": (550, b"No such user")})
+    _queue("nobody@example.com", "ok@example.com")
+
+    assert flush_outbox() == {"sent": 1, "retried": 0, "failed": 1}
+    assert _email("nobody@example.com").status == "failed"
+    assert _email("ok@example.com").status == "sent"
+
+
+def test_dropped_connection_queues_the_rest_of_the_batch(smtp, app):
+    app.config["MAIL_BATCH_SIZE"] = 3
+    smtp.failures["drop@example.com"] = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+    _queue("first@example.com", "drop@example.com", "last@example.com")
+
+    assert flush_outbox() == {"sent": 1, "retried": 2, "failed": 0}
+    assert [_email(address).status for address in ("first@example.com", "drop@example.com", "last@example.com")] \
+        == ["sent", "queued", "queued"]
+
+    # The broken connection was not given back to the pool.
+    OutboundEmail.query.filter_by(status="queued").update({"next_attempt_at": _now()})
+    del smtp.failures["drop@example.com"]
+    db.session.commit()
+    assert flush_outbox()["sent"] == 2
+    assert len(smtp.connections) == 2
+
+
+def test_verification_emails_are_queued_in_bulk(smtp, app):
+    app.config["MAIL_BASE_URL"] = "https://school.example.com"
+    users = [create_user(username=f"student{n}", password="password", role="student",
+                         email=f"student{n}@example.com") for n in range(3)]
+    users.append(create_user(username="no-email", password="password", role="student"))
+
+    assert send_verification_emails(users) == 3
+
+    emails = OutboundEmail.query.order_by(OutboundEmail.id).all()
+    assert [email.to_address for email in emails] == [f"student{n}@example.com" for n in range(3)]
+    assert {email.priority for email in emails} == {PRIORITY_BULK}
+    assert all("https://school.example.com/" in email.body_text for email in emails)
+    assert all(user.email_verification_token for user in users[:3])
+    assert get_queued_job_by_dedup_key("mail.flush") is not None
+    assert smtp.connections == []  # nothing is sent before the job runs
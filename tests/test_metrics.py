@@ -0,0 +1,48 @@
+import pytest
+
+from app import create_app
+
+
+def _metrics_client(tmp_path, **config):
+    app = create_app({
+        "DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "first_load": False,
+        "CACHE_BACKEND": "memory",
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        **config,
+    })
+    app.config.update(TESTING=True)
+    return app.test_client()
+
+
+LOCAL = {"REMOTE_ADDR": "127.0.0.1"}
+
+
+def test_localhost_may_scrape(tmp_path):
+    client = _metrics_client(tmp_path)
+    response = client.get("/metrics", environ_base=LOCAL)
+    assert response.status_code == 200
+    assert b"aqsam_http_requests_total" in response.data
+
+
+def test_proxied_request_from_localhost_is_refused(tmp_path):
+    client = _metrics_client(tmp_path)
+    response = client.get("/metrics", environ_base=LOCAL, headers={"X-Forwarded-For": "203.0.113.7"})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("forwarded_for, status", [("127.0.0.1", 200), ("203.0.113.7", 403)])
+def test_proxy_count_reads_the_client_address(tmp_path, forwarded_for, status):
+    client = _metrics_client(tmp_path, PROXY_COUNT=1)
+    response = client.get("/metrics", environ_base=LOCAL, headers={"X-Forwarded-For": forwarded_for})
+    assert response.status_code == status
+
+
+@pytest.mark.parametrize("authorization, status", [
+    ("Bearer s3cret", 200), ("Bearer wrong", 403), (None, 403),
+])
+def test_token_is_required_when_set(tmp_path, authorization, status):
+    client = _metrics_client(tmp_path, METRICS_TOKEN="s3cret")
+    headers = {"Authorization": authorization} if authorization else {}
+    response = client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"}, headers=headers)
+    assert response.status_code == status
@@ -0,0 +1,100 @@
+import pytest
+
+from app import db
+from app.models.student import Student
+from app.services.class_services import create_class
+from app.services.promotion_services import (preview_promotion, promote_students, suggest_promotion_plan,
+                                             undo_promotion)
+from app.services.student_services import create_student
+from app.services.user_services import create_user
+from tests.conftest import login
+
+
+@pytest.fixture
+def school(app):
+    """Two classes per level over three levels, two students in each."""
+    classes = {}
+    for level in ("1st Year", "2nd Year", "3rd Year"):
+        for name in ("A", "B"):
+            classes[level[0] + name] = create_class(name, level)
+    students = {}
+    for key, school_class in classes.items():
+        for n in range(2):
+            username = f"{key}-{n}"
+            students[username] = create_student(username, "password", f"{username}@example.com", "First",
+                                                 "Last", "2010-01-01 00:00:00", "0600000000",
+                                                 class_id=school_class.id)
+    return {key: c.id for key, c in classes.items()}, {key: s.id for key, s in students.items()}
+
+
+def _class_of(student_id):
+    return db.session.get(Student, student_id).class_id
+
+
+def _placement():
+    db.session.expire_all()
+    return dict(db.session.query(Student.id, Student.class_id).all())
+
+
+def test_suggested_plan_moves_up_one_level(school):
+    classes, _ = school
+    assert suggest_promotion_plan() == {
+        classes["1A"]: classes["2A"], classes["1B"]: classes["2B"],
+        classes["2A"]: classes["3A"], classes["2B"]: classes["3B"],
+        classes["3A"]: None, classes["3B"]: None,
+    }
+
+
+def test_preview_changes_nothing(school):
+    before = _placement()
+    preview = preview_promotion(suggest_promotion_plan())
+    assert preview["students"] == 12
+    assert preview["warnings"] == []
+    assert _placement() == before
+
+
+def test_promotion_moves_everyone_at_once(school):
+    classes, students = school
+    batch = promote_students(suggest_promotion_plan())
+    assert batch.students == 12
+    db.session.expire_all()
+    assert _class_of(students["1A-0"]) == classes["2A"]
+    assert _class_of(students["2A-0"]) == classes["3A"]  # not carried on to graduation
+    assert _class_of(students["3B-1"]) is None
+
+
+def test_undo_restores_the_previous_classes(school):
+    before = _placement()
+    batch = promote_students(suggest_promotion_plan())
+    assert undo_promotion(batch.id) == 12
+    assert _placement() == before
+    assert undo_promotion(batch.id) is None  # only once
+
+
+def test_undo_leaves_students_moved_since_alone(school):
+    classes, students = school
+    batch = promote_students(suggest_promotion_plan())
+    moved = db.session.get(Student, students["1A-0"])
+    moved.class_id = classes["1B"]
+    db.session.commit()
+
+    assert undo_promotion(batch.id) == 11
+    db.session.expire_all()
+    assert _class_of(students["1A-0"]) == classes["1B"]
+    assert _class_of(students["1A-1"]) == classes["1A"]
+
+
+def test_plan_with_unknown_class_is_refused(school):
+    classes, _ = school
+    before = _placement()
+    assert promote_students({classes["1A"]: 9999}) is None
+    assert _placement() == before
+
+
+def test_only_admins_may_promote(client, school):
+    create_user(username="teacher", password="password", role="teacher")
+    login(client, "teacher")
+    before = _placement()
+    assert client.post("/admin/promotions", data={"submit": "Promote Students"}).status_code == 403
+    assert client.post("/admin/promotions/1/undo").status_code == 403
+    assert _placement() == before
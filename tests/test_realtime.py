@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.jobs import TASKS
+from app.models.grade_event import GradeEvent
+from app.realtime import GRADES_NAMESPACE, socketio
+from app.services.student_services import create_student
+from tests.conftest import login
+
+
+@pytest.fixture
+def student_client(app, client):
+    create_student("student", "password", "student@example.com", "Sam", "Student",
+                   "2010-01-01 00:00:00", "0600000001")
+    login(client, "student")
+    return client
+
+
+@pytest.mark.parametrize("cursor", ["12", "DROP", -1, 1.5, True, [1]])
+def test_connection_with_a_bad_cursor_is_refused(app, student_client, cursor):
+    socket = socketio.test_client(app, namespace=GRADES_NAMESPACE, auth={"cursor": cursor},
+                                  flask_test_client=student_client)
+    assert not socket.is_connected(GRADES_NAMESPACE)
+
+
+def test_student_pages_load_socket_io_from_the_app(app, student_client):
+    page = student_client.get("/student/").get_data(as_text=True)
+    assert "cdn.socket.io" not in page
+    assert "/assets/" in page and "/vendor/socket.io.min.js" in page
+
+
+def test_prune_deletes_only_old_grade_events(app):
+    now = datetime.now(timezone.utc)
+    db.session.add_all([GradeEvent(student_id=1, grade_id=1, action="created", created_at=now - timedelta(days=40)),
+                        GradeEvent(student_id=1, grade_id=2, action="created", created_at=now)])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["realtime", "prune", "--days", "30"])
+
+    assert "1 grade events deleted" in result.output
+    assert [event.grade_id for event in GradeEvent.query.all()] == [2]
+    assert TASKS["grades.prune_events"](0) == 1  # also queueable as a job
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from app.services.article_services import create_article, update_article
+from app.services.revision_services import (_apply_delta, _make_delta, get_article_history,
+                                            get_article_revision_content, restore_article_revision)
+
+
+@pytest.mark.parametrize("newer, older", [
+    ("", ""),
+    ("same\n", "same\n"),
+    ("a\nb\nc\n", "a\nc\n"),
+    ("a\nc\n", "a\nb\nc\n"),
+    ("no trailing newline", "no trailing newline\nand more"),
+    ("one\r\ntwo\r\n", "one\ntwo\n"),
+    ("", "only in the older one\n"),
+])
+def test_delta_round_trip(newer, older):
+    assert _apply_delta(newer, _make_delta(newer, older)) == older
+
+
+def test_delta_round_trip_random_edits():
+    rng = random.Random(0)
+    lines = [f"line {n}\n" for n in range(200)]
+    for _ in range(50):
+        edited = list(lines)
+        for _ in range(rng.randint(1, 10)):
+            position = rng.randrange(len(edited))
+            rng.choice([lambda: edited.pop(position),
+                        lambda: edited.insert(position, f"new {rng.random()}\n"),
+                        lambda: edited.__setitem__(position, "changed\n")])()
+        newer, older = "".join(edited), "".join(lines)
+        assert _apply_delta(newer, _make_delta(newer, older)) == older
+        lines = edited
+
+
+def test_small_edit_of_a_long_body_stores_a_small_delta():
+    body = "".join(f"Paragraph {n} of a long article.\n" for n in range(2000))
+    delta = _make_delta(body.replace("Paragraph 1000 ", "Paragraph one thousand "), body)
+    assert len(delta) < 200
+
+
+@pytest.fixture
+def article(app, writer):
+    article = create_article("Version 1", "one\n", writer.id)
+    update_article(article.id, title="Version 2", content_md="one\ntwo\n")
+    update_article(article.id, title="Version 3", content_md="two\nthree\n")
+    return article
+
+
+def test_every_version_can_be_rebuilt(article):
+    history = get_article_history(article.id)
+    assert [(r.number, r.title) for r in history] == [(2, "Version 2"), (1, "Version 1")]
+    assert get_article_revision_content(article.id, 1) == "one\n"
+    assert get_article_revision_content(article.id, 2) == "one\ntwo\n"
+    assert get_article_revision_content(article.id, 3) is None
+    assert get_article_revision_content(article.id + 1, 1) is None
+
+
+def test_unchanged_update_records_no_revision(article):
+    update_article(article.id, content_md="two\nthree\n")
+    assert len(get_article_history(article.id)) == 2
+
+
+def test_restore_keeps_the_replaced_version(article):
+    restored = restore_article_revision(article.id, 1)
+    assert (restored.title, restored.content_md) == ("Version 1", "one\n")
+    assert [r.number for r in get_article_history(article.id)] == [3, 2, 1]
+    # The restore can itself be undone
+    assert get_article_revision_content(article.id, 3) == "two\nthree\n"
+    restore_article_revision(article.id, 3)
+    assert (restored.title, restored.content_md) == ("Version 3", "two\nthree\n")
+
+
+def test_restoring_a_missing_revision_changes_nothing(article):
+    assert restore_article_revision(article.id, 9) is None
+    assert len(get_article_history(article.id)) == 2
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+
+import pytest
+
+from app.services import settings_services
+from app.services.settings_services import load_settings, save_settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(settings_services.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "settings.json")
+
+
+def _replace(path, data):
+    """Write the way another worker does: a new file moved in place."""
+    with open(path + ".new", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".new", path)
+
+
+def test_missing_file_is_created_from_the_defaults(path, clock):
+    assert dict(load_settings(path, {"a": 1})) == {"a": 1}
+    with open(path) as f:
+        assert json.load(f) == {"a": 1}
+
+
+def test_settings_are_read_only(path, clock):
+    with pytest.raises(TypeError):
+        load_settings(path, {"a": 1})["a"] = 2
+
+
+def test_change_on_disk_is_seen_after_the_reload_interval(path, clock):
+    load_settings(path, {"name": "old"})
+    _replace(path, {"name": "new"})
+    assert load_settings(path)["name"] == "old"  # checked less than RELOAD_INTERVAL ago
+
+    clock.now += settings_services.RELOAD_INTERVAL
+    assert load_settings(path)["name"] == "new"
+
+
+def test_same_size_rewrite_is_seen(path, clock):
+    load_settings(path, {"name": "aaa"})
+    _replace(path, {"name": "bbb"})  # same size, possibly same mtime: the inode changed
+    clock.now += settings_services.RELOAD_INTERVAL
+    assert load_settings(path)["name"] == "bbb"
+
+
+def test_unchanged_file_is_not_parsed_again(path, clock, monkeypatch):
+    first = load_settings(path, {"a": 1})
+    reads = []
+    monkeypatch.setattr(settings_services, "_read", lambda *args: reads.append(args))
+    for _ in range(3):
+        clock.now += settings_services.RELOAD_INTERVAL
+        assert load_settings(path) is first
+    assert reads == []
+
+
+def test_save_merges_and_is_seen_at_once(path, clock):
+    load_settings(path, {"a": 1, "b": 2})
+    assert dict(save_settings(path, {"b": 3, "c": 4})) == {"a": 1, "b": 3, "c": 4}
+    assert dict(load_settings(path)) == {"a": 1, "b": 3, "c": 4}
+    assert os.listdir(os.path.dirname(path)) == ["settings.json", "settings.json.lock"]
+
+
+def test_concurrent_saves_keep_every_change(path):
+    save_settings(path, {}, {})
+    threads = [threading.Thread(target=save_settings, args=(path, {f"key{n}": n})) for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path) as f:
+        assert json.load(f) == {f"key{n}": n for n in range(20)}
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.services.class_services import create_class
+from app.services.subject_services import create_subject
+from app.services.teacher_services import (create_teacher, get_teacher_assignments, sync_teacher_classes,
+                                           sync_teacher_subjects)
+from app.services.user_services import create_user
+from tests.conftest import login
+
+
+@pytest.fixture
+def school(app):
+    classes = [create_class(name, "1st Year").id for name in ("A", "B", "C")]
+    subjects = [create_subject(name).id for name in ("Maths", "French")]
+    teachers = [create_teacher(f"t{n}", "password", f"t{n}@example.com", "First", "Last", "1980-01-01 00:00:00",
+                               "0600000000", classes_ids=classes[:2], subjects_ids=subjects[:1]).id
+                for n in range(2)]
+    return teachers, classes, subjects
+
+
+def _sorted(assignments):
+    return {teacher_id: sorted(ids) for teacher_id, ids in assignments.items()}
+
+
+def test_sync_writes_only_the_difference(school):
+    (t0, t1), (a, b, c), _ = school
+    assert sync_teacher_classes({t0: [b, c]}) == {"added": 1, "removed": 1}
+    assert _sorted(get_teacher_assignments()["classes"]) == {t0: [b, c], t1: [a, b]}  # t1 left alone
+
+
+def test_sync_without_changes_writes_nothing(school):
+    (t0, t1), (a, b, _), _ = school
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert sync_teacher_classes({t0: [a, b], t1: [b, a]}) == {"added": 0, "removed": 0}
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if s.lstrip().upper().startswith(("INSERT", "DELETE", "UPDATE"))]
+
+
+def test_sync_ignores_unknown_ids(school):
+    (t0, t1), _, (maths, french) = school
+    assert sync_teacher_subjects({t0: [french, 999], 999: [maths]}) == {"added": 1, "removed": 1}
+    assert _sorted(get_teacher_assignments()["subjects"]) == {t0: [french], t1: [maths]}
+
+
+def test_sync_refreshes_loaded_collections(school):
+    from app.models.teacher import Teacher
+    (t0, _), (a, b, c), _ = school
+    teacher = db.session.get(Teacher, t0)
+    assert sorted(cls.id for cls in teacher.classes) == [a, b]
+    sync_teacher_classes({t0: []})
+    assert teacher.classes == []
+
+
+def test_assignment_page_syncs_the_checked_boxes(client, school):
+    (t0, t1), (a, b, c), _ = school
+    login(client, "admin", "admin")
+    response = client.post("/admin/teacher_assignments?kind=classes",
+                           data={"pair": [f"{t0}:{c}", f"{t1}:{a}", f"{t1}:{b}"]})
+    assert response.status_code == 302
+    assert _sorted(get_teacher_assignments()["classes"]) == {t0: [c], t1: [a, b]}
+
+
+def test_only_admins_may_change_assignments(client, school):
+    (t0, _), (_, _, c), _ = school
+    before = get_teacher_assignments()
+    create_user(username="teacher", password="password", role="teacher")
+    login(client, "teacher")
+    assert client.get("/admin/teacher_assignments").status_code == 403
+    assert client.post("/admin/teacher_assignments", data={"pair": [f"{t0}:{c}"]}).status_code == 403
+    assert get_teacher_assignments() == before
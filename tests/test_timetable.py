@@ -0,0 +1,84 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.user_services import create_user
+from app.timetable import Lesson, Slot, solve
+from tests.conftest import login
+
+SLOTS = [Slot(period_id=100 + day * 6 + slot, day=day) for day in range(5) for slot in range(6)]
+ROOMS = [1, 2, 3, 4, 5]  # fewer rooms than classes: rooms are a real constraint
+
+
+def _school(classes=6, teachers=8, seed=0):
+    """Every class gets 24 of the 30 periods, each subject from one teacher."""
+    rng = random.Random(seed)
+    load = Counter()
+    lessons = []
+    for class_id in range(1, classes + 1):
+        for subject_id, periods in enumerate((5, 5, 4, 4, 3, 3), start=1):
+            teacher_id = min(range(1, teachers + 1), key=lambda t: (load[t], rng.random()))
+            load[teacher_id] += periods
+            lessons += [Lesson(class_id, subject_id, teacher_id, n) for n in range(periods)]
+    return lessons
+
+
+def _check_valid(lessons, result):
+    assert result.conflicts == 0
+    assert set(result.assignment) == {lesson.key for lesson in lessons}
+    periods = {slot.period_id for slot in SLOTS}
+    assert set(result.assignment.values()) <= periods
+
+    teacher_busy = Counter((lesson.teacher_id, result.assignment[lesson.key]) for lesson in lessons)
+    class_busy = Counter((lesson.class_id, result.assignment[lesson.key]) for lesson in lessons)
+    assert max(teacher_busy.values()) == 1
+    assert max(class_busy.values()) == 1
+
+    assert set(result.rooms) == set(result.assignment)
+    room_busy = Counter((result.assignment[key], room) for key, room in result.rooms.items())
+    assert max(room_busy.values()) == 1
+    assert set(result.rooms.values()) <= set(ROOMS)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_solution_has_no_double_booking(seed):
+    lessons = _school(seed=seed)
+    _check_valid(lessons, solve(lessons, SLOTS, ROOMS, time_limit=10, seed=seed))
+
+
+def test_same_seed_same_timetable():
+    lessons = _school()
+    first = solve(lessons, SLOTS, ROOMS, seed=7)
+    second = solve(lessons, SLOTS, ROOMS, seed=7)
+    assert first.assignment == second.assignment
+    assert first.rooms == second.rooms
+
+
+def test_re_solving_keeps_lessons_in_place():
+    lessons = _school()
+    before = solve(lessons, SLOTS, ROOMS)
+    # One more period of subject 6 for class 1, from the same teacher
+    teacher_id = next(lesson.teacher_id for lesson in lessons if lesson.key[:2] == (1, 6))
+    changed = lessons + [Lesson(1, 6, teacher_id, 3)]
+
+    after = solve(changed, SLOTS, ROOMS, previous=before.assignment, previous_rooms=before.rooms)
+    _check_valid(changed, after)
+    assert after.moved <= 5
+    assert after.stats["kept"] >= len(lessons) - 5
+    kept_rooms = sum(1 for key, room in before.rooms.items() if after.rooms.get(key) == room)
+    assert kept_rooms >= len(lessons) - 10
+
+
+def test_impossible_timetable_reports_conflicts():
+    # 31 lessons for one class in a 30-period week
+    lessons = [Lesson(1, 1, 1 + n % 3, n) for n in range(31)]
+    result = solve(lessons, SLOTS, ROOMS, time_limit=0.5)
+    assert result.conflicts > 0
+    assert set(result.assignment) == {lesson.key for lesson in lessons}
+
+
+def test_only_admins_may_solve(client):
+    create_user(username="teacher", password="password", role="teacher")
+    login(client, "teacher")
+    assert client.post("/admin/timetable/solve").status_code == 403
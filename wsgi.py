@@ -0,0 +1,10 @@
+# wsgi.py
+# Entry point for production WSGI servers, e.g.:
+#   gunicorn --preload --workers 4 wsgi:app
+# With --preload the app is created and warmed up once in the master process,
+# and the workers fork from it with everything already imported and compiled.
+
+from app import create_app, warm_up
+
+app = create_app()
+warm_up(app)